@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+import os
+import sys, getopt
+import collections
+import csv
+import shlex
+import time
+import multiprocessing as mp
+import multiprocessing.connection
+
+
+def read_universe(file_name):
+    """
+    Read a universe file. Each line contains a quote followed by its main.py options, e.g.
+        SAN --strategy all --from-date 2011-12-22 --to-date 2013-12-22 --nn-days 10
+    Empty lines and lines starting with # are ignored.
+    :param file_name: universe file name
+    :return: list of jobs, tuples with job id, quote and main.py options
+    """
+    jobs = []
+
+    with open(file_name) as f:
+        for line in f:
+            line = line.strip()
+
+            if len(line) == 0 or line.startswith('#'):
+                continue
+
+            tokens = shlex.split(line)
+            jobs.append((len(jobs), tokens[0], ['--quote', tokens[0]] + tokens[1:]))
+
+    return jobs
+
+
+def worker_loop(conn, log_folder):
+    """
+    Worker process. Heavy modules are imported once and the worker runs the
+    jobs received from the connection until it receives None. The output of
+    each job is written to a log file.
+    :param conn: connection with the parent process
+    :param log_folder: folder for the log files of the jobs
+    """
+    import main
+    import src.utils.results_store as results_store
+
+    while True:
+        task = conn.recv()
+
+        if task is None:
+            break
+
+        job_id, quote, argv = task
+
+        start_time = time.time()
+        stdout = sys.stdout
+
+        try:
+            with open(os.path.join(log_folder, str(job_id) + '_' + quote + '.log'), 'a') as log_file:
+                sys.stdout = log_file
+                try:
+                    result_list = main.run(argv)
+                finally:
+                    sys.stdout = stdout
+
+            results = [(name, result.metrics['Inicial'], result.metrics['Final']) for result, name in result_list]
+            result = {'status': 'ok', 'results': results}
+        except (Exception, SystemExit) as e:
+            result = {'status': 'error', 'error': repr(e)}
+
+        result['time'] = time.time() - start_time
+        conn.send(result)
+
+    # Daemonic workers exit without running the atexit handlers
+    results_store.flush()
+
+
+def run_batch(jobs, n_workers, retries=0, timeout=None, log_folder='./resultados/batch'):
+    """
+    Run jobs in a pool of worker processes. Each worker has its own connection,
+    so a worker can be terminated and replaced without affecting the others.
+    :param jobs: list of jobs returned by read_universe
+    :param n_workers: number of worker processes
+    :param retries: number of times a failed job is retried
+    :param timeout: maximum seconds of each job, None for no limit
+    :param log_folder: folder for the log files of the jobs
+    :return: dict with the result of each job id
+    """
+    if not os.path.exists(log_folder):
+        os.makedirs(log_folder)
+
+    workers = {}
+
+    def start_worker(worker_id):
+        conn, worker_conn = mp.Pipe()
+        process = mp.Process(target=worker_loop, args=(worker_conn, log_folder))
+        process.daemon = True
+        process.start()
+        worker_conn.close()
+        workers[worker_id] = (process, conn)
+
+    def stop_worker(worker_id):
+        process, conn = workers.pop(worker_id)
+        process.terminate()
+        process.join()
+        conn.close()
+
+    for worker_id in range(n_workers):
+        start_worker(worker_id)
+
+    pending = collections.deque(jobs)
+    attempts = {job[0]: 0 for job in jobs}
+    running = {}
+    results = {}
+
+    def finish_job(job_id, result):
+        if result['status'] != 'ok' and attempts[job_id] <= retries:
+            print('Reintentando ' + jobs[job_id][1] + ' (' + result['status'] + ')')
+            pending.append(jobs[job_id])
+        else:
+            result['attempts'] = attempts[job_id]
+            results[job_id] = result
+            print('[' + str(len(results)) + '/' + str(len(jobs)) + '] ' + jobs[job_id][1] + ': ' + result['status'])
+
+    try:
+        while len(results) < len(jobs):
+
+            # Send pending jobs to idle workers
+            for worker_id in workers:
+                if worker_id not in running and len(pending) > 0:
+                    job = pending.popleft()
+                    workers[worker_id][1].send(job)
+                    attempts[job[0]] += 1
+                    running[worker_id] = (job[0], time.time())
+
+            busy_conns = {workers[worker_id][1]: worker_id for worker_id in running}
+
+            for conn in mp.connection.wait(list(busy_conns), timeout=1):
+                worker_id = busy_conns[conn]
+                job_id, start_time = running.pop(worker_id)
+
+                try:
+                    finish_job(job_id, conn.recv())
+                except EOFError:
+                    stop_worker(worker_id)
+                    start_worker(worker_id)
+                    finish_job(job_id, {'status': 'crashed', 'time': time.time() - start_time})
+
+            # Replace workers whose job exceeded the timeout
+            now = time.time()
+
+            for worker_id, (job_id, start_time) in list(running.items()):
+                if timeout != None and now - start_time > timeout:
+                    del running[worker_id]
+                    stop_worker(worker_id)
+                    start_worker(worker_id)
+                    finish_job(job_id, {'status': 'timeout', 'time': now - start_time})
+    finally:
+        for worker_id in list(workers):
+            stop_worker(worker_id)
+
+    return results
+
+
+def print_summary(jobs, results, file_name=None):
+    """
+    Print a summary with the result of each job and strategy
+    :param jobs: list of jobs returned by read_universe
+    :param results: dict with the result of each job id
+    :param file_name: if given, the summary is also saved in this csv file
+    """
+    header = ['Job', 'Mercado', 'Estado', 'Intentos', 'Tiempo(s)', 'Estrategia', 'Inicial', 'Final', 'Ganancia(%)']
+    rows = []
+
+    for job_id, quote, argv in jobs:
+        result = results[job_id]
+        common = [job_id, quote, result['status'], result['attempts'], round(result['time'], 1)]
+
+        if result['status'] != 'ok' or len(result['results']) == 0:
+            rows.append(common + [result.get('error', ''), '', '', ''])
+
+        for name, initial_value, final_value in result.get('results', []):
+            profit = round(100.0*(final_value-initial_value)/initial_value, 2)
+            rows.append(common + [name, round(initial_value, 2), round(final_value, 2), profit])
+
+    print('\n' + '\t'.join(header))
+
+    for row in rows:
+        print('\t'.join(str(value) for value in row))
+
+    if file_name != None:
+        with open(file_name, 'w') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+
+def main(argv):
+    universe = ''
+    n_workers = os.cpu_count()
+    retries = 0
+    timeout = None
+    log_folder = './resultados/batch'
+    report = 'metrics'
+
+    try:
+        opts, args = getopt.getopt(argv, 'hu:w:', ['help', 'universe=', 'workers=', 'retries=', 'timeout=', 'log-dir=', 'report='])
+    except getopt.GetoptError:
+        print('batch.py -u <universe-file> -w <workers>')
+        sys.exit(2)
+
+    for opt, arg in opts:
+        if opt in ('-h', '--help'):
+            print('\nDESCRIPTION')
+            print('\n\tRun main.py for each quote of a universe file in a pool of processes.')
+            print('\n\tEach line of the universe file has a quote followed by its main.py options.')
+            print('\nUSAGE')
+            print('\n\tbatch.py -u <universe-file> -w <workers>')
+            print('\nOPTIONS')
+            print('\n\t-u, --universe\tUniverse file.')
+            print('\n\t-w, --workers\tNumber of worker processes.')
+            print('\n\t--retries\tNumber of times a failed job is retried.')
+            print('\n\t--timeout\tMaximum seconds of each job.')
+            print('\n\t--log-dir\tFolder for the output of each job.')
+            print('\n\t--report\tmain.py report level of the jobs without --report in the universe file: metrics (default) | none | full | deferred.')
+            print('\n\t-h, --help\tDisplay help.')
+            sys.exit()
+        elif opt in ('-u', '--universe'):
+            universe = arg
+        elif opt in ('-w', '--workers'):
+            n_workers = int(arg)
+        elif opt == '--retries':
+            retries = int(arg)
+        elif opt == '--timeout':
+            timeout = float(arg)
+        elif opt == '--log-dir':
+            log_folder = arg
+        elif opt == '--report':
+            report = arg
+
+    jobs = read_universe(universe)
+
+    # PDF reports and charts are only rendered if the universe file asks for them
+    for job_id, quote, job_argv in jobs:
+        if not any(option.startswith('--report') for option in job_argv):
+            job_argv.append('--report=' + report)
+    results = run_batch(jobs, min(n_workers, len(jobs)), retries, timeout, log_folder)
+
+    print_summary(jobs, results, os.path.join(log_folder, 'summary.csv'))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -7,6 +7,10 @@ import os
 import sys, getopt
 
 import src.utils.func_utils as func_utils
+import src.utils.trace as trace
+import src.utils.results_store as results_store
+import src.utils.result_cache as result_cache
+from src.classes.replayMemory import ReplayMemory
 from src.strategies_execution.executions import *
 import src.strategies_execution.execution_plot as execution_plot
 
@@ -16,10 +20,23 @@ if not sys.warnoptions:
     warnings.simplefilter("ignore")
 
 
-def main(argv):
+def run(argv):
+    """
+    Run the strategies selected in the command line options
+    :param argv: command line options
+    :return: list with the BacktestResult and name of each executed strategy
+    """
     strategy = ''
     quote = ''
     commission = 0.001
+    update = False
+    engine = 'backtrader'
+    trace_file = None
+    trace_format = 'jsonl'
+    report = 'full'
+    use_cache = True
+    walk_forward = False
+    wf_options = {'window': 24, 'step': 6, 'horizon': 6, 'n_workers': None}
 
     s_train, e_train = '2009-12-22', '2011-12-21'
     s_test, e_test = '2011-12-22', '2013-12-22'
@@ -27,10 +44,11 @@ def main(argv):
 
     try:
         opts, args = getopt.getopt(argv, 'hs:q:f:t:vo', ['help', 'strategy=', 'quote=', 'from-date=', 'to-date=',
-                                                       'nn-gain=', 'nn-loss=', 'nn-days=', 'nn-epochs=',
-                                                       'pso-normalization=', 'pso-c1=', 'pso-c2=', 'pso-inertia=', 'pso-iters=',
+                                                       'nn-gain=', 'nn-loss=', 'nn-days=', 'nn-epochs=', 'nn-retrain=', 'nn-memory=', 'nn-memory-sampling=', 'nn-ensemble=', 'nn-ensemble-workers=', 'nn-inference=',
+                                                       'pso-normalization=', 'pso-c1=', 'pso-c2=', 'pso-inertia=', 'pso-iters=', 'pso-incremental', 'pso-workers=',
                                                        'ma-short=', 'ma-long=', 'optimize',
-                                                       'verbose'])
+                                                       'engine=', 'trace=', 'trace-format=', 'report=', 'no-cache', 'walk-forward', 'wf-window=', 'wf-step=', 'wf-horizon=', 'wf-workers=',
+                                                       'update', 'verbose'])
     except getopt.GetoptError:
         print('main.py -s <strategy> -q <quote> -f <from-date> -t <to-date>')
         sys.exit(2)
@@ -53,6 +71,25 @@ def main(argv):
             print('\n\t-q, --quote\tUse as quote any market abbreviation recognized by yahoo finance. Examples: AAPL | FB | GOOGL | AMZN | ...')
             print('\n\t-f, --from-date\tStart date in simulation.')
             print('\n\t-t, --to-date\tEnd date in simulation.')
+            print('\n\t--nn-retrain\tNeural network retraining policy: every-bar (default) | every:K (every K bars) | drift:T (when the rolling prediction error exceeds T) | online (one gradient step per bar).')
+            print('\n\t--nn-memory\tNumber of samples in the neural network retraining memory.')
+            print('\n\t--nn-memory-sampling\tSamples used to retrain the neural network: all (default) | uniform | recency.')
+            print('\n\t--nn-ensemble\tNumber of neural networks trained with different seeds, their predictions are averaged.')
+            print('\n\t--nn-ensemble-workers\tNumber of processes used to train the ensemble.')
+            print('\n\t--nn-inference\tEngine of the neural network predictions: keras (default) | numpy, a faster NumPy forward pass.')
+            print('\n\t--pso-incremental\tWarm-start the periodic PSO re-optimizations and stop them when the cost plateaus.')
+            print('\n\t--pso-workers\tNumber of processes used to evaluate the PSO swarm.')
+            print('\n\t--engine\tBacktest engine of buy-and-hold, classic, one-ma and two-ma: backtrader (default) | vectorized (same results with NumPy arrays, the charts are drawn from the recorded values).')
+            print('\n\t--trace\tWrite the bars, sizings, orders and trades of the backtrader simulations to this file.')
+            print('\n\t--trace-format\tFormat of the trace file: jsonl (default) | binary. Read it with src.utils.trace.read_trace.')
+            print('\n\t--report\tReports of each strategy: full (default, PDF report and charts) | metrics (only the metrics in resultados/results.db) | none | deferred (metrics, and the result is saved to render the PDF reports later with render_reports.py).')
+            print('\n\t--no-cache\tSimulate the strategies even if the same execution (data, dates, parameters and code) is in the results cache.')
+            print('\n\t--walk-forward\tEvaluate the strategies in rolling folds from --from-date to --to-date, each one trained with the months before it. The folds are executed in parallel and their capital is stitched together.')
+            print('\n\t--wf-window\tMonths of the training period of each fold (24 by default).')
+            print('\n\t--wf-step\tMonths between the start of two consecutive folds (6 by default).')
+            print('\n\t--wf-horizon\tMonths of the test period of each fold (6 by default).')
+            print('\n\t--wf-workers\tNumber of processes that execute the folds.')
+            print('\n\t--update\tDownload the days after the last saved date before the simulation.')
             print('\n\t-h, --help\tDisplay help.')
             sys.exit()
         elif opt in ("-s", "--strategy"):
@@ -63,95 +100,207 @@ def main(argv):
             s_test = arg
         elif opt in ("-t", "--to-date"):
             e_test = arg
+        elif opt == "--update":
+            update = True
+        elif opt == "--engine":
+            engine = arg
+        elif opt == "--trace":
+            trace_file = arg
+        elif opt == "--trace-format":
+            trace_format = arg
+        elif opt == "--report":
+            report = arg
+        elif opt == "--no-cache":
+            use_cache = False
+        elif opt == "--walk-forward":
+            walk_forward = True
+        elif opt == "--wf-window":
+            wf_options['window'] = int(arg)
+        elif opt == "--wf-step":
+            wf_options['step'] = int(arg)
+        elif opt == "--wf-horizon":
+            wf_options['horizon'] = int(arg)
+        elif opt == "--wf-workers":
+            wf_options['n_workers'] = int(arg)
         elif opt in("-v", "--verbose"):
             logging.disable(logging.NOTSET)
 
-    df = func_utils.getData(quote)
-
-    strategy_list = []
-
-    # Execute buy and hold strategy
-    if strategy in ('buy-and-hold', 'all'):
-        BH_Cerebro, BH_Strategy = execute_buy_and_hold_strategy(df, commission, quote, s_test, e_test)
-        strategy_list.append((BH_Strategy, 'Comprar y Mantener'))
-
-    # Execute classic strategy
-    if strategy in ('classic', 'all'):
-        Classic_Cerebro, Classic_Strategy = execute_classic_strategy(df, commission, quote, s_test, e_test)
-        strategy_list.append((Classic_Strategy, 'Estrategia Clásica'))
-
-    # Execute one moving average
-    if strategy in ('one-ma', 'all'):
-        OMA_Cerebro, OMA_Strategy = execute_one_moving_average_strategy(df, commission, quote, s_test, e_test)
-        strategy_list.append((OMA_Strategy, 'Estrategia Media Móvil'))
-
-    # Execute two moving average
-    if strategy in ('two-ma', 'all'):
-
-        params = {'ma_short': 5, 'ma_long': 20}
-        optimize = False
-
-        for opt, arg in opts:
-            if opt == '--ma-short':
-                print(opt)
-                params['ma_short'] = int(arg)
-            elif opt == '--ma-long':
-                params['ma_long'] = int(arg)
-            elif opt in ("-o", "--optimize"):
-                optimize = True
-
-        MAC_Cerebro, MAC_Strategy = execute_moving_averages_cross_strategy(df, commission, quote, s_test, e_test, optimize, **params)
-        strategy_list.append((MAC_Strategy, 'Estrategia Cruce Medias Móviles'))
-
-    # Execute neural network strategy
-    if strategy in ('neural-network', 'all'):
-
-        options = {'gain': 0.07, 'loss': 0.05, 'n_day': 10, 'epochs': 300}
-
-        for opt, arg in opts:
-            if opt == "--nn-gain":
-                options['gain'] = float(arg)
-            elif opt == "--nn-loss":
-                options['loss'] = float(arg)
-            elif opt == "--nn-days":
-                options['n_day'] = int(arg)
-            elif opt == "--nn-epochs":
-                options['epochs'] = int(arg)
-
-        NN_Cerebro, NN_Strategy = execute_neural_network_strategy(df, options, commission, quote, s_test, e_test)
-        strategy_list.append((NN_Strategy, 'Red Neuronal'))
-
-    # Execute combined signal strategy optimized with pso
-    if strategy in ('combined-signal-pso', 'all'):
-
-        normalization = 'exponential'
-        c1 = 0.5
-        c2 = 0.3
-        w = 0.9
-        iters = 400
-
-        for opt, arg in opts:
-            if opt in ("--pso-normalization"):
-                normalization = arg
-            elif opt in ("--pso-c1"):
-                c1 = arg
-            elif opt in ("--pso-c2"):
-                c2 = arg
-            elif opt in ("--pso-inertia"):
-                w = arg
-            elif opt in ("--pso-iters"):
-                iters = arg
-
-        options = {'c1': c1, 'c2': c2, 'w': w}
-
-        PSO_Cerebro, PSO_Strategy = execute_pso_strategy(df, options, commission, quote, s_test, e_test, iters, normalization)
-        strategy_list.append((PSO_Strategy, 'Particle Swarm Optimization'))
-
-    if len(strategy_list) == 0:
+    if engine not in ENGINES:
+        print('ERROR: incorrect engine name. Please select one between: ' + ' | '.join(ENGINES) + '.')
+        sys.exit(2)
+
+    if trace_format not in ('jsonl', 'binary'):
+        print('ERROR: incorrect trace format. Please select one between: jsonl | binary.')
+        sys.exit(2)
+
+    if report not in REPORT_LEVELS:
+        print('ERROR: incorrect report level. Please select one between: ' + ' | '.join(REPORT_LEVELS) + '.')
+        sys.exit(2)
+
+    result_cache.set_enabled(use_cache)
+
+    df = func_utils.getData(quote, update)
+
+    if trace_file != None:
+        trace.start_trace(trace_file, trace_format)
+
+    result_list = []
+
+    # The trace is always stopped, so a failed strategy does not leave it active for the next run
+    try:
+        # Execute buy and hold strategy
+        if strategy in ('buy-and-hold', 'all'):
+            if walk_forward:
+                BH_Result, BH_Strategy = execute_walk_forward_strategy(df, 'buy-and-hold', commission, quote, s_test, e_test, engine=engine, report=report, **wf_options)
+            else:
+                BH_Result, BH_Strategy = execute_buy_and_hold_strategy(df, commission, quote, s_test, e_test, engine, report)
+            result_list.append((BH_Result, 'Comprar y Mantener'))
+
+        # Execute classic strategy
+        if strategy in ('classic', 'all'):
+            if walk_forward:
+                Classic_Result, Classic_Strategy = execute_walk_forward_strategy(df, 'classic', commission, quote, s_test, e_test, engine=engine, report=report, **wf_options)
+            else:
+                Classic_Result, Classic_Strategy = execute_classic_strategy(df, commission, quote, s_test, e_test, engine, report)
+            result_list.append((Classic_Result, 'Estrategia Clásica'))
+
+        # Execute one moving average
+        if strategy in ('one-ma', 'all'):
+            if walk_forward:
+                OMA_Result, OMA_Strategy = execute_walk_forward_strategy(df, 'one-ma', commission, quote, s_test, e_test, engine=engine, report=report, **wf_options)
+            else:
+                OMA_Result, OMA_Strategy = execute_one_moving_average_strategy(df, commission, quote, s_test, e_test, engine, report)
+            result_list.append((OMA_Result, 'Estrategia Media Móvil'))
+
+        # Execute two moving average
+        if strategy in ('two-ma', 'all'):
+
+            params = {'ma_short': 5, 'ma_long': 20}
+            optimize = False
+
+            for opt, arg in opts:
+                if opt == '--ma-short':
+                    print(opt)
+                    params['ma_short'] = int(arg)
+                elif opt == '--ma-long':
+                    params['ma_long'] = int(arg)
+                elif opt in ("-o", "--optimize"):
+                    optimize = True
+
+            if walk_forward:
+                MAC_Result, MAC_Strategy = execute_walk_forward_strategy(df, 'two-ma', commission, quote, s_test, e_test, engine=engine, report=report, optimize=optimize, **dict(wf_options, **params))
+            else:
+                MAC_Result, MAC_Strategy = execute_moving_averages_cross_strategy(df, commission, quote, s_test, e_test, optimize, engine, report, **params)
+            result_list.append((MAC_Result, 'Estrategia Cruce Medias Móviles'))
+
+        # Execute neural network strategy
+        if strategy in ('neural-network', 'all'):
+
+            options = {'gain': 0.07, 'loss': 0.05, 'n_day': 10, 'epochs': 300}
+
+            for opt, arg in opts:
+                if opt == "--nn-gain":
+                    options['gain'] = float(arg)
+                elif opt == "--nn-loss":
+                    options['loss'] = float(arg)
+                elif opt == "--nn-days":
+                    options['n_day'] = int(arg)
+                elif opt == "--nn-epochs":
+                    options['epochs'] = int(arg)
+                elif opt == "--nn-retrain":
+                    options['retrain'] = arg
+                elif opt == "--nn-memory":
+                    options['memory'] = int(arg)
+
+                    if options['memory'] <= 0:
+                        print('ERROR: the neural network memory must be greater than 0.')
+                        sys.exit(2)
+                elif opt == "--nn-memory-sampling":
+                    options['memory_sampling'] = arg
+
+                    if arg not in ReplayMemory.SAMPLINGS:
+                        print('ERROR: incorrect memory sampling. Please select one between: ' + ' | '.join(ReplayMemory.SAMPLINGS) + '.')
+                        sys.exit(2)
+                elif opt == "--nn-ensemble":
+                    options['ensemble'] = int(arg)
+
+                    if options['ensemble'] < 1:
+                        print('ERROR: the number of neural networks of the ensemble must be at least 1.')
+                        sys.exit(2)
+                elif opt == "--nn-ensemble-workers":
+                    options['ensemble_workers'] = int(arg)
+                elif opt == "--nn-inference":
+                    options['inference'] = arg
+
+                    if arg not in ('keras', 'numpy'):
+                        print('ERROR: incorrect inference engine. Please select one between: keras | numpy.')
+                        sys.exit(2)
+
+            try:
+                func_utils.get_retrain_policy(options.get('retrain', 'every-bar'))
+            except ValueError as e:
+                print('ERROR: ' + str(e))
+                sys.exit(2)
+
+            if walk_forward:
+                NN_Result, NN_Strategy = execute_walk_forward_strategy(df, 'neural-network', commission, quote, s_test, e_test, report=report, options=options, **wf_options)
+            else:
+                NN_Result, NN_Strategy = execute_neural_network_strategy(df, options, commission, quote, s_test, e_test, report)
+            result_list.append((NN_Result, 'Red Neuronal'))
+
+        # Execute combined signal strategy optimized with pso
+        if strategy in ('combined-signal-pso', 'all'):
+
+            normalization = 'exponential'
+            c1 = 0.5
+            c2 = 0.3
+            w = 0.9
+            iters = 400
+            incremental = False
+            n_workers = None
+
+            for opt, arg in opts:
+                if opt == "--pso-normalization":
+                    normalization = arg
+                elif opt == "--pso-c1":
+                    c1 = float(arg)
+                elif opt == "--pso-c2":
+                    c2 = float(arg)
+                elif opt == "--pso-inertia":
+                    w = float(arg)
+                elif opt == "--pso-iters":
+                    iters = int(arg)
+                elif opt == "--pso-incremental":
+                    incremental = True
+                elif opt == "--pso-workers":
+                    n_workers = int(arg)
+
+            options = {'c1': c1, 'c2': c2, 'w': w}
+
+            # The folds of the walk-forward evaluate the swarm sequentially, they are already executed in parallel
+            if walk_forward:
+                PSO_Result, PSO_Strategy = execute_walk_forward_strategy(df, 'combined-signal-pso', commission, quote, s_test, e_test, report=report, options=options,
+                                                                         iters=iters, normalization=normalization, incremental=incremental, **wf_options)
+            else:
+                PSO_Result, PSO_Strategy = execute_pso_strategy(df, options, commission, quote, s_test, e_test, iters, normalization, incremental, n_workers, report)
+            result_list.append((PSO_Result, 'Particle Swarm Optimization'))
+    finally:
+        trace.stop_trace()
+        # The results of the strategies already executed are also written when one fails
+        results_store.flush()
+
+    if len(result_list) == 0:
         print("ERROR: incorrect strategy name. Please select one between: buy-and-hold | classic | neural-network | combined-signal-pso | all.")
         sys.exit(2)
 
-    execution_plot.plot_capital(strategy_list, quote, strategy, s_test, e_test)
+    if report == 'full':
+        execution_plot.plot_capital(result_list, quote, strategy, s_test, e_test)
+
+    return result_list
+
+
+def main(argv):
+    run(argv)
 
 
 if __name__ == "__main__":
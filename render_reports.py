@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import os
+import sys, getopt
+import multiprocessing as mp
+
+import src.utils.report_store as report_store
+
+
+def _init_worker():
+    """
+    Pool initializer: charts are rendered without a display
+    """
+    import matplotlib.pyplot as plt
+    plt.switch_backend('Agg')
+
+
+def render_run(path):
+    """
+    Render the PDF report of a saved simulation
+    :param path: path of the saved simulation
+    :return: tuple with the path of the saved simulation and the PDF path, None if the rendering failed
+    """
+    import src.strategies_execution.execution_analysis as execution_analysis
+
+    try:
+        run = report_store.load_run(path)
+        pdf_path = execution_analysis.printResultPDF(run['result'], run['info'], run['params'],
+                                                     run['training_params'], open_browser=False)
+    except Exception as e:
+        print('ERROR: ' + path + ': ' + repr(e))
+        pdf_path = None
+
+    return path, pdf_path
+
+
+def render_reports(paths, n_workers):
+    """
+    Render the PDF reports of several saved simulations in a pool of processes
+    :param paths: paths of the saved simulations
+    :param n_workers: number of worker processes
+    :return: dict with the PDF path of each saved simulation, None if the rendering failed
+    """
+    if len(paths) == 0:
+        return {}
+
+    pdf_paths = {}
+
+    pool = mp.Pool(max(1, min(n_workers, len(paths))), initializer=_init_worker)
+
+    try:
+        for path, pdf_path in pool.imap_unordered(render_run, paths):
+            pdf_paths[path] = pdf_path
+            print('[' + str(len(pdf_paths)) + '/' + str(len(paths)) + '] ' + path + ': ' + str(pdf_path))
+    finally:
+        pool.close()
+        pool.join()
+
+    return pdf_paths
+
+
+def main(argv):
+    folder = report_store.RUNS_FOLDER
+    pattern = '*'
+    n_workers = os.cpu_count()
+
+    try:
+        opts, args = getopt.getopt(argv, 'hd:m:w:', ['help', 'runs-dir=', 'match=', 'workers='])
+    except getopt.GetoptError:
+        print('render_reports.py -m <pattern> -w <workers> [saved simulations]')
+        sys.exit(2)
+
+    for opt, arg in opts:
+        if opt in ('-h', '--help'):
+            print('\nDESCRIPTION')
+            print('\n\tRender the PDF reports of the simulations executed with main.py --report=deferred.')
+            print('\nUSAGE')
+            print('\n\trender_reports.py -m <pattern> -w <workers> [saved simulations]')
+            print('\nOPTIONS')
+            print('\n\t-d, --runs-dir\tFolder of the saved simulations.')
+            print('\n\t-m, --match\tRender only the simulations whose name, <quote>_<strategy>_<from>_<to>_<params hash>, matches this pattern. Example: SAN_estrategia_*')
+            print('\n\t-w, --workers\tNumber of worker processes.')
+            print('\n\t-h, --help\tDisplay help.')
+            sys.exit()
+        elif opt in ('-d', '--runs-dir'):
+            folder = arg
+        elif opt in ('-m', '--match'):
+            pattern = arg
+        elif opt in ('-w', '--workers'):
+            n_workers = int(arg)
+
+    paths = args if len(args) > 0 else report_store.list_runs(folder, pattern)
+
+    if len(paths) == 0:
+        print('No hay simulaciones guardadas en ' + folder)
+        return
+
+    render_reports(paths, n_workers)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import sys, getopt
+import pandas as pd
+
+import src.utils.results_store as results_store
+
+
+COMMANDS = ('top', 'list', 'aggregate', 'columns')
+
+
+def print_help():
+    print('\nDESCRIPTION')
+    print('\n\tQuery the results of the simulations saved in the results database.')
+    print('\nUSAGE')
+    print('\n\tresults.py top -m <metric> -n <rows> [filters]')
+    print('\n\tresults.py list [filters]')
+    print('\n\tresults.py aggregate -m <metric> --by <columns> [filters]')
+    print('\n\tresults.py columns')
+    print('\nCOMMANDS')
+    print('\n\ttop\tSimulations with the best value of a metric, with their params.')
+    print('\n\tlist\tAll the columns of the simulations, the last ones first.')
+    print('\n\taggregate\tNumber of simulations and mean, min and max of a metric by groups.')
+    print('\n\tcolumns\tColumns of the database: info, params (param.<name>), training params (train.<name>) and metrics.')
+    print('\nOPTIONS')
+    print('\n\t-d, --db\tDatabase file (resultados/results.db by default).')
+    print('\n\t-m, --metric\tMetric column. Example: "Ganancia(%)"')
+    print('\n\t-n, --rows\tNumber of rows (10 by default).')
+    print('\n\t--asc\tIn top, the lowest values are the best.')
+    print('\n\t--by\tIn aggregate, comma separated columns of the groups (strategy by default). Example: market,strategy')
+    print('\n\t-q, --quote\tFilter by quote.')
+    print('\n\t-s, --strategy\tFilter by strategy name, as saved in the reports. Example: estrategia_clasica')
+    print('\n\t-f, --from-date\tFilter the simulations that start on or after this date.')
+    print('\n\t-t, --to-date\tFilter the simulations that end on or before this date.')
+    print('\n\t-w, --where\tOther SQL condition. Example: \'"param.ma_short" < 10\'')
+    print('\n\t--csv\tSave the rows in this csv file.')
+    print('\n\t-h, --help\tDisplay help.')
+
+
+def main(argv):
+    if len(argv) == 0 or argv[0] not in COMMANDS:
+        if len(argv) == 0 or argv[0] not in ('-h', '--help'):
+            print('ERROR: incorrect command. Please select one between: ' + ' | '.join(COMMANDS) + '.')
+        print_help()
+        sys.exit(2)
+
+    command = argv[0]
+    db = results_store.RESULTS_DB
+    metric = 'Ganancia(%)'
+    n = 10
+    ascending = False
+    by = ['strategy']
+    csv_file = None
+    filters = {}
+
+    try:
+        opts, args = getopt.getopt(argv[1:], 'hd:m:n:q:s:f:t:w:', ['help', 'db=', 'metric=', 'rows=', 'asc', 'by=',
+                                                                  'quote=', 'strategy=', 'from-date=', 'to-date=',
+                                                                  'where=', 'csv='])
+    except getopt.GetoptError:
+        print('results.py <command> -m <metric> -n <rows>')
+        sys.exit(2)
+
+    for opt, arg in opts:
+        if opt in ('-h', '--help'):
+            print_help()
+            sys.exit()
+        elif opt in ('-d', '--db'):
+            db = arg
+        elif opt in ('-m', '--metric'):
+            metric = arg
+        elif opt in ('-n', '--rows'):
+            n = int(arg)
+        elif opt == '--asc':
+            ascending = True
+        elif opt == '--by':
+            by = arg.split(',')
+        elif opt in ('-q', '--quote'):
+            filters['market'] = arg
+        elif opt in ('-s', '--strategy'):
+            filters['strategy'] = arg
+        elif opt in ('-f', '--from-date'):
+            filters['from_date'] = arg
+        elif opt in ('-t', '--to-date'):
+            filters['to_date'] = arg
+        elif opt in ('-w', '--where'):
+            filters['where'] = arg
+        elif opt == '--csv':
+            csv_file = arg
+
+    try:
+        if command == 'top':
+            df = results_store.top(metric, n, ascending, db, **filters)
+        elif command == 'list':
+            where, where_args = results_store.get_filters(**filters)
+            df = results_store.query(where=where, args=where_args, order_by='id DESC', limit=n, db=db)
+        elif command == 'aggregate':
+            df = results_store.aggregate(metric, by, db, **filters)
+        else:
+            conn = results_store.connect(db)
+            df = pd.DataFrame({'column': results_store.get_columns(conn)})
+            conn.close()
+    except ValueError as e:
+        print('ERROR: ' + str(e))
+        sys.exit(2)
+
+    with pd.option_context('display.max_columns', None, 'display.width', 200):
+        print(df.to_string(index=False))
+
+    if csv_file != None:
+        df.to_csv(csv_file, index=False)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Compare the per-sample latency and the outputs of Keras model.predict and
+the NumPy inference engine for the neural network of the strategy.
+
+Usage: python scripts/benchmark_inference.py [n_features] [n_samples]
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.classes.model as model
+
+
+def measure_latency(predict, X):
+    """
+    Measure the mean time to predict each sample of X one by one
+    :param predict: prediction function for a batch of samples
+    :param X: array of samples
+    :return: mean time in microseconds
+    """
+    predict(X[:1])
+
+    start = time.perf_counter()
+
+    for i in range(len(X)):
+        predict(X[i:i+1])
+
+    return 1e6 * (time.perf_counter() - start) / len(X)
+
+
+def main(argv):
+    n_features = int(argv[0]) if len(argv) > 0 else 30
+    n_samples = int(argv[1]) if len(argv) > 1 else 500
+
+    neural_network = model.NeuralNetwork()
+    neural_network.build_model(input_shape = (n_features, 1))
+
+    X = np.random.randn(n_samples, n_features, 1)
+
+    keras_predict = lambda X: neural_network.model.predict(X)
+    numpy_predict = neural_network.get_engine().predict
+
+    max_error = np.max(np.abs(keras_predict(X) - numpy_predict(X)))
+
+    keras_latency = measure_latency(keras_predict, X)
+    numpy_latency = measure_latency(numpy_predict, X)
+
+    print('Error máximo       : %.3g' % max_error)
+    print('Keras predict (us) : %.1f' % keras_latency)
+    print('NumPy predict (us) : %.1f' % numpy_latency)
+    print('Aceleración        : %.1fx' % (keras_latency / numpy_latency))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
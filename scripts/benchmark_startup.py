@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Measure the startup time of main.py for each strategy.
+
+Each measurement is done in a new interpreter, importing main.py and the
+modules that the execution of the strategy needs. The eager time imports the
+modules of all the strategies, as main.py did before the lazy imports.
+
+Usage: python scripts/benchmark_startup.py [repeats]
+"""
+import os
+import sys
+import subprocess
+
+ROOT_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_FOLDER)
+
+from src.strategies_execution.executions import STRATEGIES
+
+
+CODE = '''
+import time
+start = time.perf_counter()
+import main
+import src.strategies_execution.executions as executions
+for strategy_name in {strategy_names!r}:
+    executions.get_strategy(strategy_name, load_dependencies=True)
+print(time.perf_counter() - start)
+'''
+
+
+def measure_startup(strategy_names, repeats):
+    """
+    Measure the time to import main.py and the given strategies
+    :param strategy_names: strategies loaded after main.py
+    :param repeats: number of measurements
+    :return: median time in seconds, None if the imports fail
+    """
+    times = []
+
+    for i in range(repeats):
+        process = subprocess.run([sys.executable, '-c', CODE.format(strategy_names=strategy_names)],
+                                 cwd=ROOT_FOLDER, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+        if process.returncode != 0:
+            return None
+
+        times.append(float(process.stdout.decode().strip().splitlines()[-1]))
+
+    return sorted(times)[len(times)//2]
+
+
+def main(argv):
+    repeats = int(argv[0]) if len(argv) > 0 else 5
+
+    eager = measure_startup(list(STRATEGIES), repeats)
+
+    print('%-22s%12s%12s%12s' % ('Estrategia', 'Lazy(s)', 'Eager(s)', 'Ahorro(s)'))
+
+    for strategy_name in STRATEGIES:
+        lazy = measure_startup([strategy_name], repeats)
+
+        if lazy is None or eager is None:
+            print('%-22s%12s%12s%12s' % (strategy_name, 'ERROR' if lazy is None else '%.3f' % lazy,
+                                         'ERROR' if eager is None else '%.3f' % eager, '-'))
+        else:
+            print('%-22s%12.3f%12.3f%12.3f' % (strategy_name, lazy, eager, eager - lazy))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
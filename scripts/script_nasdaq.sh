@@ -1,13 +1,4 @@
 #!/bin/bash
 
 cd src
-
-python3 main.py AAPL 0.07 0.03 10 300
-python3 main.py ADBE 0.1 0.05 20 300
-python3 main.py ADP 0.07 0.03 10 300
-python3 main.py ADSK 0.1 0.05 20 300
-python3 main.py AKAM 0.1 0.05 20 300
-python3 main.py ALXN 0.1 0.05 20 300
-python3 main.py AMAT 0.07 0.03 20 300
-python3 main.py AMGN 0.1 0.05 20 300
-python3 main.py AMZN 0.1 0.05 20 300
+python3 ../batch.py --universe ../scripts/nasdaq.txt "$@"
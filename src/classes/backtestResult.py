@@ -0,0 +1,23 @@
+class BacktestResult():
+
+    """
+    Result of a backtest: the portfolio value and the close price of each
+    simulated bar, and the simulation metrics.
+    """
+
+    def __init__(self, dates, values, closes, metrics, cerebro=None, series=None):
+        """
+        BacktestResult Class Initializer
+        :param dates: array with the date of each simulated bar
+        :param values: array with the portfolio value at the close of each bar
+        :param closes: array with the close price of each bar
+        :param metrics: dict with the simulation metrics
+        :param cerebro: backtrader engine of the simulation, None if it was not run with backtrader
+        :param series: dict with other arrays of the strategy, one value for each simulated bar (optional)
+        """
+        self.dates = dates
+        self.values = values
+        self.closes = closes
+        self.metrics = metrics
+        self.cerebro = cerebro
+        self.series = series if series != None else {}
@@ -0,0 +1,53 @@
+import os
+import pandas as pd
+
+
+# Market data columns saved for each quote
+DATA_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class YahooDataProvider():
+
+    """Market data provider that downloads daily data from yahoo finance"""
+
+    def get_data(self, data_name, from_date, to_date):
+        """
+        Get daily market data of a quote
+        :param data_name: quote data name
+        :param from_date: first date (included)
+        :param to_date: last date (not included)
+        :return: dataframe with market data
+        """
+        import fix_yahoo_finance as yf
+
+        df = yf.download(data_name, from_date, to_date)
+
+        return df[DATA_COLUMNS]
+
+
+class LocalFileDataProvider():
+
+    """
+    Market data provider that reads the data from csv files in a local folder.
+    It is a stand-in of the yahoo finance provider for offline use and testing.
+    """
+
+    def __init__(self, folder):
+        """
+        LocalFileDataProvider Class Initializer
+        :param folder: folder with a <data_name>.csv file for each quote
+        """
+        self.folder = folder
+
+    def get_data(self, data_name, from_date, to_date):
+        """
+        Get daily market data of a quote
+        :param data_name: quote data name
+        :param from_date: first date (included)
+        :param to_date: last date (not included)
+        :return: dataframe with market data
+        """
+        df = pd.read_csv(os.path.join(self.folder, data_name + '.csv'), index_col = "Date", parse_dates = True)
+        df = df[(df.index >= pd.Timestamp(from_date)) & (df.index < pd.Timestamp(to_date))]
+
+        return df[DATA_COLUMNS]
@@ -1,4 +1,5 @@
 import numpy as np
+import pandas as pd
 import src.utils.indicators as indicators
 import src.utils.func_utils as func_utils
 
@@ -21,12 +22,24 @@ class GeneticRepresentation():
                 if s < l:
                     self.moving_average_rules.append([s,l])
 
+        self.commission = 0.001
+        self.start_price = 100000
+
         self.df = df
 
         # Add moving average to the DataFrame
         for p in self.period_list:
             self.df = indicators.moving_average(self.df, p)
 
+        # Contiguous arrays with the whole history, computed only once:
+        # dates, closes, moving averages (days x periods) and signals (days x rules)
+        self.dates = self.df.index.values
+        self.closes = np.ascontiguousarray(self.df['Close'].values, dtype=float)
+        self.moving_averages = np.column_stack([self.df['MA_' + str(p)].values for p in self.period_list]).astype(float)
+
+        moving_averages_columns = {'MA_' + str(p): self.moving_averages[:, i] for i, p in enumerate(self.period_list)}
+        self.signals = func_utils.get_signal_matrix(self.moving_average_rules, moving_averages_columns)
+
         # Split DataFrame in train and test
         self.df_train, self.df_test = self.df[s_train:e_train], self.df[s_test:e_test]
 
@@ -34,7 +47,7 @@ class GeneticRepresentation():
         self.df_train = self.df_train.dropna()
         self.df_test = self.df_test.dropna()
 
-        self.df_closes = [self.df_train.iloc[i]['Close'] for i in range(len(self.df_train.index))]
+        self.df_closes = self.df_train['Close'].values
 
         self.moving_averages_train = {}
         self.moving_averages_test = {}
@@ -42,62 +55,31 @@ class GeneticRepresentation():
         # Vectorize columns and save in dict to fast access
         for p in self.period_list:
             col_ma_name = 'MA_' + str(p)
-            self.moving_averages_train[col_ma_name] = [self.df_train.iloc[i][col_ma_name] for i in range(len(self.df_train.index))]
-            self.moving_averages_test[col_ma_name] = [self.df_test.iloc[i][col_ma_name] for i in range(len(self.df_test.index))]
+            self.moving_averages_train[col_ma_name] = self.df_train[col_ma_name].values
+            self.moving_averages_test[col_ma_name] = self.df_test[col_ma_name].values
 
 
-    def cost_function(self, x, from_date, to_date, normalization='exponential'):
-        """ Cost function adapted to PSO algorithm """
-
-        df_evaluate = self.df[from_date:to_date]
-        df_closes = [df_evaluate.iloc[i]['Close'] for i in range(len(df_evaluate.index))]
-
-        moving_averages_evaluate = {}
-
-        # Vectorize columns and save in dict to fast access
-        for p in self.period_list:
-            col_ma_name = 'MA_' + str(p)
-            moving_averages_evaluate[col_ma_name] = [df_evaluate.iloc[i][col_ma_name] for i in range(len(df_evaluate.index))]
+    def get_window(self, from_date, to_date):
+        """
+        Get the days between two dates (both included) with a binary search
+        :param from_date: start date of the window
+        :param to_date: end date of the window
+        :return: slice to index the precomputed arrays
+        """
+        start = np.searchsorted(self.dates, pd.Timestamp(from_date).to_datetime64(), side='left')
+        end = np.searchsorted(self.dates, pd.Timestamp(to_date).to_datetime64(), side='right')
 
-        # Get the number of particles of PSO
-        num_particles = x.shape[0]
-        final_prices = np.zeros([num_particles])
+        return slice(start, end)
 
-        for idx, alpha in enumerate(x):
-            size = len(df_closes)
-            in_market = False
 
-            buy_day_list = []
-            sell_day_list = []
-
-            w, buy_threshold, sell_threshold = func_utils.get_split_w_threshold(alpha, normalization)
-
-            for i in range(size):
-
-                if in_market and i == size-1:
-                    sell_day_list.append(i)
-
-                elif i < size-1:
-
-                    final_signal = func_utils.get_combined_signal(self.moving_average_rules, moving_averages_evaluate, w, i)
-
-                    if final_signal > buy_threshold and not in_market:
-                        in_market = True
-                        buy_day_list.append(i)
-
-                    elif final_signal < sell_threshold and in_market:
-                        in_market = False
-                        sell_day_list.append(i)
-
-            num_trades = len(buy_day_list)
-            commission = 0.001
-            start_price = 100000
-            final_price = start_price
+    def cost_function(self, x, from_date, to_date, normalization='exponential'):
+        """ Cost function adapted to PSO algorithm """
 
-            # Get the final capital after excute all trades
-            for i in range(num_trades):
-                final_price *= (df_closes[sell_day_list[i]]*(1-commission)) / (df_closes[buy_day_list[i]]*(1+commission))
+        # Views of the precomputed arrays, nothing is copied
+        window = self.get_window(from_date, to_date)
 
-            final_prices[idx] = final_price
+        # Get the final capital of every particle after execute all its trades
+        final_prices = func_utils.get_swarm_final_prices(self.closes[window], self.signals[window], x,
+                                                         normalization, self.commission, self.start_price)
 
         return -final_prices
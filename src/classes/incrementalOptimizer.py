@@ -0,0 +1,77 @@
+import numpy as np
+from pyswarms.backend.operators import compute_pbest, compute_objective_function
+
+
+class IncrementalOptimizer():
+
+    """
+    Warm-started re-optimization of a pyswarms optimizer over a rolling window.
+
+    The swarm keeps the positions, velocities and personal bests reached in the
+    previous optimization. Personal bests are re-evaluated in the new window and
+    the optimization stops early once the best cost stops improving.
+    """
+
+    def __init__(self, optimizer, patience=5, tol=1e-4):
+        """
+        IncrementalOptimizer Class Initializer
+        :param optimizer: pyswarms optimizer (e.g. ps.single.GlobalBestPSO) already optimized
+        :param patience: number of iterations without improvement before stopping
+        :param tol: relative improvement of the best cost considered as no improvement
+        """
+        self.optimizer = optimizer
+        self.patience = patience
+        self.tol = tol
+        self.iterations = 0
+
+
+    def optimize(self, objective_func, iters, **kwargs):
+        """
+        Continue the optimization of the swarm for a new objective window
+        :param objective_func: cost function evaluated for all the swarm at once
+        :param iters: maximum number of iterations
+        :param kwargs: arguments for the objective function
+        :return: best cost and best position found
+        """
+        optimizer = self.optimizer
+        swarm = optimizer.swarm
+
+        # Populate memory of the handlers
+        optimizer.bh.memory = swarm.position
+        optimizer.vh.memory = swarm.position
+
+        # Previous personal bests are re-evaluated in the new window
+        swarm.pbest_cost = objective_func(swarm.pbest_pos, **kwargs)
+        swarm.best_cost = np.inf
+        swarm.best_pos, swarm.best_cost = optimizer.top.compute_gbest(swarm)
+
+        iters_without_improvement = 0
+        self.iterations = 0
+
+        for i in range(iters):
+            self.iterations += 1
+
+            # Compute cost for current position and personal best
+            swarm.current_cost = compute_objective_function(swarm, objective_func, **kwargs)
+            swarm.pbest_pos, swarm.pbest_cost = compute_pbest(swarm)
+
+            best_cost_yet_found = swarm.best_cost
+            swarm.best_pos, swarm.best_cost = optimizer.top.compute_gbest(swarm)
+
+            # Stop when the best cost reaches a plateau
+            if best_cost_yet_found - swarm.best_cost < self.tol * (1 + np.abs(best_cost_yet_found)):
+                iters_without_improvement += 1
+            else:
+                iters_without_improvement = 0
+
+            if iters_without_improvement >= self.patience:
+                break
+
+            # Perform velocity and position updates
+            swarm.velocity = optimizer.top.compute_velocity(swarm, optimizer.velocity_clamp, optimizer.vh, optimizer.bounds)
+            swarm.position = optimizer.top.compute_position(swarm, optimizer.bounds, optimizer.bh)
+
+        best_cost = swarm.best_cost
+        best_pos = swarm.pbest_pos[swarm.pbest_cost.argmin()].copy()
+
+        return best_cost, best_pos
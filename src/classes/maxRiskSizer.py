@@ -2,15 +2,17 @@ import backtrader as bt
 import math
 import logging
 
+import src.utils.trace as trace
+
 
 class MaxRiskSizer(bt.Sizer):
     '''
     Returns the number of shares rounded down that can be purchased for the
-    max risk tolerance
+    max risk tolerance. Each sizing is written to the active trace, if any
     '''
 
     params = (('risk', 0.1),
-                ('debug', True))
+                ('debug', False))
 
 
     def log(self, txt, data):
@@ -52,6 +54,11 @@ class MaxRiskSizer(bt.Sizer):
             # sell all shares
             comm_adj_size = self.broker.getposition(data).size
 
+        tracer = trace.get_tracer()
+
+        if tracer is not None:
+            tracer.write('sizing', data.datetime[0], isbuy, data[0], cash, self.p.risk, comm, comm_adj_size)
+
         if self.p.debug:
             if isbuy:
                 buysell = 'Buying'
@@ -3,6 +3,8 @@ from keras.models import Sequential, load_model
 from keras.layers import Dense, Flatten
 from keras.optimizers import SGD
 from keras.regularizers import l2
+from src.classes.replayMemory import ReplayMemory
+from src.classes.numpyNetwork import NumpyNetwork
 
 np.random.seed(1) 
 
@@ -10,13 +12,30 @@ class NeuralNetwork():
 
 	"""A class for build a multilayer perceptron"""
 
+	# Inference engines: 'keras' (model.predict) or 'numpy' (NumpyNetwork)
+	INFERENCES = ('keras', 'numpy')
+
 	def __init__(self):
 		self.model = Sequential()
-		self.memory_x = []
-		self.memory_y = []
+		self.memory = None
+		self.memory_capacity = None
+		self.memory_sampling = 'all'
 		self.l2 = 0.001
 		self.lr = 0.001
 
+		# Weights version, it changes every time the weights are modified
+		self.version = 0
+
+		# Predictions are made with 'keras' or, if it is selected, with 'numpy' (NumpyNetwork)
+		self.inference = 'keras'
+		self.engine = None
+		self.engine_version = None
+
+		# Cached predictions of a block of samples
+		self.cache_version = None
+		self.cache_start = 0
+		self.cache_predictions = []
+
 
 	def load_model(self, filepath):
 		"""
@@ -26,6 +45,15 @@ class NeuralNetwork():
 		"""
 		print('[Model] Loading model from file %s' % filepath)
 		self.model = load_model(filepath)
+		self.version += 1
+
+	def save_model(self, filepath):
+		"""
+		Save actual model
+		:param filepath: path where model is going to be saved
+		:return: nothing
+		"""
+		self.model.save(filepath)
 
 	def build_model(self, input_shape): 
 		"""
@@ -43,6 +71,7 @@ class NeuralNetwork():
 
 		sgd = SGD(lr=self.lr, decay=1e-6, momentum=0.5, nesterov=True)
 		self.model.compile(loss='mean_squared_error', optimizer=sgd, metrics=['accuracy'])
+		self.version += 1
 
 	def train(self, x, y, epochs, verbose=0):
 		"""
@@ -55,6 +84,7 @@ class NeuralNetwork():
 		"""
 
 		self.model.fit(x, y, epochs=epochs, verbose=verbose)
+		self.version += 1
 
 	def predict(self, data):
 		"""
@@ -62,7 +92,59 @@ class NeuralNetwork():
 		:param data:
 		:return: model prediction
 		"""
-		return self.model.predict(np.array([data]))
+		return self.predict_batch(np.array([data]))
+
+	def get_engine(self):
+		"""
+		Get the NumPy inference engine with the current weights of the model
+		:return: NumpyNetwork instance
+		"""
+		if self.engine_version != self.version:
+			self.engine = NumpyNetwork.from_keras(self.model)
+			self.engine_version = self.version
+
+		return self.engine
+
+	def set_inference(self, inference):
+		"""
+		Select the engine used to make the predictions
+		:param inference: one of INFERENCES
+		:return: nothing
+		"""
+		if inference not in self.INFERENCES:
+			raise ValueError('Incorrect inference engine: ' + inference)
+
+		self.inference = inference
+
+	def predict_batch(self, X):
+		"""
+		Get output from the model for all the samples of X in a single call
+		:param X: samples to predict
+		:return: model predictions, one row for each sample
+		"""
+		if self.inference == 'numpy':
+			return self.get_engine().predict(X).copy()
+
+		return self.model.predict(np.asarray(X), batch_size=len(X))
+
+	def predict_cached(self, X, i, block_size):
+		"""
+		Get output from the model for the sample X[i]. The predictions of the
+		block of samples starting at i are made in a single call and they are
+		reused until the model weights change
+		:param X: array with all the samples
+		:param i: index of the sample to predict
+		:param block_size: number of samples predicted in each call
+		:return: model prediction for X[i]
+		"""
+		cache_end = self.cache_start + len(self.cache_predictions)
+
+		if self.cache_version != self.version or i < self.cache_start or i >= cache_end:
+			self.cache_predictions = self.predict_batch(X[i:i+block_size])
+			self.cache_start = i
+			self.cache_version = self.version
+
+		return self.cache_predictions[i-self.cache_start]
 
 	def get_accuracy(self, X, y):
 		"""
@@ -86,14 +168,16 @@ class NeuralNetwork():
 
 	def init_memory(self, X, y):
 		"""
-		Method to initialize the memory used for reforce learning
+		Method to initialize the memory used for reforce learning. Its capacity
+		is memory_capacity, or the length of X if it is not set
 		:param X: Array with the data to init de memory
 		:param y: Array with the labels of the X array
 		:return: nothing
 		"""
-		for i in range(len(X)):
-			self.memory_x.append(X[i])
-			self.memory_y.append(y[i])
+		capacity = self.memory_capacity if self.memory_capacity != None else len(X)
+
+		self.memory = ReplayMemory(capacity, self.memory_sampling)
+		self.memory.extend(X, y)
 
 	def update_memory(self, data, target):
 		"""
@@ -102,11 +186,7 @@ class NeuralNetwork():
 		:param target: data label
 		:return: nothing
 		"""
-		self.memory_x.insert(0, data)
-		self.memory_x.pop()
-
-		self.memory_y.insert(0, target)
-		self.memory_y.pop()
+		self.memory.add(data, target)
 
 	def reTrain(self, batch_size=None):
 		"""
@@ -115,12 +195,22 @@ class NeuralNetwork():
 		:return: nothing
 		"""
 
-		if batch_size == None:
-			batch_size = len(np.array(self.memory_x))
+		X, y = self.memory.sample()
 
-		X = np.array(self.memory_x)
-		y = np.array(self.memory_y)
+		if batch_size == None:
+			batch_size = len(X)
 
 		self.model.fit(X, y, epochs=5, batch_size=batch_size, verbose=0)
+		self.version += 1
+
+	def online_update(self):
+		"""
+		Update the model with a single gradient step over the data in memory
+		:return: nothing
+		"""
+		X, y = self.memory.sample()
+
+		self.model.train_on_batch(X, y)
+		self.version += 1
 
 
@@ -0,0 +1,194 @@
+import os
+import multiprocessing as mp
+import numpy as np
+
+import src.classes.model as model
+import src.utils.model_cache as model_cache
+
+
+# Environment variables that limit the threads of the numerical libraries
+THREAD_VARIABLES = ['OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS']
+
+
+def _init_worker(n_threads):
+    """
+    Pool initializer: limit the threads used by TensorFlow in the worker
+    :param n_threads: number of threads of each worker
+    """
+    import tensorflow as tf
+    from keras import backend as K
+
+    config = tf.compat.v1.ConfigProto(intra_op_parallelism_threads=n_threads, inter_op_parallelism_threads=1)
+    K.set_session(tf.compat.v1.Session(config=config))
+
+
+def _train_network(task):
+    """
+    Train a network in a worker process and save it in the model cache
+    :param task: tuple with the model key, the seed, the training data, the scaler and the model parameters
+    :return: model key
+    """
+    import tensorflow as tf
+
+    key, seed, X_train, y_train, scaler, model_params = task
+
+    np.random.seed(seed)
+    tf.compat.v1.set_random_seed(seed)
+
+    neural_network = model.NeuralNetwork()
+    neural_network.build_model(input_shape = X_train.shape[1:])
+    neural_network.train(X_train, y_train, epochs = model_params['epochs'])
+
+    model_cache.save_model(key, neural_network, scaler, model_params)
+
+    return key
+
+
+class NeuralNetworkEnsemble(model.NeuralNetwork):
+
+    """
+    Ensemble of neural networks trained with different seeds. Predictions are
+    the mean of the predictions of the networks, and retraining updates all
+    the networks.
+    """
+
+    def __init__(self, networks):
+        """
+        NeuralNetworkEnsemble Class Initializer
+        :param networks: list of trained NeuralNetwork instances
+        """
+        super().__init__()
+        self.networks = networks
+
+
+    @classmethod
+    def train(cls, model_keys, X_train, y_train, scaler, model_params, n_workers=None, n_threads=1):
+        """
+        Train a network for each key in parallel worker processes. Networks in the
+        model cache are loaded instead of trained. Each worker trains a single
+        network and is replaced, so memory is released after each training
+        :param model_keys: list with the model cache key of each network, the seed of the i-th network is i+1
+        :param X_train: normalized training matrix
+        :param y_train: training labels
+        :param scaler: scaler fitted with the training matrix
+        :param model_params: dict with the hyperparameters and the architecture of the networks
+        :param n_workers: number of worker processes, by default as many as fit in the cpus
+        :param n_threads: number of threads of each worker
+        :return: NeuralNetworkEnsemble instance
+        """
+        networks = [model.NeuralNetwork() for key in model_keys]
+        tasks = []
+
+        for seed, key in enumerate(model_keys, 1):
+            if model_cache.load_model(key, networks[seed-1]) is None:
+                tasks.append((key, seed, X_train, y_train, scaler, model_params))
+
+        # Pool workers are daemonic and cannot start their own pool, the networks are trained in this process
+        if len(tasks) > 0 and mp.current_process().daemon:
+            for task in tasks:
+                _train_network(task)
+        elif len(tasks) > 0:
+            if n_workers == None:
+                n_workers = max(1, os.cpu_count() // n_threads)
+
+            n_workers = min(n_workers, len(tasks))
+
+            # Spawned workers inherit the limits of the numerical libraries
+            environ = {var: os.environ.get(var) for var in THREAD_VARIABLES}
+            os.environ.update({var: str(n_threads) for var in THREAD_VARIABLES})
+
+            try:
+                pool = mp.get_context('spawn').Pool(n_workers, initializer=_init_worker, initargs=(n_threads,), maxtasksperchild=1)
+            finally:
+                for var, value in environ.items():
+                    if value == None:
+                        del os.environ[var]
+                    else:
+                        os.environ[var] = value
+
+            try:
+                pool.map(_train_network, tasks, chunksize=1)
+            finally:
+                pool.close()
+                pool.join()
+
+        for key, seed, X_train, y_train, scaler, model_params in tasks:
+            if model_cache.load_model(key, networks[seed-1]) is None:
+                raise IOError('Trained network not found in the model cache: ' + key)
+
+        return cls(networks)
+
+
+    def set_inference(self, inference):
+        """
+        Select the engine used by the networks to make the predictions
+        :param inference: one of INFERENCES
+        """
+        super().set_inference(inference)
+
+        for neural_network in self.networks:
+            neural_network.set_inference(inference)
+
+
+    def predict_batch(self, X):
+        """
+        Get the mean output of the networks for all the samples of X
+        :param X: samples to predict
+        :return: ensemble predictions, one row for each sample
+        """
+        return np.mean([neural_network.predict_batch(X) for neural_network in self.networks], axis=0)
+
+
+    def get_accuracy(self, X, y):
+        """
+        Get the ensemble accuracy for X data
+        :param X: data to make the predictions
+        :param y: real labels of X
+        :return: predictions accuracy
+        """
+        y_pred = self.predict_batch(X)[:, 0] > 0.5
+
+        return np.mean(y_pred == y)*100.0
+
+
+    def init_memory(self, X, y):
+        """
+        Initialize the memory of the networks
+        :param X: Array with the data to init de memory
+        :param y: Array with the labels of the X array
+        """
+        for neural_network in self.networks:
+            neural_network.memory_capacity = self.memory_capacity
+            neural_network.memory_sampling = self.memory_sampling
+            neural_network.init_memory(X, y)
+
+
+    def update_memory(self, data, target):
+        """
+        Update the memory of the networks
+        :param data: new data to train
+        :param target: data label
+        """
+        for neural_network in self.networks:
+            neural_network.update_memory(data, target)
+
+
+    def reTrain(self, batch_size=None):
+        """
+        ReTrain the networks with data in memory
+        :param batch_size: the size of the batch
+        """
+        for neural_network in self.networks:
+            neural_network.reTrain(batch_size)
+
+        self.version += 1
+
+
+    def online_update(self):
+        """
+        Update the networks with a single gradient step over the data in memory
+        """
+        for neural_network in self.networks:
+            neural_network.online_update()
+
+        self.version += 1
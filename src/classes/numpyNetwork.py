@@ -0,0 +1,123 @@
+import numpy as np
+
+
+class NumpyNetwork():
+
+    """
+    Inference of a trained Keras Sequential model of Dense and Flatten layers with NumPy.
+
+    Dense layers over inputs of more than two dimensions are applied on the
+    last axis, as Keras does, with a single matrix product for all the
+    samples. Intermediate results are written in buffers preallocated for
+    each batch size.
+    """
+
+    ACTIVATIONS = ('linear', 'relu', 'tanh', 'sigmoid')
+
+    def __init__(self, layers, dtype=np.float32):
+        """
+        NumpyNetwork Class Initializer
+        :param layers: list of layers, tuples with
+            - kind - 'dense' or 'flatten'
+            - W - weights matrix of dense layers
+            - b - bias vector of dense layers
+            - activation - activation function name of dense layers
+        :param dtype: data type of the computations, Keras uses float32
+        """
+        self.dtype = dtype
+        self.layers = []
+
+        for kind, W, b, activation in layers:
+            if kind == 'dense':
+                if activation not in self.ACTIVATIONS:
+                    raise ValueError('Unsupported activation: ' + activation)
+
+                W = np.ascontiguousarray(W, dtype=dtype)
+                b = np.ascontiguousarray(b, dtype=dtype)
+
+            self.layers.append((kind, W, b, activation))
+
+        self.buffers = {}
+
+
+    @classmethod
+    def from_keras(cls, keras_model):
+        """
+        Export the weights of a Keras model
+        :param keras_model: Keras Sequential model
+        :return: NumpyNetwork instance
+        """
+        layers = []
+
+        for layer in keras_model.layers:
+            layer_class = layer.__class__.__name__
+
+            if layer_class == 'Dense':
+                W, b = layer.get_weights()
+                layers.append(('dense', W, b, layer.get_config()['activation']))
+            elif layer_class == 'Flatten':
+                layers.append(('flatten', None, None, None))
+            else:
+                raise ValueError('Unsupported layer: ' + layer_class)
+
+        return cls(layers)
+
+
+    def get_buffers(self, input_shape):
+        """
+        Get the preallocated buffers for an input shape
+        :param input_shape: shape of the input batch
+        :return: list with the input buffer and the output buffer of each layer
+        """
+        if input_shape not in self.buffers:
+            buffers = [np.empty(input_shape, dtype=self.dtype)]
+            shape = input_shape
+
+            for kind, W, b, activation in self.layers:
+                if kind == 'flatten':
+                    shape = (shape[0], int(np.prod(shape[1:])))
+                    buffers.append(None)
+                else:
+                    shape = shape[:-1] + (W.shape[1],)
+                    buffers.append(np.empty(shape, dtype=self.dtype))
+
+            self.buffers[input_shape] = buffers
+
+        return self.buffers[input_shape]
+
+
+    def predict(self, X):
+        """
+        Get output from the network for a batch of samples
+        :param X: array of samples, with the input shape of the Keras model
+        :return: network output, one row for each sample. The array is reused
+            in the next call with the same batch size
+        """
+        X = np.asarray(X)
+        buffers = self.get_buffers(X.shape)
+
+        h = buffers[0]
+        h[...] = X
+
+        for (kind, W, b, activation), out in zip(self.layers, buffers[1:]):
+            if kind == 'flatten':
+                h = h.reshape(h.shape[0], -1)
+                continue
+
+            # All the samples and positions of the last axis in one product
+            np.dot(h.reshape(-1, W.shape[0]), W, out=out.reshape(-1, W.shape[1]))
+            out += b
+
+            if activation == 'relu':
+                np.maximum(out, 0, out=out)
+            elif activation == 'tanh':
+                np.tanh(out, out=out)
+            elif activation == 'sigmoid':
+                np.negative(out, out=out)
+                np.exp(out, out=out)
+                out += 1
+                np.reciprocal(out, out=out)
+
+            h = out
+
+        return h
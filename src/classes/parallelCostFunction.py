@@ -0,0 +1,89 @@
+import multiprocessing as mp
+import numpy as np
+import src.utils.func_utils as func_utils
+
+
+# Views of the shared arrays, set in each worker process by the pool initializer
+_shared_arrays = {}
+
+
+def _attach_shared_arrays(closes, signals, signals_shape, commission, start_price):
+    """
+    Pool initializer: attach to the shared price data without copying it
+    :param closes: shared array with close prices
+    :param signals: shared array with the moving average rules signals
+    :param signals_shape: shape (days x rules) of the signals matrix
+    :param commission: commission to be paid on each operation
+    :param start_price: initial capital
+    """
+    _shared_arrays['closes'] = np.frombuffer(closes, dtype=np.float64)
+    _shared_arrays['signals'] = np.frombuffer(signals, dtype=np.float64).reshape(signals_shape)
+    _shared_arrays['commission'] = commission
+    _shared_arrays['start_price'] = start_price
+
+
+def _evaluate_particles(task):
+    """
+    Get the final capital of a chunk of particles in a worker process
+    :param task: tuple with the particles, the window start and end and the normalization
+    :return: vector with the final capital of each particle
+    """
+    x, start, end, normalization = task
+
+    return func_utils.get_swarm_final_prices(_shared_arrays['closes'][start:end],
+                                             _shared_arrays['signals'][start:end],
+                                             x, normalization,
+                                             _shared_arrays['commission'],
+                                             _shared_arrays['start_price'])
+
+
+class ParallelCostFunction():
+
+    """
+    Cost function of a GeneticRepresentation evaluated by a pool of processes.
+
+    Close prices and signals are copied once to shared memory when the pool
+    is created, each call only sends the particles and the window limits to
+    the workers. Each particle is evaluated independently and the results are
+    gathered in order, so costs do not depend on the number of workers.
+    """
+
+    def __init__(self, gen_representation, n_workers):
+        """
+        ParallelCostFunction Class Initializer
+        :param gen_representation: GeneticRepresentation with the precomputed arrays
+        :param n_workers: number of worker processes
+        """
+        self.gen_representation = gen_representation
+        self.n_workers = n_workers
+
+        closes = mp.RawArray('d', gen_representation.closes.size)
+        signals = mp.RawArray('d', gen_representation.signals.size)
+
+        np.frombuffer(closes, dtype=np.float64)[:] = gen_representation.closes
+        np.frombuffer(signals, dtype=np.float64)[:] = gen_representation.signals.ravel()
+
+        initargs = (closes, signals, gen_representation.signals.shape,
+                    gen_representation.commission, gen_representation.start_price)
+
+        self.pool = mp.Pool(n_workers, initializer=_attach_shared_arrays, initargs=initargs)
+
+
+    def __call__(self, x, from_date, to_date, normalization='exponential'):
+        """ Cost function adapted to PSO algorithm """
+
+        window = self.gen_representation.get_window(from_date, to_date)
+
+        # Split the swarm in contiguous chunks, one per worker
+        chunks = [chunk for chunk in np.array_split(x, self.n_workers) if len(chunk) > 0]
+        tasks = [(chunk, window.start, window.stop, normalization) for chunk in chunks]
+
+        final_prices = np.concatenate(self.pool.map(_evaluate_particles, tasks))
+
+        return -final_prices
+
+
+    def close(self):
+        """ Stop the worker processes """
+        self.pool.close()
+        self.pool.join()
@@ -0,0 +1,126 @@
+import numpy as np
+
+
+class ReplayMemory():
+
+    """
+    Fixed capacity memory of samples and labels used to retrain a model.
+
+    Samples are stored in preallocated contiguous arrays used as a ring
+    buffer, a new sample overwrites the oldest one.
+    """
+
+    SAMPLINGS = ('all', 'uniform', 'recency')
+
+
+    def __init__(self, capacity, sampling='all', decay=0.9, seed=1):
+        """
+        ReplayMemory Class Initializer
+        :param capacity: maximum number of samples
+        :param sampling: samples returned by sample()
+            - all - all the samples from the oldest to the newest
+            - uniform - random samples with replacement
+            - recency - random samples with replacement, weighted by decay**age
+        :param decay: weight decay for each bar of age in recency sampling
+        :param seed: seed of the random sampling
+        """
+        if sampling not in self.SAMPLINGS:
+            raise ValueError('Incorrect sampling: ' + sampling)
+
+        if capacity <= 0:
+            raise ValueError('Incorrect memory capacity: ' + str(capacity))
+
+        self.capacity = capacity
+        self.sampling = sampling
+        self.decay = decay
+        self.random = np.random.RandomState(seed)
+
+        self.x = None
+        self.y = None
+        self.size = 0
+        self.position = 0
+
+
+    def __len__(self):
+        return self.size
+
+
+    def add(self, x, y):
+        """
+        Add a sample to the memory, replacing the oldest one if it is full
+        :param x: sample
+        :param y: sample label
+        """
+        if self.x is None:
+            self.x = np.empty((self.capacity,) + np.shape(x), dtype=np.asarray(x).dtype)
+            self.y = np.empty((self.capacity,) + np.shape(y), dtype=np.asarray(y).dtype)
+
+        self.x[self.position] = x
+        self.y[self.position] = y
+
+        self.position = (self.position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+
+    def extend(self, X, y):
+        """
+        Add samples to the memory in order
+        :param X: array of samples
+        :param y: array of labels
+        """
+        for i in range(len(X)):
+            self.add(X[i], y[i])
+
+
+    def get_indices(self):
+        """
+        Get the positions of the stored samples
+        :return: array of positions from the oldest to the newest sample
+        """
+        if self.size < self.capacity:
+            return np.arange(self.size)
+
+        return np.arange(self.position, self.position + self.capacity) % self.capacity
+
+
+    def get_data(self):
+        """
+        Get all the samples from the oldest to the newest. The arrays are views
+        of the memory when the samples are in order, otherwise they are
+        gathered once
+        :return: samples and labels
+        """
+        if self.size < self.capacity:
+            return self.x[:self.size], self.y[:self.size]
+
+        if self.position == 0:
+            return self.x, self.y
+
+        indices = self.get_indices()
+
+        return self.x[indices], self.y[indices]
+
+
+    def sample(self, n_samples=None):
+        """
+        Get samples according to the sampling of the memory
+        :param n_samples: number of random samples, by default the memory size
+        :return: samples and labels
+        """
+        if self.sampling == 'all':
+            return self.get_data()
+
+        if n_samples == None:
+            n_samples = self.size
+
+        indices = self.get_indices()
+        p = None
+
+        if self.sampling == 'recency':
+            age = np.arange(self.size)[::-1]
+            p = self.decay ** age
+            p = p / np.sum(p)
+
+        indices = indices[self.random.choice(self.size, size=n_samples, p=p)]
+
+        return self.x[indices], self.y[indices]
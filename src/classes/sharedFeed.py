@@ -0,0 +1,102 @@
+import array
+import backtrader as bt
+import numpy as np
+
+import src.strategies_execution.execution_vectorized as execution_vectorized
+
+
+class SharedFeed():
+
+    """
+    Market data converted once to the arrays of the backtrader lines.
+
+    Several executions on the same data create their feeds from a SharedFeed,
+    which are preloaded by copying the arrays instead of loading each bar from
+    the dataframe. Indicators computed on the close prices are kept, so each
+    one is computed once for all the strategies.
+    """
+
+    LINES = ('open', 'high', 'low', 'close', 'volume', 'openinterest')
+
+    def __init__(self, df):
+        """
+        SharedFeed Class Initializer
+        :param df: dataframe with market data, columns Open, High, Low, Close and Volume
+        """
+        self.length = len(df)
+        self.lines = {'datetime': array.array('d', [bt.date2num(date.to_pydatetime()) for date in df.index])}
+
+        for name in self.LINES:
+            column = name.capitalize()
+
+            if column in df.columns:
+                values = np.ascontiguousarray(df[column].values, dtype=np.float64)
+            else:
+                values = np.full(self.length, np.nan)
+
+            self.lines[name] = array.array('d')
+            self.lines[name].frombytes(values.tobytes())
+
+        self.close = np.frombuffer(self.lines['close'], dtype=np.float64)
+        self.indicators = {}
+
+
+    def get_indicator(self, name, period):
+        """
+        Get an indicator of the close prices, computing it the first time
+        :param name: indicator name, one of the keys of execution_vectorized.INDICATORS
+        :param period: indicator period
+        :return: array with the indicator value of each bar
+        """
+        return execution_vectorized.get_indicator(self.indicators, name, self.close, period)
+
+
+    def get_data(self):
+        """
+        Get a new backtrader feed with this data
+        :return: SharedData instance
+        """
+        return SharedData(shared=self)
+
+
+class SharedData(bt.feed.DataBase):
+
+    """
+    Backtrader feed of a SharedFeed
+    """
+
+    params = (('shared', None),)
+
+
+    def start(self):
+        """ Called when the feed starts """
+        super().start()
+        self.bar = -1
+
+
+    def preload(self):
+        """ Copy all the bars of the shared arrays """
+        for name, values in self.p.shared.lines.items():
+            getattr(self.lines, name).array.extend(values)
+
+        # All the bars are loaded, _load must not return them again
+        self.bar = self.p.shared.length - 1
+
+        self._last()
+        self.home()
+
+
+    def _load(self):
+        """
+        Load the next bar, used when the feed is not preloaded
+        :return: False when there are no more bars
+        """
+        self.bar += 1
+
+        if self.bar >= self.p.shared.length:
+            return False
+
+        for name, values in self.p.shared.lines.items():
+            getattr(self.lines, name)[0] = values[self.bar]
+
+        return True
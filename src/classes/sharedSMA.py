@@ -0,0 +1,41 @@
+import array
+import math
+import backtrader as bt
+import numpy as np
+
+import src.strategies_execution.execution_vectorized as execution_vectorized
+from src.classes.sharedFeed import SharedData
+
+
+class SharedSMA(bt.Indicator):
+
+    """
+    Simple moving average with the same values as bt.indicators.SMA. On the
+    close prices of a SharedData feed the average is computed once and shared
+    by all the strategies that use the same period.
+    """
+
+    lines = ('sma',)
+    params = (('period', 30),)
+
+    plotinfo = dict(subplot=False)
+
+
+    def __init__(self):
+        """ SharedSMA Class Initializer """
+        self.addminperiod(self.p.period)
+
+
+    def next(self):
+        """ Average of the last period values """
+        self.lines.sma[0] = math.fsum(self.data.get(size=self.p.period)) / self.p.period
+
+
+    def once(self, start, end):
+        """ Averages of all the bars from the shared arrays """
+        if isinstance(self.data, SharedData):
+            values = self.data.p.shared.get_indicator('sma', self.p.period)
+        else:
+            values = execution_vectorized.sma(np.frombuffer(self.data.array, dtype=np.float64)[:end], self.p.period)
+
+        self.lines.sma.array[start:end] = array.array('d', values[start:end].tobytes())
@@ -0,0 +1,113 @@
+import json
+import struct
+
+
+class TraceWriter():
+
+    """
+    Writer of the events of the simulations, in JSON lines or in a binary format.
+
+    Each event has typed fields ('d' float, 'q' integer, 's' string) and the
+    number of the run of the strategy that produced it. Dates are the
+    backtrader date numbers. The binary file starts with a magic string and
+    the JSON schema of the events, and each record is the event code, the run,
+    the numeric fields packed in little endian and the length-prefixed strings.
+    """
+
+    MAGIC = b'TRACE001'
+
+    FORMATS = ('jsonl', 'binary')
+
+    EVENTS = (
+        ('run', (('strategy', 's'),)),
+        ('bar', (('date', 'd'), ('close', 'd'), ('value', 'd'))),
+        ('sizing', (('date', 'd'), ('isbuy', 'q'), ('price', 'd'), ('cash', 'd'), ('risk', 'd'),
+                    ('commission', 'd'), ('size', 'q'))),
+        ('order', (('date', 'd'), ('isbuy', 'q'), ('status', 'q'), ('size', 'd'), ('price', 'd'),
+                   ('value', 'd'), ('commission', 'd'))),
+        ('trade', (('date', 'd'), ('pnl', 'd'), ('pnlcomm', 'd'), ('barlen', 'q')))
+    )
+
+
+    # Python type of each field type, the values are converted so both formats read the same types
+    TYPES = {'d': float, 'q': int, 's': str}
+
+
+    def __init__(self, file_name, fmt='jsonl'):
+        """
+        TraceWriter Class Initializer
+        :param file_name: trace file name
+        :param fmt: file format, one of FORMATS
+        """
+        if fmt not in self.FORMATS:
+            raise ValueError('Unknown trace format: ' + fmt)
+
+        self.fmt = fmt
+        self.run = -1
+        self.fields = {event: [name for name, kind in fields] for event, fields in self.EVENTS}
+        self.types = {event: [self.TYPES[kind] for name, kind in fields] for event, fields in self.EVENTS}
+
+        if fmt == 'binary':
+            self.file = open(file_name, 'wb')
+            self.structs = {event: self.get_struct(code, fields) for code, (event, fields) in enumerate(self.EVENTS)}
+
+            schema = json.dumps(self.EVENTS).encode('utf-8')
+            self.file.write(self.MAGIC + struct.pack('<I', len(schema)) + schema)
+        else:
+            self.file = open(file_name, 'w')
+
+
+    @staticmethod
+    def get_struct(code, fields):
+        """
+        Get the binary layout of an event
+        :param code: event code
+        :param fields: tuple with the name and the type of each field
+        :return: tuple with the code, the struct of the numeric fields and the positions of the string fields
+        """
+        numeric = ''.join(kind for name, kind in fields if kind != 's')
+        strings = [i for i, (name, kind) in enumerate(fields) if kind == 's']
+
+        return code, struct.Struct('<Bq' + numeric), strings
+
+
+    def start_run(self, strategy_name):
+        """
+        Start the events of a new strategy run
+        :param strategy_name: strategy class name
+        """
+        self.run += 1
+        self.write('run', strategy_name)
+
+
+    def write(self, event, *values):
+        """
+        Write an event
+        :param event: event name, one of EVENTS
+        :param values: value of each field of the event
+        """
+        values = [to_type(value) for to_type, value in zip(self.types[event], values)]
+
+        if self.fmt == 'binary':
+            code, layout, strings = self.structs[event]
+
+            if len(strings) == 0:
+                self.file.write(layout.pack(code, self.run, *values))
+            else:
+                numeric = [value for i, value in enumerate(values) if i not in strings]
+                self.file.write(layout.pack(code, self.run, *numeric))
+
+                for i in strings:
+                    encoded = values[i].encode('utf-8')
+                    self.file.write(struct.pack('<H', len(encoded)) + encoded)
+        else:
+            record = dict(zip(self.fields[event], values))
+            record['event'] = event
+            record['run'] = self.run
+
+            self.file.write(json.dumps(record) + '\n')
+
+
+    def close(self):
+        """ Close the trace file """
+        self.file.close()
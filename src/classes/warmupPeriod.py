@@ -0,0 +1,30 @@
+import backtrader as bt
+
+
+class WarmupPeriod(bt.Indicator):
+
+    """
+    Indicator without values that only delays the strategy that uses it: the
+    strategy starts in the bar after the first period-1 bars, which are only
+    used to compute its other indicators.
+    """
+
+    lines = ('warmup',)
+    params = (('period', 1),)
+
+    plotinfo = dict(plot=False)
+
+
+    def __init__(self):
+        """ WarmupPeriod Class Initializer """
+        self.addminperiod(self.p.period)
+
+
+    def next(self):
+        """ Nothing to compute """
+        pass
+
+
+    def once(self, start, end):
+        """ Nothing to compute """
+        pass
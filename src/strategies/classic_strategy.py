@@ -8,6 +8,7 @@ import backtrader as bt
 from numpy.random import seed
 import src.utils.func_utils as func_utils
 from src.strategies.log_strategy import LogStrategy
+from src.classes.sharedSMA import SharedSMA
 
 
 class ClassicStrategy(LogStrategy):
@@ -27,8 +28,8 @@ class ClassicStrategy(LogStrategy):
         super().__init__()
 
         # Simple Moving Average Indicator short and long period
-        ma_short = bt.indicators.SMA(self.datas[0], period=self.params.ma_short)
-        ma_long = bt.indicators.SMA(self.datas[0], period=self.params.ma_long)
+        ma_short = SharedSMA(self.datas[0], period=self.params.ma_short)
+        ma_long = SharedSMA(self.datas[0], period=self.params.ma_long)
         # Crossover signal
         self.crossover = ma_short > ma_long
         # RSI Indicator
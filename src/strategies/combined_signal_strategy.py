@@ -8,6 +8,7 @@ import backtrader as bt
 from numpy.random import seed
 import src.utils.func_utils as func_utils
 from src.strategies.log_strategy import LogStrategy
+from src.classes.incrementalOptimizer import IncrementalOptimizer
 
 
 class CombinedSignalStrategy(LogStrategy):
@@ -26,12 +27,23 @@ class CombinedSignalStrategy(LogStrategy):
 
     optimizer = None
     gen_representation = None
+    cost_function = None
+
+    # Incremental re-optimization: warm-started swarm with early stopping
+    incremental = False
+    plateau_iters = 5
+    plateau_tol = 1e-4
 
 
     def __init__(self):
         """ CombinedSignalStrategy Class Initializer """
         super().__init__()
 
+        self.incremental_optimizer = None
+
+        if self.incremental and self.optimizer != None:
+            self.incremental_optimizer = IncrementalOptimizer(self.optimizer, self.plateau_iters, self.plateau_tol)
+
 
     def next(self):
         """ Define logic in each iteration """
@@ -47,12 +59,20 @@ class CombinedSignalStrategy(LogStrategy):
             from_date = self.data.datetime.date() - timedelta(days=180)
             to_date = self.data.datetime.date() - timedelta(days=1)
 
-            # Reset best cost
-            self.optimizer.swarm.best_cost = 0
+            kwargs={'from_date': from_date, 'to_date': to_date, 'normalization': self.normalization}
+
+            # Cost function object (e.g. evaluated in parallel) or the one of the genetic representation
+            cost_function = self.cost_function if self.cost_function != None else self.gen_representation.cost_function
+
+            if self.incremental_optimizer != None:
+                # Continue from the previous swarm, stop when the best cost plateaus
+                best_cost, best_pos = self.incremental_optimizer.optimize(cost_function, iters=50, **kwargs)
+            else:
+                # Reset best cost
+                self.optimizer.swarm.best_cost = 0
 
-            # Optimize weights
-            kwargs={'from_date': from_date, 'to_date': to_date}
-            best_cost, best_pos = self.optimizer.optimize(self.gen_representation.cost_function, iters=50, **kwargs)
+                # Optimize weights
+                best_cost, best_pos = self.optimizer.optimize(cost_function, iters=50, **kwargs)
 
             self.w, self.buy_threshold, self.sell_threshold = func_utils.get_split_w_threshold(best_pos, self.normalization)
 
@@ -1,7 +1,12 @@
 import backtrader as bt
+import numpy as np
 import logging
 import math
 
+import src.utils.trace as trace
+from src.classes.backtestResult import BacktestResult
+from src.classes.warmupPeriod import WarmupPeriod
+
 
 class LogStrategy(bt.Strategy):
     """
@@ -9,14 +14,20 @@ class LogStrategy(bt.Strategy):
 
     This class is used to log all about simulation process.
 
+    The date, portfolio value, close price and buy and sell fill prices of each
+    bar are recorded in arrays of the instance preallocated to the length of
+    the data feed.
+    Bars, orders and trades are written to the active trace, if any.
 
+    The first warmup bars of the data feed are only used to compute the
+    indicators, the strategy does not trade nor record values in them.
     """
 
-    dates = []
-    values = []
-    closes = []
     printlog = True
 
+    # Number of bars before the start of the simulation, see executions.run_strategy
+    warmup = 0
+
 
     def __init__(self):
         """ LogStrategy Class Initializer """
@@ -27,6 +38,29 @@ class LogStrategy(bt.Strategy):
         self.buyprice = None
         self.buycomm = None
 
+        # Preloaded feeds have their full length before the strategy is created
+        size = max(self.data.buflen(), 1)
+
+        self.dates = np.empty(size)
+        self.values = np.empty(size)
+        self.closes = np.empty(size)
+        self.buys = np.empty(size)
+        self.sells = np.empty(size)
+        self.n_log_values = 0
+
+        # Fill prices of the orders completed in the current bar
+        self.buy_executed = math.nan
+        self.sell_executed = math.nan
+
+        # Trace writer, None when tracing is disabled
+        self.tracer = trace.get_tracer()
+
+        if self.warmup > 0:
+            WarmupPeriod(self.data, period=self.warmup + 1)
+
+        if self.tracer is not None:
+            self.tracer.start_run(type(self).__name__)
+
 
     def log(self, txt, dt=None):
         ''' Logging function fot this strategy'''
@@ -41,6 +75,10 @@ class LogStrategy(bt.Strategy):
         the details of the operation will be notified
         '''
 
+        if self.tracer is not None:
+            self.tracer.write('order', self.data.datetime[0], order.isbuy(), order.status, order.executed.size,
+                              order.executed.price, order.executed.value, order.executed.comm)
+
         if order.status in [order.Submitted, order.Accepted]:
             # Buy/Sell order submitted/accepted to/by broker - Nothing to do
             return
@@ -49,25 +87,14 @@ class LogStrategy(bt.Strategy):
         # Attention: broker could reject order if not enough cash
         if order.status in [order.Completed]:
             if order.isbuy():
-                self.log(
-                    'BUY EXECUTED, Price: %.2f, Cost: %.2f, Comm %.2f' %
-                    (order.executed.price,
-                     order.executed.value,
-                     order.executed.comm))
-
                 self.buyprice = order.executed.price
                 self.buycomm = order.executed.comm
-            else:  # Sell
-                self.log('SELL EXECUTED, Price: %.2f, Cost: %.2f, Comm %.2f' %
-                         (order.executed.price,
-                          order.executed.value,
-                          order.executed.comm))
+                self.buy_executed = order.executed.price
+            else:
+                self.sell_executed = order.executed.price
 
             self.bar_executed = len(self)
 
-        elif order.status in [order.Canceled, order.Margin, order.Rejected]:
-            self.log('Order Canceled/Margin/Rejected')
-
         # Write down: no pending order
         self.order = None
 
@@ -78,15 +105,58 @@ class LogStrategy(bt.Strategy):
         if not trade.isclosed:
             return
 
-        self.log('OPERATION PROFIT, GROSS %.2f, NET %.2f' %
-                 (trade.pnl, trade.pnlcomm))
+        if self.tracer is not None:
+            self.tracer.write('trade', self.data.datetime[0], trade.pnl, trade.pnlcomm, trade.barlen)
 
 
     def update_log_values(self):
         """ Method to update some neccesary values to plot charts after execution"""
-        # Simply log the closing price of the series from the reference
-        self.log('Close, %.2f' % self.dataclose[0])
-
-        self.values.append(self.broker.getvalue())
-        self.dates.append(self.data.datetime.date())
-        self.closes.append(self.dataclose[0])
+        i = self.n_log_values
+
+        # Feeds that are not preloaded grow bar by bar
+        if i == len(self.values):
+            self.dates = np.resize(self.dates, 2*i)
+            self.values = np.resize(self.values, 2*i)
+            self.closes = np.resize(self.closes, 2*i)
+            self.buys = np.resize(self.buys, 2*i)
+            self.sells = np.resize(self.sells, 2*i)
+
+        self.dates[i] = self.data.datetime[0]
+        self.values[i] = self.broker.getvalue()
+        self.closes[i] = self.dataclose[0]
+        self.buys[i] = self.buy_executed
+        self.sells[i] = self.sell_executed
+        self.n_log_values += 1
+
+        self.buy_executed = math.nan
+        self.sell_executed = math.nan
+
+        if self.tracer is not None:
+            self.tracer.write('bar', self.dates[i], self.closes[i], self.values[i])
+
+
+    def get_series(self):
+        """
+        Get other arrays recorded by the strategy for each bar
+        :return: dict with the arrays by name, the buy and sell fill prices (NaN in bars without fills)
+        """
+        n = self.n_log_values
+
+        return {
+            'buys': self.buys[:n],
+            'sells': self.sells[:n]
+        }
+
+
+    def get_result(self, metrics, cerebro=None):
+        """
+        Get the values recorded during the simulation
+        :param metrics: dict with the simulation metrics
+        :param cerebro: backtrader engine of the simulation
+        :return: BacktestResult instance
+        """
+        n = self.n_log_values
+
+        dates = np.array([bt.num2date(date).date() for date in self.dates[:n]])
+
+        return BacktestResult(dates, self.values[:n], self.closes[:n], metrics, cerebro, self.get_series())
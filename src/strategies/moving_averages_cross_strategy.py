@@ -1,5 +1,6 @@
 import backtrader as bt
 from src.strategies.log_strategy import LogStrategy
+from src.classes.sharedSMA import SharedSMA
 
 
 class MovingAveragesCrossStrategy(LogStrategy):
@@ -16,8 +17,8 @@ class MovingAveragesCrossStrategy(LogStrategy):
         super().__init__()
 
         # Simple Moving Average Indicator short and long period
-        ma_short = bt.indicators.SMA(self.datas[0], period=self.params.ma_short)
-        ma_long = bt.indicators.SMA(self.datas[0], period=self.params.ma_long)
+        ma_short = SharedSMA(self.datas[0], period=self.params.ma_short)
+        ma_long = SharedSMA(self.datas[0], period=self.params.ma_long)
         # Crossover signal
         self.crossover = ma_short > ma_long
 
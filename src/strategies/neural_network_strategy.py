@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 import math
+import time
 import datetime
 from datetime import timedelta
 
@@ -21,15 +22,51 @@ class NeuralNetworkStrategy(LogStrategy):
     model = None
     n_day = None
 
-    all_predictions = []
-    predictions = []
-    reals = []
+    # Number of bars predicted in each call to the model, when the weights
+    # do not change on every bar
+    prediction_block = 64
+
+    # Retraining policy (see func_utils.get_retrain_policy) and number of
+    # bars of the rolling prediction error used by the drift policy
+    retrain_policy = 'every-bar'
+    drift_window = 20
 
 
     def __init__(self):
         """ NeuralNetworkStrategy Class Initializer """
         super().__init__()
 
+        self.retrain_mode, self.retrain_value = func_utils.get_retrain_policy(self.retrain_policy)
+
+        # The predictions of a block are discarded when the weights change, so
+        # the policies that change them on every bar predict one bar per call
+        if self.retrain_mode in ('every-bar', 'online') or (self.retrain_mode == 'every' and self.retrain_value == 1):
+            self.block_size = 1
+        else:
+            self.block_size = self.prediction_block
+
+        # Prediction of each bar, to measure the error once its label is known
+        self.bar_predictions = np.full(len(self.X_test), np.nan)
+        # Bars where the prediction gives a buy or sell signal
+        self.signal_bars = np.zeros(len(self.X_test), dtype=bool)
+        self.errors = []
+
+        self.n_updates = 0
+        self.n_retrains = 0
+        self.retrain_time = 0.0
+        self.start_time = None
+        self.end_time = None
+
+
+    def start(self):
+        """ Called before the backtesting starts """
+        self.start_time = time.time()
+
+
+    def stop(self):
+        """ Called after the backtesting ends """
+        self.end_time = time.time()
+
 
     def next(self):
         """ Define logic in each iteration """
@@ -39,25 +76,88 @@ class NeuralNetworkStrategy(LogStrategy):
         if self.order:
             return
 
-        # Predict trend
-        p = self.model.predict(self.X_test[len(self)-1])[0][0]
-        self.all_predictions.append(p)
+        # Predict trend, predictions are reused while the model is not retrained
+        p = self.model.predict_cached(self.X_test, len(self)-1, self.block_size)[0]
+        self.bar_predictions[len(self)-1] = p
 
         # Buy Operation
         if not self.position and p > 0.55:
             self.buy()
-
-            self.predictions.append(p)
-            self.reals.append(np.argmax(self.y_test[len(self)-1]))
+            self.signal_bars[len(self)-1] = True
 
         # Sell Operation
         elif p < 0.45:
             self.sell()
-
-            self.predictions.append(p)
-            self.reals.append(np.argmax(self.y_test[len(self)-1]))
+            self.signal_bars[len(self)-1] = True
 
         # ReTrain Neural Network
         if len(self) >= self.n_day:
-            self.model.update_memory(self.X_test[len(self)-self.n_day], self.y_test[len(self)-self.n_day])
-            self.model.reTrain()
+            i = len(self)-self.n_day
+
+            self.model.update_memory(self.X_test[i], self.y_test[i])
+            self.errors.append(abs(self.bar_predictions[i] - self.y_test[i]))
+            self.n_updates += 1
+
+            if self.must_retrain():
+                start_time = time.time()
+
+                if self.retrain_mode == 'online':
+                    self.model.online_update()
+                else:
+                    self.model.reTrain()
+
+                self.retrain_time += time.time() - start_time
+                self.n_retrains += 1
+
+
+    def must_retrain(self):
+        """
+        Check if the model must be retrained in this bar according to the retraining policy
+        :return: True if the model must be retrained
+        """
+        if self.retrain_mode == 'every':
+            return self.n_updates % self.retrain_value == 0
+
+        if self.retrain_mode == 'drift':
+            if len(self.errors) < self.drift_window or np.mean(self.errors[-self.drift_window:]) <= self.retrain_value:
+                return False
+
+            # Errors of the previous weights are not considered again
+            self.errors = []
+
+        return True
+
+
+    def get_series(self):
+        """
+        Get the fills, the predictions and the labels of each bar
+        :return: dict with the arrays by name
+        """
+        n = self.n_log_values
+
+        series = super().get_series()
+
+        series.update({
+            'predictions': self.bar_predictions[:n],
+            'reals': self.y_test[:n],
+            'signals': self.signal_bars[:n]
+        })
+
+        return series
+
+
+    def get_metrics(self):
+        """
+        Get the metrics of the retraining policy
+        :return: dict with the accuracy of the predictions and the execution times
+        """
+        predicted = ~np.isnan(self.bar_predictions)
+        hits = (self.bar_predictions[predicted] > 0.5) == (self.y_test[predicted] > 0.5)
+
+        return {
+            'Reentrenamiento': self.retrain_policy,
+            'Reentrenamientos': self.n_retrains,
+            'Acierto(%)': 100.0*np.mean(hits) if len(hits) > 0 else 'NaN',
+            'Tiempo reentreno(s)': self.retrain_time,
+            'Tiempo backtest(s)': self.end_time - self.start_time
+        }
@@ -1,5 +1,6 @@
 import backtrader as bt
 from src.strategies.log_strategy import LogStrategy
+from src.classes.sharedSMA import SharedSMA
 
 class OneMovingAverageStrategy(LogStrategy):
     """ One Moving Average Strategy """
@@ -14,7 +15,7 @@ class OneMovingAverageStrategy(LogStrategy):
         super().__init__()
 
         # Add a MovingAverageSimple indicator
-        self.sma = bt.indicators.SimpleMovingAverage(
+        self.sma = SharedSMA(
             self.datas[0], period=self.params.maperiod)
 
 
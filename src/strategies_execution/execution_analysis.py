@@ -7,10 +7,10 @@ import math
 import os
 import sys
 import backtrader as bt
-from fpdf import FPDF
 import webbrowser
 
 import src.strategies_execution.execution_plot as execution_plot
+import src.utils.results_store as results_store
 
 
 def create_folder_if_not_exists(folder_name):
@@ -24,49 +24,15 @@ def create_folder_if_not_exists(folder_name):
 
 def printAnalysis(info, params, metrics, training_params=None):
     '''
-    Function to print the Technical Analysis results in a nice format.
-    :param file_name: file name to print the analysis
-    :param data_name: quote data name
-    :param initial_value: initial value of the portfolio
-    :param final_value: final value of the portfolio
-    :param tradeAnalyzer: trade analyzer instance
-    :param drawDownAnalyzer: drawdown analyzer instance
-    :param myAnalyzer: myAnalyzer instance
-    :param train_accuracy: train accuracy (optional)
-    :param test_accuracy: test accuracy (optional)
+    Save the results of a simulation in the results database (resultados/results.db),
+    one row with the info, params, training params and metrics as columns.
+    Query them with results.py or src.utils.results_store.
+    :param info: dict with the market, strategy name and dates of the simulation
+    :param params: dict with the strategy parameters
+    :param metrics: dict with the simulation metrics
+    :param training_params: dict with the training parameters of the strategy (optional)
     '''
-
-    create_folder_if_not_exists('./resultados')
-
-    file_name = info['Estrategia']
-
-    f = open ('./resultados/results.log','a')
-
-    f.write('------------------------------------\n\n')
-
-    for key, value in info.items():
-        f.write("{0}: {1}\n".format(key, value))
-
-    if len(params) > 0:
-        f.write("\n\n")
-
-        for key, value in params.items():
-            f.write("{0}: {1}\n".format(key, value))
-
-    if training_params != None:
-        f.write("\n\n")
-
-        for key, value in training_params.items():
-            f.write("{0}: {1}\n".format(key, value))
-
-    f.write("\n\n")
-
-    for key, value in metrics.items():
-        if isinstance(value, float):
-            value = round(value, 2)
-        f.write("{0}: {1}\n".format(key, value))
-
-    f.close()
+    results_store.add_run(info, params, metrics, training_params)
 
 
 def print_section(pdf, text_section, font_family, section_size, margin):
@@ -95,7 +61,7 @@ def print_dict(pdf, my_dict, margin, line_sep):
             pdf.ln(line_sep)
 
 
-def printAnalysisPDF(cerebro, info, params, metrics, training_params=None):
+def printAnalysisPDF(cerebro, info, params, metrics, training_params=None, open_browser=True):
     '''
     Function to generate a report in PDF format.
     :param cerebro: backtrader engine (necesary for plot)
@@ -108,6 +74,44 @@ def printAnalysisPDF(cerebro, info, params, metrics, training_params=None):
     :param myAnalyzer: myAnalyzer instance
     :param from_date: start date of simulation
     :param to_date: end date of simulation
+    :param open_browser: if True then the report is opened in the browser
+    :return: PDF path
+    '''
+
+    # Image with 800x500 pixels (8,5)
+    image_path = execution_plot.plot_simulation(cerebro, info['Estrategia'], info['Mercado'], info['Fecha inicial'],
+                                                info['Fecha final'], size=(10,6), style='line')
+
+    return print_pdf(image_path, info, params, metrics, training_params, open_browser)
+
+
+def printResultPDF(result, info, params, training_params=None, open_browser=True):
+    '''
+    Function to generate a report in PDF format from a saved simulation result,
+    the chart is drawn without the backtrader engine.
+    :param result: BacktestResult of the simulation
+    :param info: dict with the market, strategy name and dates of the simulation
+    :param params: dict with the strategy parameters
+    :param training_params: dict with the training parameters of the strategy (optional)
+    :param open_browser: if True then the report is opened in the browser
+    :return: PDF path
+    '''
+    image_path = execution_plot.plot_result(result, info['Estrategia'], info['Mercado'], info['Fecha inicial'],
+                                            info['Fecha final'], size=(10,6))
+
+    return print_pdf(image_path, info, params, result.metrics, training_params, open_browser)
+
+
+def print_pdf(image_path, info, params, metrics, training_params=None, open_browser=True):
+    '''
+    Write the PDF report with the simulation chart, the image is removed after it.
+    :param image_path: path of the simulation chart
+    :param info: dict with the market, strategy name and dates of the simulation
+    :param params: dict with the strategy parameters
+    :param metrics: dict with the simulation metrics
+    :param training_params: dict with the training parameters of the strategy (optional)
+    :param open_browser: if True then the report is opened in the browser
+    :return: PDF path
     '''
 
     file_name = info['Estrategia']
@@ -115,6 +119,8 @@ def printAnalysisPDF(cerebro, info, params, metrics, training_params=None):
     from_date = info['Fecha inicial']
     to_date = info['Fecha final']
 
+    from fpdf import FPDF
+
     pdf = FPDF(unit='in')
     effective_page_width = pdf.w - 2*pdf.l_margin
     sep = effective_page_width/4.0
@@ -156,10 +162,6 @@ def printAnalysisPDF(cerebro, info, params, metrics, training_params=None):
 
     print_section(pdf, "Simulación", font_family, section_size, margin)
 
-    # Image with 800x500 pixels (8,5)
-    image_path = execution_plot.plot_simulation(cerebro, file_name, data_name, from_date, to_date,
-                                                size=(10,6), style='line')
-
     # PDF path
     pdf_path = './reports/' + data_name + '_' + file_name + '_' + from_date + '_' + to_date + '.pdf'
 
@@ -169,4 +171,8 @@ def printAnalysisPDF(cerebro, info, params, metrics, training_params=None):
 
     create_folder_if_not_exists('./reports')
     pdf.output(pdf_path)
-    webbrowser.open_new_tab(pdf_path)
+
+    if open_browser:
+        webbrowser.open_new_tab(pdf_path)
+
+    return pdf_path
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+import heapq
+import itertools
+import os
+import multiprocessing as mp
+import numpy as np
+
+import src.strategies_execution.execution_vectorized as execution_vectorized
+
+
+# Number of best combinations kept by the grid search
+TOP_K = 10
+
+# Market data and grid of the search, set in each worker process by the pool initializer
+_worker_data = {}
+
+
+def _init_worker(data):
+    """
+    Pool initializer: keep the market data, the shared indicators and the grid in the worker
+    :param data: dict returned by get_search_data
+    """
+    _worker_data.update(data)
+
+
+def _evaluate_chunk(task):
+    """
+    Evaluate a chunk of combinations of the grid in a worker process
+    :param task: tuple with the first and last (excluded) index of the combinations and the number of results kept
+    :return: list with the best results of the chunk
+    """
+    start, stop, top_k = task
+
+    return evaluate_combinations(_worker_data, start, stop, top_k)
+
+
+def is_valid_params(params):
+    """
+    Check the parameters of a combination before its evaluation
+    :param params: dict with the strategy parameters
+    :return: False if the short average is not shorter than the long one
+    """
+    return 'ma_short' not in params or 'ma_long' not in params or params['ma_short'] < params['ma_long']
+
+
+def get_search_data(strategy, df, commission, **kwargs):
+    """
+    Get the data shared by all the evaluations of a grid search. The indicator
+    of each distinct period is computed once for all the combinations
+    :param strategy: buying and selling strategy class
+    :param df: dataframe with historical data
+    :param commission: commission to be paid on each operation
+    :param kwargs: values of each parameter of the grid
+    :return: dict with the strategy, prices, commission, indicators and grid
+    """
+    close = np.ascontiguousarray(df['Close'].values, dtype=np.float64)
+    names = list(kwargs)
+    values = [list(kwargs[name]) for name in names]
+
+    indicators = {}
+
+    for name, param_values in zip(names, values):
+        if name in execution_vectorized.PERIOD_PARAMS:
+            for period in sorted(set(param_values)):
+                execution_vectorized.get_indicator(indicators, execution_vectorized.PERIOD_PARAMS[name], close, period)
+
+    return {
+        'strategy': strategy,
+        'open': np.ascontiguousarray(df['Open'].values, dtype=np.float64),
+        'close': close,
+        'commission': commission,
+        'indicators': indicators,
+        'names': names,
+        'values': values
+    }
+
+
+def evaluate_combinations(data, start, stop, top_k):
+    """
+    Simulate the valid combinations of a range of the grid, keeping only the best ones
+    :param data: dict returned by get_search_data
+    :param start: index of the first combination
+    :param stop: index of the last combination (excluded)
+    :param top_k: number of results kept
+    :return: list of results, tuples with the final value, the negative index of the combination and the parameters
+    """
+    best = []
+    combinations = itertools.islice(itertools.product(*data['values']), start, stop)
+
+    for index, combination in enumerate(combinations, start):
+        params = dict(zip(data['names'], combination))
+
+        if not is_valid_params(params):
+            continue
+
+        first, trades = execution_vectorized.get_trades(data['strategy'], data['open'], data['close'],
+                                                        data['commission'], data['indicators'], **params)
+
+        final_value = float(execution_vectorized.get_equity(data['close'], trades)[-1])
+
+        # On equal value the first combination of the grid is better
+        result = (final_value, -index, params)
+
+        if len(best) < top_k:
+            heapq.heappush(best, result)
+        elif result[:2] > best[0][:2]:
+            heapq.heapreplace(best, result)
+
+    return best
+
+
+def grid_search(strategy, df, commission, n_workers=None, top_k=TOP_K, **kwargs):
+    """
+    Simulate every valid combination of parameters of a strategy with the vectorized
+    engine. The grid is split in contiguous chunks evaluated by a pool of processes
+    :param strategy: buying and selling strategy class, supported by the vectorized engine
+    :param df: dataframe with historical data
+    :param commission: commission to be paid on each operation
+    :param n_workers: number of worker processes, all the cpus by default
+    :param top_k: number of results kept
+    :param kwargs: values of each parameter of the grid
+    :return: list with the final value and the parameters of the best combinations, from best to worst
+    """
+    data = get_search_data(strategy, df, commission, **kwargs)
+
+    n_combinations = int(np.prod([len(values) for values in data['values']]))
+
+    if n_combinations == 0 or len(df) == 0:
+        return []
+
+    if n_workers == None:
+        n_workers = os.cpu_count()
+
+    n_workers = max(1, min(n_workers, n_combinations))
+
+    # Pool workers are daemonic and cannot start their own pool
+    if n_workers == 1 or mp.current_process().daemon:
+        results = evaluate_combinations(data, 0, n_combinations, top_k)
+    else:
+        # Several chunks per worker balance the load of combinations skipped as invalid
+        bounds = np.linspace(0, n_combinations, min(4*n_workers, n_combinations) + 1).astype(int)
+        tasks = [(int(start), int(stop), top_k) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+        pool = mp.Pool(n_workers, initializer=_init_worker, initargs=(data,))
+
+        try:
+            results = list(itertools.chain.from_iterable(pool.imap_unordered(_evaluate_chunk, tasks)))
+        finally:
+            pool.close()
+            pool.join()
+
+    results = heapq.nlargest(top_k, results, key=lambda result: result[:2])
+
+    return [(final_value, params) for final_value, index, params in results]
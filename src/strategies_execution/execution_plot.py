@@ -43,6 +43,24 @@ def plot_simulation(cerebro, file_name, data_name, from_date=None, to_date=None,
 
     #plt.show()
 
+    saved_file_name = get_simulation_file_name(file_name, data_name, from_date, to_date, size)
+
+    plt.savefig(saved_file_name)
+    fig.set_size_inches(default_size_inches)
+
+    return saved_file_name
+
+
+def get_simulation_file_name(file_name, data_name, from_date=None, to_date=None, size=None):
+    """
+    Get the file name of a simulation chart, creating its folder if not exists
+    :param file_name: strategy file name
+    :param data_name: quote data name
+    :param from_date: start date of simulation
+    :param to_date: end date of simulation
+    :param size: chart size in inches
+    :return: file name of the chart
+    """
     # Create simulacion folder if not exists
     create_folder_inside_img_if_not_exists('simulacion_' + file_name)
 
@@ -53,16 +71,51 @@ def plot_simulation(cerebro, file_name, data_name, from_date=None, to_date=None,
 
     saved_file_name += file_name + '_' + str(size[0]) + '_' + str(size[1]) + '.png'
 
+    return saved_file_name
+
+
+def plot_result(result, file_name, data_name, from_date=None, to_date=None, size=(10,6)):
+    """
+    Plot strategy simulation from its recorded result, without the backtrader engine:
+    the portfolio value and the close price with the buy and sell fills
+    :param result: BacktestResult of the simulation
+    :param file_name: file name for the generated image
+    :param data_name: quote data name
+    :param from_date: start date of simulation
+    :param to_date: end date of simulation
+    :param size: chart size in inches
+    :return: saved file name
+    """
+    fig, (ax_value, ax_price) = plt.subplots(2, 1, sharex=True, figsize=size, gridspec_kw={'height_ratios': [1, 3]})
+    plt.subplots_adjust(top=0.98, bottom=0.1, left=0.1, right=0.9, hspace=0.0, wspace=0.0)
+
+    ax_value.plot(result.dates, result.values, color='blue', label='Valor')
+    ax_value.legend(loc='upper left')
+    ax_value.yaxis.grid(linestyle="-")
+
+    ax_price.plot(result.dates, result.closes, color='black', linewidth=1.0, label=data_name)
+
+    if 'buys' in result.series:
+        ax_price.plot(result.dates, result.series['buys'], '^', color='green', markersize=8, label='Compra')
+
+    if 'sells' in result.series:
+        ax_price.plot(result.dates, result.series['sells'], 'v', color='red', markersize=8, label='Venta')
+
+    ax_price.legend(loc='upper left')
+    ax_price.yaxis.grid(linestyle="-")
+
+    saved_file_name = get_simulation_file_name(file_name, data_name, from_date, to_date, size)
+
     plt.savefig(saved_file_name)
-    fig.set_size_inches(default_size_inches)
+    plt.close(fig)
 
     return saved_file_name
 
 
-def plot_capital(strategy_list, data_name, img_name, from_date=None, to_date=None):
+def plot_capital(result_list, data_name, img_name, from_date=None, to_date=None):
     """
     Plot chart with the capital of the strategy list
-    :param strategy_list: list with the strategies and their respective names
+    :param result_list: list with the BacktestResult of the strategies and their respective names
     :param data_name: quote data name
     :param img_name: file name for the generated image
     :param from_date: start date of simulation
@@ -72,8 +125,8 @@ def plot_capital(strategy_list, data_name, img_name, from_date=None, to_date=Non
     plt.subplots_adjust(top=0.98, bottom=0.1, left=0.1, right=0.9, hspace=0.0, wspace=0.0)
     ax = fig.add_subplot(111)
 
-    for strategy, name_strategy in strategy_list:
-        ax.plot(strategy.dates, strategy.values, label=name_strategy)
+    for result, name_strategy in result_list:
+        ax.plot(result.dates, result.values, label=name_strategy)
 
     ax.legend(loc='upper left')
     ax.yaxis.grid(linestyle="-")
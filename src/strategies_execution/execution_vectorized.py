@@ -0,0 +1,445 @@
+# -*- coding: utf-8 -*-
+
+import math
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+from src.classes.backtestResult import BacktestResult
+
+
+# Initial cash of the simulations, as in executions.run_strategy
+INITIAL_CASH = 6000.0
+
+
+def sma(close, period):
+    """
+    Simple moving average with the same rounding as backtrader, the exact sum of each window
+    :param close: array with close prices
+    :param period: number of bars of the average
+    :return: array with the average of each bar, NaN in the first period-1 bars
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    average = np.full(len(close), np.nan)
+
+    n_windows = len(close) - period + 1
+
+    if n_windows > 0:
+        windows = as_strided(close, shape=(n_windows, period), strides=(close.strides[0], close.strides[0]))
+        average[period-1:] = np.fromiter(map(math.fsum, windows.tolist()), dtype=np.float64, count=n_windows)
+        average[period-1:] /= period
+
+    return average
+
+
+def smma(x, period, start):
+    """
+    Smoothed moving average as computed by backtrader: seeded with the simple
+    average of the first period values and smoothed with alpha = 1/period
+    :param x: array of values
+    :param period: number of bars of the average
+    :param start: index of the first valid value of x
+    :return: array with the average of each bar, NaN before the seed
+    """
+    alpha = 1.0 / period
+    alpha1 = 1.0 - alpha
+
+    average = np.full(len(x), np.nan)
+    seed_index = start + period - 1
+
+    if seed_index >= len(x):
+        return average
+
+    values = x.tolist()
+    prev = math.fsum(values[start:seed_index+1]) / period
+    average[seed_index] = prev
+
+    # Each value depends on the previous one
+    for i in range(seed_index+1, len(values)):
+        prev = prev * alpha1 + values[i] * alpha
+        average[i] = prev
+
+    return average
+
+
+def rsi(close, period):
+    """
+    Relative strength index as computed by backtrader
+    :param close: array with close prices
+    :param period: period of the smoothed averages of up and down moves
+    :return: array with the rsi of each bar, NaN in the first period bars
+    """
+    close = np.asarray(close, dtype=np.float64)
+
+    diff = np.full(len(close), np.nan)
+    diff[1:] = close[1:] - close[:-1]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        up = np.maximum(diff, 0.0)
+        down = np.maximum(-diff, 0.0)
+
+        rs = smma(up, period, 1) / smma(down, period, 1)
+
+        return 100.0 - 100.0 / (1.0 + rs)
+
+
+def _previous(x):
+    """
+    Shift an array one bar, as x[-1] in backtrader
+    :param x: array of values
+    :return: shifted array, NaN in the first bar
+    """
+    shifted = np.full(len(x), np.nan)
+    shifted[1:] = x[:-1]
+    return shifted
+
+
+def buy_and_hold_signals(close, params, indicators=None):
+    """
+    Signals of BuyAndHoldStrategy
+    :param close: array with close prices
+    :param params: dict with the strategy parameters
+    :param indicators: dict with precomputed indicators by (name, period), see get_indicator (optional)
+    :return:
+        - first - first bar where the strategy is evaluated
+        - buy - boolean array, True where the strategy buys if it is out of the market
+        - sell - boolean array, True where the strategy sells if it is in the market
+    """
+    return 0, np.ones(len(close), dtype=bool), np.zeros(len(close), dtype=bool)
+
+
+def one_moving_average_signals(close, params, indicators=None):
+    """
+    Signals of OneMovingAverageStrategy, see buy_and_hold_signals
+    """
+    ma = get_indicator(indicators, 'sma', close, params['maperiod'])
+
+    return params['maperiod'] - 1, close > ma, close < ma
+
+
+def moving_averages_cross_signals(close, params, indicators=None):
+    """
+    Signals of MovingAveragesCrossStrategy, see buy_and_hold_signals
+    """
+    crossover = get_indicator(indicators, 'sma', close, params['ma_short']) > get_indicator(indicators, 'sma', close, params['ma_long'])
+
+    return max(params['ma_short'], params['ma_long']) - 1, crossover, ~crossover
+
+
+def classic_signals(close, params, indicators=None):
+    """
+    Signals of ClassicStrategy, see buy_and_hold_signals
+    """
+    crossover = get_indicator(indicators, 'sma', close, params['ma_short']) > get_indicator(indicators, 'sma', close, params['ma_long'])
+
+    rsi_values = get_indicator(indicators, 'rsi', close, params['rsi_period'])
+    rsi_previous = _previous(rsi_values)
+
+    with np.errstate(invalid='ignore'):
+        rsi_cross_above_oversold = (rsi_previous < params['oversold']) & (rsi_values >= params['oversold'])
+        rsi_cross_below_overbought = (rsi_previous > params['overbought']) & (rsi_values <= params['overbought'])
+
+    first = max(params['ma_short'], params['ma_long'], params['rsi_period'] + 1) - 1
+
+    return first, crossover & rsi_cross_above_oversold, ~crossover & rsi_cross_below_overbought
+
+
+# Signal functions by strategy class name
+SIGNALS = {
+    'BuyAndHoldStrategy': buy_and_hold_signals,
+    'OneMovingAverageStrategy': one_moving_average_signals,
+    'MovingAveragesCrossStrategy': moving_averages_cross_signals,
+    'ClassicStrategy': classic_signals
+}
+
+INDICATORS = {
+    'sma': sma,
+    'rsi': rsi
+}
+
+# Indicator computed with each period parameter of the strategies
+PERIOD_PARAMS = {
+    'maperiod': 'sma',
+    'ma_short': 'sma',
+    'ma_long': 'sma',
+    'rsi_period': 'rsi'
+}
+
+
+def get_indicator(indicators, name, close, period):
+    """
+    Get an indicator, computing it only if it is not in indicators
+    :param indicators: dict with precomputed indicators by (name, period), updated with the computed ones. If None nothing is kept
+    :param name: indicator name, one of the keys of INDICATORS
+    :param close: array with close prices
+    :param period: indicator period
+    :return: array with the indicator value of each bar
+    """
+    if indicators is None:
+        return INDICATORS[name](close, period)
+
+    if (name, period) not in indicators:
+        indicators[(name, period)] = INDICATORS[name](close, period)
+
+    return indicators[(name, period)]
+
+
+def get_signals_function(strategy):
+    """
+    Get the signal function of a strategy class
+    :param strategy: strategy class
+    :return: signal function
+    """
+    for cls in strategy.__mro__:
+        if cls.__name__ in SIGNALS:
+            return SIGNALS[cls.__name__]
+
+    raise ValueError('Strategy not supported by the vectorized engine: ' + strategy.__name__)
+
+
+def simulate(open_price, close, first, buy, sell, commission, cash=INITIAL_CASH, risk=1.0):
+    """
+    Simulate the orders of a long-only strategy with the rules of the backtrader broker:
+    orders are created at the close of a bar and filled at the open of the next one,
+    buys are sized as MaxRiskSizer and rejected if the cash is not enough
+    :param open_price: array with open prices
+    :param close: array with close prices
+    :param first: first bar where the strategy is evaluated
+    :param buy: boolean array, True where the strategy buys if it is out of the market
+    :param sell: boolean array, True where the strategy sells if it is in the market
+    :param commission: commission to be paid on each operation
+    :param cash: initial cash
+    :param risk: fraction of the cash used in each buy
+    :return: list of trades, tuples with
+        - entry - bar of the buy fill
+        - exit - bar of the sell fill, None if the trade is open at the end
+        - size - number of shares
+        - price - price of the buy fill
+        - cash - cash after the buy fill
+        - exit_cash - cash after the sell fill, None if the trade is open
+        - pnlcomm - profit of the closed trade after commissions, None if the trade is open
+    """
+    n_bars = len(close)
+    opens = open_price.tolist()
+    closes = close.tolist()
+
+    buy_bars = np.flatnonzero(buy)
+    sell_bars = np.flatnonzero(sell)
+
+    trades = []
+    bar = first
+
+    while True:
+        # Next bar with a buy signal
+        i = np.searchsorted(buy_bars, bar)
+
+        if i == len(buy_bars):
+            break
+
+        order_bar = int(buy_bars[i])
+
+        # Orders of the last bar are never filled
+        if order_bar + 1 >= n_bars:
+            break
+
+        size = max(cash * risk / (closes[order_bar] * (1 + (commission * 2))), 0)
+        size = math.floor(size)
+
+        bar = order_bar + 1
+
+        if size == 0:
+            continue
+
+        price = opens[bar]
+        buy_cash = cash - abs(size) * price
+        buy_comm = abs(size) * commission * price
+        buy_cash -= buy_comm
+
+        # Margin: the order is rejected and the strategy stays out of the market
+        if buy_cash < 0.0:
+            continue
+
+        cash = buy_cash
+        entry, entry_price = bar, price
+
+        # Next bar with a sell signal, the strategy is evaluated again after the buy fill
+        j = np.searchsorted(sell_bars, entry)
+
+        if j == len(sell_bars) or sell_bars[j] + 1 >= n_bars:
+            trades.append((entry, None, size, entry_price, cash, None, None))
+            break
+
+        bar = int(sell_bars[j]) + 1
+        price = opens[bar]
+
+        pnl = size * (price - entry_price) * 1.0
+        cash += abs(size) * entry_price + pnl
+        sell_comm = abs(size) * commission * price
+        cash -= sell_comm
+
+        trades.append((entry, bar, size, entry_price, buy_cash, cash, pnl - (buy_comm + sell_comm)))
+
+    return trades
+
+
+def get_equity(close, trades, cash=INITIAL_CASH):
+    """
+    Get the portfolio value at the close of each bar
+    :param close: array with close prices
+    :param trades: list of trades returned by simulate
+    :param cash: initial cash
+    :return: array with the portfolio value of each bar
+    """
+    n_bars = len(close)
+
+    # Cash, position size and position price from each fill to the next one
+    fill_bars = [0]
+    cash_levels = [cash]
+    size_levels = [0]
+    price_levels = [0.0]
+
+    for entry, exit, size, price, entry_cash, exit_cash, pnlcomm in trades:
+        fill_bars.append(entry)
+        cash_levels.append(entry_cash)
+        size_levels.append(size)
+        price_levels.append(price)
+
+        if exit is not None:
+            fill_bars.append(exit)
+            cash_levels.append(exit_cash)
+            size_levels.append(0)
+            price_levels.append(0.0)
+
+    level = np.searchsorted(fill_bars, np.arange(n_bars), side='right') - 1
+
+    size = np.asarray(size_levels, dtype=np.float64)[level]
+    price = np.asarray(price_levels)[level]
+
+    # Same operations as the broker value, which adds back the unrealized profit
+    position_value = size * close
+    unrealized = size * (close - price) * 1.0
+
+    return np.asarray(cash_levels)[level] + ((position_value - unrealized) + unrealized)
+
+
+def get_metrics(values, trades, cash=INITIAL_CASH):
+    """
+    Get the simulation metrics, as computed by the analyzers of executions.run_strategy
+    :param values: array with the portfolio value of each bar
+    :param trades: list of trades returned by simulate
+    :param cash: initial cash
+    :return: dict with the simulation metrics
+    """
+    initial_value = cash
+    final_value = float(values[-1]) if len(values) > 0 else cash
+
+    peak = np.maximum.accumulate(values)
+    max_drawdown = float(np.max(100.0 * (peak - values) / peak)) if len(values) > 0 else 0.0
+
+    # Return of each closed trade over the cash after the previous one
+    closed_trades = [trade for trade in trades if trade[1] is not None]
+    previous_cash = cash
+
+    n_positives = n_negatives = 0
+    accumulate = accumulate_profit = accumulate_loss = 0
+    avg_trade = avg_profit_trade = avg_loss_trade = 0
+
+    for entry, exit, size, price, entry_cash, exit_cash, pnlcomm in closed_trades:
+        trade_return = (exit_cash - previous_cash) / previous_cash
+        accumulate += trade_return
+
+        if pnlcomm > 0:
+            n_positives += 1
+            accumulate_profit += trade_return
+        elif pnlcomm < 0:
+            n_negatives += 1
+            accumulate_loss += trade_return
+
+        previous_cash = exit_cash
+
+    if len(closed_trades) > 0:
+        avg_trade = accumulate / len(closed_trades)
+    if n_positives > 0:
+        avg_profit_trade = accumulate_profit / n_positives
+    if n_negatives > 0:
+        avg_loss_trade = accumulate_loss / n_negatives
+
+    avg_profit_trade = round(avg_profit_trade, 2)
+    avg_loss_trade = round(avg_loss_trade, 2)
+
+    avg_profit_loss = 'NaN'
+
+    if avg_loss_trade != 0:
+        avg_profit_loss = round((-1)*avg_profit_trade/avg_loss_trade,2)
+
+    return {
+        'Inicial': initial_value,
+        'Final': final_value,
+        'Ganancia(%)': (final_value-initial_value)/initial_value,
+        'Ganancias': round(final_value-initial_value,2),
+        'Max DD': round((-1.0)*max_drawdown,2),
+        'Trades total': len(closed_trades),
+        'Trades+': n_positives,
+        'Trades-': n_negatives,
+        'Avg trade': round(avg_trade,2),
+        'Avg profit': avg_profit_trade,
+        'Avg loss': avg_loss_trade,
+        'Profit/Loss': avg_profit_loss
+    }
+
+
+def get_trades(strategy, open_price, close, commission, indicators=None, warmup=0, **kwargs):
+    """
+    Simulate a strategy with its default parameters updated with kwargs
+    :param strategy: buying and selling strategy class
+    :param open_price: array with open prices
+    :param close: array with close prices
+    :param commission: commission to be paid on each operation
+    :param indicators: dict with precomputed indicators shared between simulations of the same data (optional)
+    :param warmup: number of bars before the start of the simulation, only used to compute the indicators
+    :return:
+        - first - first bar where the strategy is evaluated
+        - trades - list of trades returned by simulate
+    """
+    signals_function = get_signals_function(strategy)
+
+    params = dict(strategy.params._getitems())
+    params.update(kwargs)
+
+    first, buy, sell = signals_function(close, params, indicators)
+    first = min(max(first, warmup), len(close))
+
+    return first, simulate(open_price, close, first, buy, sell, commission)
+
+
+def run_strategy(strategy, df, commission, indicators=None, warmup=0, **kwargs):
+    """
+    Simulate a strategy on data history contained in df with arrays instead of the backtrader event loop.
+    The results are the same as executions.run_strategy for the strategies in SIGNALS
+    :param strategy: buying and selling strategy class
+    :param df: dataframe with historical data
+    :param commission: commission to be paid on each operation
+    :param indicators: dict with precomputed indicators shared between simulations of the same data (optional)
+    :param warmup: number of bars before the start of the simulation, only used to compute the indicators
+    :return: BacktestResult with the values of the bars where the strategy is evaluated
+    """
+    open_price = np.ascontiguousarray(df['Open'].values, dtype=np.float64)
+    close = np.ascontiguousarray(df['Close'].values, dtype=np.float64)
+
+    first, trades = get_trades(strategy, open_price, close, commission, indicators, warmup, **kwargs)
+    values = get_equity(close, trades)
+
+    metrics = get_metrics(values, trades)
+
+    # Fill prices of each bar, as recorded by LogStrategy
+    buys = np.full(len(close), np.nan)
+    sells = np.full(len(close), np.nan)
+
+    for entry, exit, size, price, cash, exit_cash, pnlcomm in trades:
+        buys[entry] = price
+
+        if exit is not None:
+            sells[exit] = open_price[exit]
+
+    series = {'buys': buys[first:], 'sells': sells[first:]}
+
+    return BacktestResult(df.index[first:].date, values[first:], close[first:], metrics, series=series)
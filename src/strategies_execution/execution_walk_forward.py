@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import multiprocessing as mp
+import numpy as np
+import pandas as pd
+
+import src.strategies_execution.executions as executions
+import src.strategies_execution.execution_vectorized as execution_vectorized
+import src.utils.result_cache as result_cache
+from src.classes.backtestResult import BacktestResult
+
+
+# Market data and options of the walk-forward, set in each worker process by the pool initializer
+_worker_data = {}
+
+
+def _init_worker(data, use_cache):
+    """
+    Pool initializer: keep the market data and the options in the worker
+    :param data: dict with the arguments of run_fold, except the fold
+    :param use_cache: if False then the results cache is disabled, as in the parent process
+    """
+    _worker_data.update(data)
+    result_cache.set_enabled(use_cache)
+
+    # The output of the executions is discarded
+    sys.stdout = open(os.devnull, 'w')
+
+
+def _run_fold(task):
+    """
+    Execute a fold in a worker process
+    :param task: tuple with the fold number and the fold
+    :return: tuple returned by run_fold
+    """
+    i, fold = task
+
+    return run_fold(i, fold, **_worker_data)
+
+
+def get_folds(df, start_date, end_date, window, step, horizon):
+    """
+    Get the folds of a walk-forward evaluation. The test periods start every step
+    months from start_date, each one is trained with the window months before it
+    :param df: dataframe with market data
+    :param start_date: start date of the first test period
+    :param end_date: end date of the last test period
+    :param window: months of the training period of each fold
+    :param step: months between the start of two consecutive test periods
+    :param horizon: months of each test period
+    :return: list of folds, tuples with the start of the training period and the start and end of the test period
+    """
+    end = min(pd.Timestamp(end_date), df.index[-1])
+    test_start = pd.Timestamp(start_date)
+
+    folds = []
+
+    while test_start <= end:
+        test_end = min(test_start + pd.DateOffset(months=horizon) - pd.Timedelta(days=1), end)
+        train_start = test_start - pd.DateOffset(months=window)
+
+        # Periods without market data are skipped
+        if len(df[test_start:test_end]) > 0:
+            folds.append((train_start.strftime('%Y-%m-%d'), test_start.strftime('%Y-%m-%d'), test_end.strftime('%Y-%m-%d')))
+
+        test_start += pd.DateOffset(months=step)
+
+    return folds
+
+
+def run_fold(i, fold, df, strategy_name, commission, data_name, engine='backtrader', options=None, kwargs=None):
+    """
+    Train and simulate a strategy in a fold, without reports. The moving averages
+    strategies compute their indicators from the start of the training period,
+    so they can trade from the first day of the test period
+    :param i: fold number
+    :param fold: tuple with the start of the training period and the start and end of the test period
+    :param df: dataframe with historical data
+    :param strategy_name: strategy command line name
+    :param commission: commission to be paid on each operation
+    :param data_name: quote data name
+    :param engine: backtest engine of the moving averages strategies, one of executions.ENGINES
+    :param options: dict with the options of the neural network or pso strategies
+    :param kwargs: other arguments of the execute function of the strategy
+    :return: tuple with the fold number, the BacktestResult of the test period (None if it failed),
+             the error message and the execution time in seconds
+    """
+    train_start, test_start, test_end = fold
+    kwargs = kwargs or {}
+
+    start_time = time.time()
+
+    try:
+        if strategy_name == 'buy-and-hold':
+            result, strategy = executions.execute_buy_and_hold_strategy(df, commission, data_name, test_start, test_end,
+                                                                        engine, 'none', train_start)
+        elif strategy_name == 'classic':
+            result, strategy = executions.execute_classic_strategy(df, commission, data_name, test_start, test_end,
+                                                                   engine, 'none', train_start)
+        elif strategy_name == 'one-ma':
+            result, strategy = executions.execute_one_moving_average_strategy(df, commission, data_name, test_start,
+                                                                              test_end, engine, 'none', train_start,
+                                                                              train_start)
+        elif strategy_name == 'two-ma':
+            result, strategy = executions.execute_moving_averages_cross_strategy(df, commission, data_name, test_start,
+                                                                                 test_end, engine=engine, report='none',
+                                                                                 train_start=train_start,
+                                                                                 warmup_start=train_start, **kwargs)
+        elif strategy_name == 'neural-network':
+            result, strategy = executions.execute_neural_network_strategy(df, options, commission, data_name, test_start,
+                                                                          test_end, 'none', train_start)
+        elif strategy_name == 'combined-signal-pso':
+            result, strategy = executions.execute_pso_strategy(df, options, commission, data_name, test_start, test_end,
+                                                               report='none', train_start=train_start, **kwargs)
+        else:
+            raise ValueError('Unknown strategy: ' + strategy_name)
+    except Exception as e:
+        return i, None, repr(e), time.time() - start_time
+
+    # The backtrader engine is not sent back to the parent process
+    result = BacktestResult(result.dates, result.values, result.closes, result.metrics, series=result.series)
+
+    return i, result, '', time.time() - start_time
+
+
+def stitch_results(folds, results):
+    """
+    Stitch the out-of-sample capital of the folds. Each fold is used until the start
+    of the next one, and its capital is scaled to start with the final capital of the previous one
+    :param folds: list of folds returned by get_folds
+    :param results: BacktestResult of each fold, None for the failed folds
+    :return: tuple with the dates, values, closes and series of the stitched simulation
+    """
+    dates, values, closes = [], [], []
+    series = {}
+
+    capital = None
+
+    for k, (fold, result) in enumerate(zip(folds, results)):
+        if result is None or len(result.values) == 0:
+            continue
+
+        n = len(result.dates)
+
+        # Overlapping test periods are cut at the start of the next fold
+        if k+1 < len(folds):
+            n = int(np.searchsorted(np.array(result.dates), pd.Timestamp(folds[k+1][1]).date()))
+
+        if n == 0:
+            continue
+
+        initial_value = result.metrics['Inicial']
+
+        if capital is None:
+            capital = initial_value
+
+        fold_values = capital * np.asarray(result.values[:n]) / initial_value
+
+        dates.append(np.asarray(result.dates[:n]))
+        values.append(fold_values)
+        closes.append(np.asarray(result.closes[:n]))
+
+        for name in ('buys', 'sells'):
+            if name in result.series:
+                series.setdefault(name, []).append(np.asarray(result.series[name][:n]))
+
+        capital = fold_values[-1]
+
+    if len(values) == 0:
+        return np.array([]), np.array([]), np.array([]), {}
+
+    series = {name: np.concatenate(arrays) for name, arrays in series.items() if len(arrays) == len(values)}
+
+    return np.concatenate(dates), np.concatenate(values), np.concatenate(closes), series
+
+
+def get_summary(values, results, times, initial_value):
+    """
+    Get the metrics of the stitched simulation
+    :param values: array with the stitched capital of each day
+    :param results: BacktestResult of each fold, None for the failed folds
+    :param times: execution time in seconds of each fold
+    :param initial_value: initial capital
+    :return: dict with the metrics
+    """
+    final_value = float(values[-1]) if len(values) > 0 else initial_value
+
+    # Maximum drawdown in percentage, as the backtrader analyzer
+    max_dd = 0.0
+
+    if len(values) > 0:
+        peaks = np.maximum.accumulate(values)
+        max_dd = float(np.max(100.0 * (peaks - values) / peaks))
+
+    done = [result for result in results if result is not None]
+
+    return {
+        'Inicial': initial_value,
+        'Final': final_value,
+        'Ganancia(%)': (final_value-initial_value)/initial_value,
+        'Ganancias': round(final_value-initial_value,2),
+        'Max DD': round((-1.0)*max_dd,2),
+        'Trades total': sum(int(result.metrics['Trades total']) for result in done),
+        'Trades+': sum(int(result.metrics['Trades+']) for result in done),
+        'Trades-': sum(int(result.metrics['Trades-']) for result in done),
+        'Folds': len(results),
+        'Folds fallidos': len(results) - len(done),
+        'Folds+': sum(1 for result in done if result.metrics['Final'] > result.metrics['Inicial']),
+        'Tiempo folds(s)': sum(times)
+    }
+
+
+def walk_forward(df, strategy_name, commission, data_name, start_date, end_date, window=24, step=6, horizon=6,
+                 n_workers=None, engine='backtrader', options=None, **kwargs):
+    """
+    Walk-forward evaluation of a strategy: every fold is trained with its own window
+    and simulated in the following period. The folds are independent and they are
+    executed in a pool of processes
+    :param df: dataframe with historical data
+    :param strategy_name: strategy command line name
+    :param commission: commission to be paid on each operation
+    :param data_name: quote data name
+    :param start_date: start date of the first test period
+    :param end_date: end date of the last test period
+    :param window: months of the training period of each fold
+    :param step: months between the start of two consecutive test periods
+    :param horizon: months of each test period
+    :param n_workers: number of worker processes, all the cpus by default
+    :param engine: backtest engine of the moving averages strategies, one of executions.ENGINES
+    :param options: dict with the options of the neural network or pso strategies
+    :param kwargs: other arguments of the execute function of the strategy
+    :return:
+        - result - BacktestResult with the stitched capital of the test periods and the combined metrics
+        - fold_list - list of dicts with the dates, metrics and time of each fold
+    """
+    start_time = time.time()
+
+    folds = get_folds(df, start_date, end_date, window, step, horizon)
+
+    if len(folds) == 0:
+        raise ValueError('No hay datos entre ' + start_date + ' y ' + end_date)
+
+    data = {
+        'df': df,
+        'strategy_name': strategy_name,
+        'commission': commission,
+        'data_name': data_name,
+        'engine': engine,
+        'options': options,
+        'kwargs': kwargs
+    }
+
+    if n_workers == None:
+        n_workers = os.cpu_count()
+
+    n_workers = max(1, min(n_workers, len(folds)))
+
+    outputs = [None] * len(folds)
+    tasks = list(enumerate(folds))
+
+    # Pool workers (e.g. batch jobs) are daemonic and cannot start their own pool
+    if n_workers == 1 or mp.current_process().daemon:
+        for task in tasks:
+            outputs[task[0]] = run_fold(task[0], task[1], **data)
+    else:
+        # Spawned workers can use TensorFlow, it is not safe after a fork
+        pool = mp.get_context('spawn').Pool(n_workers, initializer=_init_worker,
+                                            initargs=(data, result_cache.is_enabled()))
+
+        try:
+            for output in pool.imap_unordered(_run_fold, tasks):
+                outputs[output[0]] = output
+        finally:
+            pool.close()
+            pool.join()
+
+    results = [result for i, result, error, fold_time in outputs]
+    times = [fold_time for i, result, error, fold_time in outputs]
+
+    fold_list = []
+
+    for (train_start, test_start, test_end), (i, result, error, fold_time) in zip(folds, outputs):
+        fold_list.append({
+            'Fold': i + 1,
+            'Inicio train': train_start,
+            'Inicio test': test_start,
+            'Fin test': test_end,
+            'Final': round(result.metrics['Final'], 2) if result is not None else 'NaN',
+            'Ganancia(%)': round(100.0 * result.metrics['Ganancia(%)'], 2) if result is not None else 'NaN',
+            'Trades total': result.metrics['Trades total'] if result is not None else 'NaN',
+            'Tiempo(s)': round(fold_time, 2),
+            'Error': error
+        })
+
+    dates, values, closes, series = stitch_results(folds, results)
+
+    initial_value = next((result.metrics['Inicial'] for result in results if result is not None),
+                         execution_vectorized.INITIAL_CASH)
+
+    metrics = get_summary(values, results, times, initial_value)
+    metrics['Tiempo total(s)'] = time.time() - start_time
+
+    return BacktestResult(dates, values, closes, metrics, series=series), fold_list
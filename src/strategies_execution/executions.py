@@ -4,11 +4,15 @@ import pandas as pd
 import numpy as np
 import math
 import sys, getopt
+import importlib
+import multiprocessing as mp
 from datetime import datetime, timedelta
 
-from sklearn.preprocessing import StandardScaler
-
 import src.utils.func_utils as func_utils
+import src.utils.feed_cache as feed_cache
+import src.utils.report_store as report_store
+import src.utils.result_cache as result_cache
+import src.utils.trace as trace
 
 # Import classes
 from src.classes.myCerebro import MyCerebro
@@ -16,22 +20,10 @@ from src.classes.myAnalyzer import MyAnalyzer
 from src.classes.myBuySell import MyBuySell
 from src.classes.maxRiskSizer import MaxRiskSizer
 
-import src.classes.model as model
-import src.classes.geneticRepresentation as geneticRepresentation
-
 # Import strategies execution
 import src.strategies_execution.execution_analysis as execution_analysis
 import src.strategies_execution.execution_plot as execution_plot
-
-# Import strategies
-from src.strategies.buy_and_hold_strategy import BuyAndHoldStrategy
-from src.strategies.classic_strategy import ClassicStrategy
-from src.strategies.neural_network_strategy import NeuralNetworkStrategy
-from src.strategies.combined_signal_strategy import CombinedSignalStrategy
-from src.strategies.one_moving_average_strategy import OneMovingAverageStrategy
-from src.strategies.moving_averages_cross_strategy import MovingAveragesCrossStrategy
-
-import pyswarms as ps
+import src.strategies_execution.execution_vectorized as execution_vectorized
 
 import backtrader as bt
 import backtrader.plot
@@ -46,28 +38,92 @@ pd.options.mode.chained_assignment = None
 np.set_printoptions(threshold=sys.maxsize)
 
 
+# Strategies by command line name. Each entry has the module and class of the
+# strategy and the heavy modules needed by its execution. They are imported
+# only when the strategy is executed.
+STRATEGIES = {
+    'buy-and-hold': ('src.strategies.buy_and_hold_strategy', 'BuyAndHoldStrategy', []),
+    'classic': ('src.strategies.classic_strategy', 'ClassicStrategy', []),
+    'one-ma': ('src.strategies.one_moving_average_strategy', 'OneMovingAverageStrategy', []),
+    'two-ma': ('src.strategies.moving_averages_cross_strategy', 'MovingAveragesCrossStrategy', []),
+    'neural-network': ('src.strategies.neural_network_strategy', 'NeuralNetworkStrategy',
+                       ['src.classes.model', 'sklearn.preprocessing', 'src.utils.indicators']),
+    'combined-signal-pso': ('src.strategies.combined_signal_strategy', 'CombinedSignalStrategy',
+                            ['src.classes.geneticRepresentation', 'src.classes.parallelCostFunction', 'pyswarms'])
+}
+
+# Backtest engines. The vectorized engine simulates with arrays the strategies
+# of execution_vectorized.SIGNALS, with the same results as backtrader
+ENGINES = ('backtrader', 'vectorized')
+
+# Reports of each execution:
+#   none - no reports
+#   metrics - simulation metrics in the results database, see results_store
+#   full - metrics, PDF report and simulation chart
+#   deferred - metrics, and the result is saved in report_store.RUNS_FOLDER
+#              to render the PDF reports later with render_reports.py
+REPORT_LEVELS = ('none', 'metrics', 'full', 'deferred')
+
+# Seed of the optimizations and trainings, it is part of the key of their cached results
+RANDOM_SEED = 1
+
+
+def get_strategy(strategy_name, load_dependencies=False):
+    """
+    Get a strategy class from its command line name, importing its module
+    :param strategy_name: strategy name, one of the keys of STRATEGIES
+    :param load_dependencies: if True then the modules needed by its execution are also imported
+    :return: strategy class
+    """
+    module_name, class_name, dependencies = STRATEGIES[strategy_name]
+
+    if load_dependencies:
+        for dependency in dependencies:
+            importlib.import_module(dependency)
+
+    return getattr(importlib.import_module(module_name), class_name)
+
+
 def print_execution_name(execution_name):
     print("\n --------------- ", execution_name, " --------------- \n")
 
 
-def execute_strategy(strategy, df, commission, info, training_params=None, **kwargs):
+def run_strategy(strategy, df, commission, engine='backtrader', start_date=None, **kwargs):
     """
-    Execute strategy on data history contained in df
+    Execute strategy on data history contained in df, without saving reports
     :param strategy: buying and selling strategy to be used
     :param df: dataframe with historical data
     :param commission: commission to be paid on each operation
-    :returns:
-        - cerebro - execution engine
+    :param engine: backtest engine, one of ENGINES
+    :param start_date: first date of the simulation, the bars of df before it only warm up the indicators (optional)
+    :return: BacktestResult with the capital of each day and the simulation metrics
     """
 
+    if engine not in ENGINES:
+        raise ValueError('Unknown backtest engine: ' + engine)
+
+    warmup = 0 if start_date is None else int(df.index.searchsorted(pd.Timestamp(start_date)))
+
+    if engine == 'vectorized':
+        result = execution_vectorized.run_strategy(strategy, df, commission, warmup=warmup, **kwargs)
+
+        print('\nValor inicial de la cartera: %.2f' % result.metrics['Inicial'])
+        print('Valor final de la cartera  : %.2f' % result.metrics['Final'])
+
+        return result
+
+    # The strategy is subclassed to set its warm-up bars, the class given is never modified
+    if warmup > 0:
+        strategy = type(strategy.__name__, (strategy,), {'warmup': warmup})
+
     # Create cerebro instance
     cerebro = MyCerebro()
 
     # Add strategy to cerebro
     strategy_index = cerebro.addstrategy(strategy, **kwargs)
 
-    # Feed cerebro with historical data
-    data = bt.feeds.PandasData(dataname = df)
+    # Feed cerebro with historical data, converted once for all the strategies executed on it
+    data = feed_cache.get_shared_feed(df).get_data()
     cerebro.adddata(data)
 
     # Add sizer
@@ -129,72 +185,183 @@ def execute_strategy(strategy, df, commission, info, training_params=None, **kwa
         'Profit/Loss': avg_profit_loss
     }
 
-    params = kwargs
+    # Strategies can report their own metrics
+    if hasattr(strats[0], 'get_metrics'):
+        metrics.update(strats[0].get_metrics())
+
+    return strats[0].get_result(metrics, cerebro)
+
+
+def execute_strategy(strategy, df, commission, info, training_params=None, engine='backtrader', report='full', start_date=None, **kwargs):
+    """
+    Execute strategy on data history contained in df and save its reports
+    :param strategy: buying and selling strategy to be used
+    :param df: dataframe with historical data
+    :param commission: commission to be paid on each operation
+    :param info: dict with the market, strategy name and dates of the simulation
+    :param training_params: dict with the training parameters of the strategy (optional)
+    :param engine: backtest engine, one of ENGINES
+    :param report: reports of the execution, one of REPORT_LEVELS
+    :param start_date: first date of the simulation, the bars of df before it only warm up the indicators (optional)
+    :return: BacktestResult with the capital of each day and the simulation metrics
+    """
+    if report not in REPORT_LEVELS:
+        raise ValueError('Unknown report level: ' + report)
+
+    result = run_strategy(strategy, df, commission, engine, start_date, **kwargs)
+
+    report_result(result, info, get_params(strategy, kwargs), training_params, report)
+
+    return result
+
+
+def get_params(strategy, kwargs):
+    """
+    Get the parameters of an execution
+    :param strategy: buying and selling strategy
+    :param kwargs: parameters given to the execution
+    :return: dict with the given parameters, or the default parameters of the strategy if none was given
+    """
+    if len(kwargs) > 0:
+        return kwargs
+
+    return dict(strategy.params._getitems())
+
+
+def report_result(result, info, params, training_params=None, report='full', store=True):
+    """
+    Save the reports of an execution
+    :param result: BacktestResult of the execution
+    :param info: dict with the market, strategy name and dates of the simulation
+    :param params: dict with the strategy parameters
+    :param training_params: dict with the training parameters of the strategy (optional)
+    :param report: reports of the execution, one of REPORT_LEVELS
+    :param store: if False then the metrics are not added to the results database
+    """
+    if report == 'none':
+        return
+
+    if store:
+        execution_analysis.printAnalysis(info, params, result.metrics, training_params)
+
+    if report == 'deferred':
+        report_store.save_run(info, params, result, training_params)
+
+    if report == 'full':
+        # The PDF report includes the backtrader chart of the simulation if it was run with backtrader
+        if result.cerebro != None:
+            execution_analysis.printAnalysisPDF(result.cerebro, info, params, result.metrics, training_params)
+        else:
+            execution_analysis.printResultPDF(result, info, params, training_params)
+
+
+def load_cached_execution(execution, df, info, report='full', **inputs):
+    """
+    Load the result of a previous execution with the same market data until the
+    final date, inputs and code, and save its reports, except the row of the results
+    database. The optimization or the training of the strategy is not repeated
+    :param execution: execution name, the strategy command line name
+    :param df: dataframe with historical data
+    :param info: dict with the market, strategy name and dates of the simulation
+    :param report: reports of the execution, one of REPORT_LEVELS
+    :param inputs: other inputs that change the result of the execution
+    :return:
+        - key - result key to save the result of the execution, None if the cache is not used
+        - result - BacktestResult of the previous execution, None if it is not in the cache
+    """
+    # Traces need the events of the simulation
+    if not result_cache.is_enabled() or trace.get_tracer() is not None:
+        return None, None
+
+    key = result_cache.get_result_key(execution, df[:info['Fecha final']], dict(inputs, info=info))
+    entry = result_cache.load_result(key)
+
+    if entry is None:
+        return key, None
+
+    result = entry['result']
+
+    print('\nResultado cargado de la caché')
+    print('\nValor inicial de la cartera: %.2f' % result.metrics['Inicial'])
+    print('Valor final de la cartera  : %.2f' % result.metrics['Final'])
+
+    # The metrics were added to the results database when the execution was simulated
+    report_result(result, info, entry['params'], entry['training_params'], report, store=False)
+
+    return key, result
+
+
+def save_cached_execution(key, strategy, result, kwargs=None, training_params=None):
+    """
+    Save the result of an execution in the cache
+    :param key: result key returned by load_cached_execution, None if the cache is not used
+    :param strategy: buying and selling strategy
+    :param result: BacktestResult of the execution
+    :param kwargs: parameters given to the execution (optional)
+    :param training_params: dict with the training parameters of the strategy (optional)
+    """
+    if key != None:
+        result_cache.save_result(key, result, get_params(strategy, kwargs or {}), training_params)
+
+
+def set_random_seed(seed=RANDOM_SEED):
+    """
+    Reset the random number generators before an optimization or a training, so
+    its result does not depend on the executions run before in the same process
+    :param seed: seed of numpy and, if it is loaded, tensorflow
+    """
+    np.random.seed(seed)
+
+    if 'tensorflow' in sys.modules:
+        sys.modules['tensorflow'].compat.v1.set_random_seed(seed)
 
-    if len(params) == 0:
-        params = dict(strategy.params._getitems())
 
-    execution_analysis.printAnalysis(info, params, metrics, training_params)
-    execution_analysis.printAnalysisPDF(cerebro, info, params, metrics, training_params)
+def get_train_start(start_date, train_start=None):
+    """
+    Get the start date of the training period of a simulation
+    :param start_date: start date of simulation
+    :param train_start: start date of the training period (optional)
+    :return: train_start, or two years before start_date if it is not given, as datetime
+    """
+    if train_start != None:
+        return datetime.strptime(train_start, '%Y-%m-%d')
+
+    s_test_date = datetime.strptime(start_date, '%Y-%m-%d')
 
-    return cerebro
+    return s_test_date.replace(year = s_test_date.year - 2)
 
 
-def optimize_strategy(df, commission, strategy, to_date, **kwargs):
+def optimize_strategy(df, commission, strategy, to_date, n_workers=None, train_start=None, **kwargs):
     """
-    Get best params for a given strategy
+    Get best params for a given strategy with a grid search over the two years before to_date
     :param df: dataframe with historical data
     :param commision: commission to be paid on each operation
     :param strategy: buying and selling strategy to be used
     :param to_date: simulation final date
+    :param n_workers: number of processes of the grid search, all the cpus by default
+    :param train_start: start date of the grid search period, by default two years before to_date
     :return: params with higher profit
     """
+    import src.strategies_execution.execution_optimization as execution_optimization
 
     s_test_date = datetime.strptime(to_date, '%Y-%m-%d')
-    start_train = s_test_date.replace(year = s_test_date.year - 2)
+    start_train = get_train_start(to_date, train_start)
     end_train = s_test_date - timedelta(days=1)
 
     df_train = df[start_train:end_train]
 
-    # Create cerebro instance
-    cerebro = bt.Cerebro()
-    cerebro.addanalyzer(bt.analyzers.Returns, _name="returnAnalyzer")
-
-    # Add strategy to cerebro
-    train_strategy = strategy
-    train_strategy.printlog = False
-    strats = cerebro.optstrategy(train_strategy, **kwargs)
-
-    # Feed cerebro with historical data
-    data = bt.feeds.PandasData(dataname = df_train)
-    cerebro.adddata(data)
-
-    # Add sizer
-    cerebro.addsizer(MaxRiskSizer, risk=1.0)
-
-    # Set initial cash and commision
-    cerebro.broker.setcash(6000.0)
-    cerebro.broker.setcommission(commission=commission)
-
-    # Execute cerebro
-    stratruns = cerebro.run()
-
-    best_parameters = dict()
-    best_value = 0
+    # Search best parameters, the simulations have the same results as backtrader
+    results = execution_optimization.grid_search(strategy, df_train, commission, n_workers, **kwargs)
 
-    # Search best parameters
-    for stratrun in stratruns:
-        for strat in stratrun:
-            final_value = strat.analyzers[0]._value_end
+    if len(results) == 0:
+        return dict()
 
-            if best_value < final_value:
-                best_value = final_value
-                best_parameters = strat.p._getkwargs()
+    best_value, best_parameters = results[0]
 
     return best_parameters
 
 
-def execute_buy_and_hold_strategy(df, commission, data_name, start_date, end_date):
+def execute_buy_and_hold_strategy(df, commission, data_name, start_date, end_date, engine='backtrader', report='full', warmup_start=None):
     """
     Execute buy and hold strategy on data history contained in df
     :param df: dataframe with historical data
@@ -202,8 +369,11 @@ def execute_buy_and_hold_strategy(df, commission, data_name, start_date, end_dat
     :param data_name: quote data name
     :param start_date: start date of simulation
     :param end_date: end date of simulation
+    :param engine: backtest engine, one of ENGINES
+    :param report: reports of the execution, one of REPORT_LEVELS
+    :param warmup_start: start date of the bars before start_date used only to compute the indicators (optional)
     :return:
-        - BH_Cerebro - execution engine
+        - BH_Result - BacktestResult with the capital of each day and the simulation metrics
         - BH_Strategy - buy and hold strategy instance
     """
 
@@ -218,18 +388,28 @@ def execute_buy_and_hold_strategy(df, commission, data_name, start_date, end_dat
         'Fecha final': end_date
     }
 
-    df = df[start_date:end_date]
+    BH_Strategy = get_strategy('buy-and-hold')
 
-    BH_Strategy =  BuyAndHoldStrategy
-    BH_Cerebro = execute_strategy(BH_Strategy, df, commission, info)
+    cache_key, BH_Result = load_cached_execution('buy-and-hold', df, info, report, commission=commission, engine=engine,
+                                                 warmup_start=warmup_start)
+
+    if BH_Result != None:
+        return BH_Result, BH_Strategy
+
+    # The bars before start_date only warm up the indicators
+    df = df[warmup_start or start_date:end_date]
+
+    BH_Result = execute_strategy(BH_Strategy, df, commission, info, engine=engine, report=report, start_date=start_date)
+    save_cached_execution(cache_key, BH_Strategy, BH_Result)
 
     # Save simulation chart
-    execution_plot.plot_simulation(BH_Cerebro, strategy_name, data_name, start_date, end_date)
+    if report == 'full' and BH_Result.cerebro != None:
+        execution_plot.plot_simulation(BH_Result.cerebro, strategy_name, data_name, start_date, end_date)
 
-    return BH_Cerebro, BH_Strategy
+    return BH_Result, BH_Strategy
 
 
-def execute_classic_strategy(df, commission, data_name, start_date, end_date):
+def execute_classic_strategy(df, commission, data_name, start_date, end_date, engine='backtrader', report='full', warmup_start=None):
     """
     Execute classic strategy on data history contained in df
     :param df: dataframe with historical data
@@ -237,8 +417,11 @@ def execute_classic_strategy(df, commission, data_name, start_date, end_date):
     :param data_name: quote data name
     :param start_date: start date of simulation
     :param end_date: end date of simulation
+    :param engine: backtest engine, one of ENGINES
+    :param report: reports of the execution, one of REPORT_LEVELS
+    :param warmup_start: start date of the bars before start_date used only to compute the indicators (optional)
     :return:
-        - Classic_Cerebro - execution engine
+        - Classic_Result - BacktestResult with the capital of each day and the simulation metrics
         - Classic_Strategy - classic strategy instance
     """
 
@@ -253,18 +436,28 @@ def execute_classic_strategy(df, commission, data_name, start_date, end_date):
         'Fecha final': end_date
     }
 
-    df = df[start_date:end_date]
+    Classic_Strategy = get_strategy('classic')
+
+    cache_key, Classic_Result = load_cached_execution('classic', df, info, report, commission=commission, engine=engine,
+                                                      warmup_start=warmup_start)
+
+    if Classic_Result != None:
+        return Classic_Result, Classic_Strategy
 
-    Classic_Strategy =  ClassicStrategy
-    Classic_Cerebro = execute_strategy(Classic_Strategy, df, commission, info)
+    # The bars before start_date only warm up the indicators
+    df = df[warmup_start or start_date:end_date]
+
+    Classic_Result = execute_strategy(Classic_Strategy, df, commission, info, engine=engine, report=report, start_date=start_date)
+    save_cached_execution(cache_key, Classic_Strategy, Classic_Result)
 
     # Save simulation chart
-    execution_plot.plot_simulation(Classic_Cerebro, strategy_name, data_name, start_date, end_date)
+    if report == 'full' and Classic_Result.cerebro != None:
+        execution_plot.plot_simulation(Classic_Result.cerebro, strategy_name, data_name, start_date, end_date)
 
-    return Classic_Cerebro, Classic_Strategy
+    return Classic_Result, Classic_Strategy
 
 
-def execute_one_moving_average_strategy(df, commission, data_name, start_date, end_date):
+def execute_one_moving_average_strategy(df, commission, data_name, start_date, end_date, engine='backtrader', report='full', train_start=None, warmup_start=None):
     """
     Execute one moving average strategy on data history contained in df
     :param df: dataframe with historical data
@@ -272,8 +465,12 @@ def execute_one_moving_average_strategy(df, commission, data_name, start_date, e
     :param data_name: quote data name
     :param start_date: start date of simulation
     :param end_date: end date of simulation
+    :param engine: backtest engine, one of ENGINES
+    :param report: reports of the execution, one of REPORT_LEVELS
+    :param train_start: start date of the training period, by default two years before start_date
+    :param warmup_start: start date of the bars before start_date used only to compute the indicators (optional)
     :return:
-        - OMA_Cerebro - execution engine
+        - OMA_Result - BacktestResult with the capital of each day and the simulation metrics
         - OMA_Strategy - one moving average strategy instance
     """
 
@@ -288,23 +485,34 @@ def execute_one_moving_average_strategy(df, commission, data_name, start_date, e
         'Fecha final': end_date
     }
 
+    OMA_Strategy = get_strategy('one-ma')
+
     params = {'maperiod': range(5, 50)}
 
+    cache_key, OMA_Result = load_cached_execution('one-ma', df, info, report, commission=commission, engine=engine,
+                                                  params=params, train_start=train_start, warmup_start=warmup_start)
+
+    if OMA_Result != None:
+        return OMA_Result, OMA_Strategy
+
     # Get best params in past period
-    best_parameters = optimize_strategy(df, commission, OneMovingAverageStrategy, start_date, **params)
+    best_parameters = optimize_strategy(df, commission, OMA_Strategy, start_date, train_start=train_start, **params)
 
-    df = df[start_date:end_date]
+    # The bars before start_date only warm up the indicators
+    df = df[warmup_start or start_date:end_date]
 
-    OMA_Strategy =  OneMovingAverageStrategy
-    OMA_Cerebro = execute_strategy(OMA_Strategy, df, commission, info, **best_parameters)
+    OMA_Result = execute_strategy(OMA_Strategy, df, commission, info, engine=engine, report=report, start_date=start_date,
+                                  **best_parameters)
+    save_cached_execution(cache_key, OMA_Strategy, OMA_Result, best_parameters)
 
     # Save simulation chart
-    execution_plot.plot_simulation(OMA_Cerebro, strategy_name, data_name, start_date, end_date)
+    if report == 'full' and OMA_Result.cerebro != None:
+        execution_plot.plot_simulation(OMA_Result.cerebro, strategy_name, data_name, start_date, end_date)
 
-    return OMA_Cerebro, OMA_Strategy
+    return OMA_Result, OMA_Strategy
 
 
-def execute_moving_averages_cross_strategy(df, commission, data_name, start_date, end_date, optimize=False, **kwargs):
+def execute_moving_averages_cross_strategy(df, commission, data_name, start_date, end_date, optimize=False, engine='backtrader', report='full', train_start=None, warmup_start=None, **kwargs):
     """
     Execute moving averages cross strategy on data history contained in df
     :param df: dataframe with historical data
@@ -312,9 +520,13 @@ def execute_moving_averages_cross_strategy(df, commission, data_name, start_date
     :param data_name: quote data name
     :param start_date: start date of simulation
     :param end_date: end date of simulation
+    :param engine: backtest engine, one of ENGINES
     :param optimize: if True then optimize strategy
+    :param report: reports of the execution, one of REPORT_LEVELS
+    :param train_start: start date of the optimization period, by default two years before start_date
+    :param warmup_start: start date of the bars before start_date used only to compute the indicators (optional)
     :return:
-        - MAC_Cerebro - execution engine
+        - MAC_Result - BacktestResult with the capital of each day and the simulation metrics
         - MAC_Strategy - moving averages cross strategy instance
     """
 
@@ -329,6 +541,15 @@ def execute_moving_averages_cross_strategy(df, commission, data_name, start_date
         'Fecha final': end_date
     }
 
+    MAC_Strategy = get_strategy('two-ma')
+
+    cache_key, MAC_Result = load_cached_execution('two-ma', df, info, report, commission=commission, engine=engine,
+                                                  optimize=optimize, params=kwargs, train_start=train_start,
+                                                  warmup_start=warmup_start)
+
+    if MAC_Result != None:
+        return MAC_Result, MAC_Strategy
+
     if optimize:
         print('Optimizando (esto puede tardar)...')
 
@@ -339,20 +560,23 @@ def execute_moving_averages_cross_strategy(df, commission, data_name, start_date
         }
 
         # Get best params in past period
-        kwargs = optimize_strategy(df, commission, MovingAveragesCrossStrategy, start_date, **params)
+        kwargs = optimize_strategy(df, commission, MAC_Strategy, start_date, train_start=train_start, **params)
 
-    df = df[start_date:end_date]
+    # The bars before start_date only warm up the indicators
+    df = df[warmup_start or start_date:end_date]
 
-    MAC_Strategy =  MovingAveragesCrossStrategy
-    MAC_Cerebro = execute_strategy(MAC_Strategy, df, commission, info, **kwargs)
+    MAC_Result = execute_strategy(MAC_Strategy, df, commission, info, engine=engine, report=report, start_date=start_date,
+                                  **kwargs)
+    save_cached_execution(cache_key, MAC_Strategy, MAC_Result, kwargs)
 
     # Save simulation chart
-    execution_plot.plot_simulation(MAC_Cerebro, strategy_name, data_name, start_date, end_date)
+    if report == 'full' and MAC_Result.cerebro != None:
+        execution_plot.plot_simulation(MAC_Result.cerebro, strategy_name, data_name, start_date, end_date)
 
-    return MAC_Cerebro, MAC_Strategy
+    return MAC_Result, MAC_Strategy
 
 
-def execute_neural_network_strategy(df, options, commission, data_name, start_date, end_date):
+def execute_neural_network_strategy(df, options, commission, data_name, start_date, end_date, report='full', train_start=None):
     """
     Execute neural network strategy on data history contained in df
     :param df: dataframe with historical data
@@ -361,13 +585,21 @@ def execute_neural_network_strategy(df, options, commission, data_name, start_da
         - loss - loss threshold simulation of labelling
         - n_day - number of days in simulation of labelling
         - epochs - number of epochs to train the neural network
+        - retrain - retraining policy during the simulation (optional, every bar by default)
+        - memory - number of samples in the retraining memory (optional, 15 by default)
+        - memory_sampling - samples used to retrain: all, uniform or recency (optional, all by default)
+        - ensemble - number of networks trained with different seeds (optional, 1 by default)
+        - ensemble_workers - number of processes to train the networks (optional)
+        - inference - engine of the predictions: keras, or numpy for the NumPy forward pass (optional, keras by default)
     :param commission: commission to be paid on each operation
     :param data_name: quote data name
     :param start_date: start date of simulation
     :param end_date: end date of simulation
+    :param report: reports of the execution, one of REPORT_LEVELS
+    :param train_start: start date of the training period, by default two years before start_date
     :return:
-        - NN_Cerebro - execution engine
-        - NN_Strategy - neural network strategy instance
+        - NN_Result - BacktestResult with the capital of each day and the simulation metrics
+        - NN_Strategy - neural network strategy instance, without its trained network if the result was cached
     """
 
     print_execution_name("Estrategia: red neuronal")
@@ -381,38 +613,101 @@ def execute_neural_network_strategy(df, options, commission, data_name, start_da
         'Fecha final': end_date
     }
 
+    cache_key, NN_Result = load_cached_execution('neural-network', df, info, report, commission=commission, options=options,
+                                                 train_start=train_start, seed=RANDOM_SEED)
+
+    if NN_Result != None:
+        return NN_Result, get_strategy('neural-network')
+
+    # Preprocess dataset
+    df = func_utils.add_features(df, data_name)
+    df = func_utils.add_label(df, gain = options['gain'], loss = options['loss'], n_day = options['n_day'], commission = commission)
+
+    NN_Strategy, df_test = train_neural_network_strategy(df, options, start_date, end_date, train_start)
+
+    # Execute strategy
+    NN_Result = execute_strategy(NN_Strategy, df_test, commission, info, options, report=report)
+    save_cached_execution(cache_key, NN_Strategy, NN_Result, training_params=options)
+
+    # Save simulation chart
+    if report == 'full' and NN_Result.cerebro != None:
+        execution_plot.plot_simulation(NN_Result.cerebro, 'red_neuronal', data_name, start_date, end_date)
+
+    return NN_Result, NN_Strategy
+
+
+def train_neural_network_strategy(df, options, start_date, end_date, train_start=None):
+    """
+    Train the neural network of the strategy with the two years before start_date
+    and assign it to the NeuralNetworkStrategy class
+    :param df: dataframe with market data, features and a 'label' column
+    :param options: dict with the parameters of execute_neural_network_strategy
+    :param start_date: start date of simulation
+    :param end_date: end date of simulation
+    :param train_start: start date of the training period, by default two years before start_date
+    :return:
+        - NN_Strategy - neural network strategy class with its parameters assigned
+        - df_test - dataframe with the simulation period
+    """
+    from sklearn.preprocessing import StandardScaler
+    import src.classes.model as model
+    import src.utils.model_cache as model_cache
+    from src.classes.neuralNetworkEnsemble import NeuralNetworkEnsemble
+
     # Get parameters
-    gain = options['gain']
-    loss = options['loss']
     n_day = options['n_day']
     epochs = options['epochs']
 
     s_test_date = datetime.strptime(start_date, '%Y-%m-%d')
-    s_train = s_test_date.replace(year = s_test_date.year - 2)
+    s_train = get_train_start(start_date, train_start)
     e_train = s_test_date - timedelta(days=1)
 
-    # Preprocess dataset
-    df = func_utils.add_features(df)
-    df = func_utils.add_label(df, gain = gain, loss = loss, n_day = n_day, commission = commission)
-
     # Split train and test
     df_train, df_test, X_train, X_test, y_train, y_test = func_utils.split_df_date(df, s_train, e_train, start_date, end_date)
 
+    set_random_seed()
+
+    neural_network = model.NeuralNetwork()
+    neural_network.build_model(input_shape = (X_train.shape[1], 1))
+
+    # The trained model is loaded from the cache if the training data and hyperparameters are the same
+    n_models = options.get('ensemble', 1)
+    model_params = {'epochs': epochs, 'lr': neural_network.lr, 'architecture': neural_network.model.to_json()}
+    model_key = model_cache.get_model_key(X_train, y_train, model_params)
+    ensemble_keys = [model_cache.get_model_key(X_train, y_train, dict(model_params, seed=seed)) for seed in range(1, n_models+1)]
+
+    sc = None
+
+    if n_models == 1:
+        sc = model_cache.load_model(model_key, neural_network)
+
+    is_cached = sc is not None
+
     # Normalization
     print("Normalizando datos...")
-    sc = StandardScaler()
-    X_train = sc.fit_transform(X_train)
-    X_test = sc.fit_transform (X_test)
+    if not is_cached:
+        sc = StandardScaler().fit(X_train)
+
+    X_train = sc.transform(X_train)
+    X_test = StandardScaler().fit_transform(X_test)
 
     # Transform data in a correct format to use in Keras
     X_train = np.reshape(X_train, (X_train.shape[0], X_train.shape[1], 1))
     X_test = np.reshape(X_test, (X_test.shape[0], X_test.shape[1], 1))
 
     # Get prediction model
-    print("Entrenando red neuronal...")
-    neural_network = model.NeuralNetwork()
-    neural_network.build_model(input_shape = (X_train.shape[1], 1))
-    neural_network.train(X_train, y_train, epochs = epochs)
+    if n_models > 1:
+        print("Entrenando " + str(n_models) + " redes neuronales...")
+        neural_network = NeuralNetworkEnsemble.train(ensemble_keys, X_train, y_train, sc, model_params,
+                                                     options.get('ensemble_workers', None))
+    elif is_cached:
+        print("Red neuronal cargada de la caché")
+    else:
+        print("Entrenando red neuronal...")
+        neural_network.train(X_train, y_train, epochs = epochs)
+        model_cache.save_model(model_key, neural_network, sc, model_params)
+
+    neural_network.set_inference(options.get('inference', 'keras'))
 
     # Get accuraccy
     train_accuracy = neural_network.get_accuracy(X_train, y_train)
@@ -425,25 +720,26 @@ def execute_neural_network_strategy(df, options, commission, data_name, start_da
     # ------------------------ Backtesting ------------------------ #
 
     # Initialize neural network memory
-    neural_network.init_memory(X_train[len(X_train)-15:len(X_train)], y_train[len(y_train)-15:len(y_train)])
+    memory_size = options.get('memory', 15)
+    neural_network.memory_capacity = memory_size
+    neural_network.memory_sampling = options.get('memory_sampling', 'all')
+
+    # The memory starts with the last training samples, all of them if there are less than its size
+    memory_start = max(0, len(X_train)-memory_size)
+    neural_network.init_memory(X_train[memory_start:len(X_train)], y_train[memory_start:len(y_train)])
 
     # Create an instance from NeuralNetworkStrategy class and assign parameters
-    NN_Strategy = NeuralNetworkStrategy
+    NN_Strategy = get_strategy('neural-network')
     NN_Strategy.X_test = X_test
     NN_Strategy.y_test = y_test
     NN_Strategy.model = neural_network
     NN_Strategy.n_day = n_day
+    NN_Strategy.retrain_policy = options.get('retrain', 'every-bar')
 
-    # Execute strategy
-    NN_Cerebro = execute_strategy(NN_Strategy, df_test, commission, info, options)
-
-    # Save simulation chart
-    execution_plot.plot_simulation(NN_Cerebro, 'red_neuronal', data_name, start_date, end_date)
-
-    return NN_Cerebro, NN_Strategy
+    return NN_Strategy, df_test
 
 
-def execute_pso_strategy(df, options, commission, data_name, s_test, e_test, iters=100, normalization='exponential'):
+def execute_pso_strategy(df, options, commission, data_name, s_test, e_test, iters=100, normalization='exponential', incremental=False, n_workers=None, report='full', train_start=None):
     """
     Execute particle swarm optimization strategy on data history contained in df
     :param df: dataframe with historical data
@@ -455,17 +751,45 @@ def execute_pso_strategy(df, options, commission, data_name, s_test, e_test, ite
     :param data_name: quote data name
     :param start_date: start date of simulation
     :param end_date: end date of simulation
+    :param iters: number of iterations of the optimization
+    :param normalization: weights normalization, 'exponential' or 'l1'
+    :param incremental: if True then the periodic re-optimizations are warm-started from the previous swarm
+    :param n_workers: number of processes to evaluate the swarm, if None the evaluation is sequential
+    :param report: reports of the execution, one of REPORT_LEVELS
+    :param train_start: start date of the optimization period, by default two years before s_test
     :return:
-        - PSO_Cerebro - execution engine
-        - PSO_Strategy - pso strategy instance
+        - PSO_Result - BacktestResult with the capital of each day and the simulation metrics
+        - PSO_Strategy - pso strategy instance, without its optimized weights if the result was cached
     """
 
     print_execution_name("Estrategia: particle swar optimization")
 
+    import pyswarms as ps
+    import src.classes.geneticRepresentation as geneticRepresentation
+    from src.classes.parallelCostFunction import ParallelCostFunction
+
+    strategy_name = 'particle_swarm_optimization'
+
+    info = {
+        'Mercado': data_name,
+        'Estrategia': strategy_name,
+        'Fecha inicial': s_test,
+        'Fecha final': e_test
+    }
+
+    training_params = dict(options)
+    training_params.update({'iters': iters, 'normalization': normalization, 'incremental': incremental})
+
+    cache_key, PSO_Result = load_cached_execution('combined-signal-pso', df, info, report, commission=commission,
+                                                  training_params=training_params, train_start=train_start, seed=RANDOM_SEED)
+
+    if PSO_Result != None:
+        return PSO_Result, get_strategy('combined-signal-pso')
+
     # ------------ Obtenemos los conjuntos de train y test ------------ #
 
     s_test_date = datetime.strptime(s_test, '%Y-%m-%d')
-    s_train = s_test_date.replace(year = s_test_date.year - 2)
+    s_train = get_train_start(s_test, train_start)
     #s_train = s_test_date - timedelta(days=180)
     e_train = s_test_date - timedelta(days=1)
 
@@ -487,38 +811,113 @@ def execute_pso_strategy(df, options, commission, data_name, s_test, e_test, ite
     min_bound = np.append(min_bound, [0.0, -1.0])
     bounds = (min_bound, max_bound)
 
-    # Call instance of PSO
+    # Call instance of PSO, the initial swarm and the re-optimizations depend on the seed
+    set_random_seed()
     optimizer = ps.single.GlobalBestPSO(n_particles=n_particles, dimensions=dimensions, options=options, bounds=bounds)
 
-    # Perform optimization
-    kwargs={'from_date': s_train, 'to_date': e_train}
-    best_cost, best_pos = optimizer.optimize(gen_representation.cost_function, iters=iters, **kwargs)
+    # Cost function, the swarm is split across a pool of processes if requested.
+    # Pool workers (e.g. batch jobs) are daemonic and cannot start their own pool
+    cost_function = gen_representation.cost_function
+
+    if n_workers != None and n_workers > 1 and not mp.current_process().daemon:
+        cost_function = ParallelCostFunction(gen_representation, n_workers)
+
+    try:
+        # Perform optimization
+        kwargs={'from_date': s_train, 'to_date': e_train, 'normalization': normalization}
+        best_cost, best_pos = optimizer.optimize(cost_function, iters=iters, **kwargs)
+
+        # Create an instance from CombinedSignalStrategy class and assign parameters
+        PSO_Strategy = get_strategy('combined-signal-pso')
+        w, buy_threshold, sell_threshold = func_utils.get_split_w_threshold(best_pos, normalization)
+
+        PSO_Strategy.w = w
+        PSO_Strategy.buy_threshold = buy_threshold
+        PSO_Strategy.sell_threshold = sell_threshold
+        PSO_Strategy.period_list = gen_representation.period_list
+        PSO_Strategy.moving_average_rules = gen_representation.moving_average_rules
+        PSO_Strategy.moving_averages = gen_representation.moving_averages_test
+        PSO_Strategy.optimizer = optimizer
+        PSO_Strategy.gen_representation = gen_representation
+        PSO_Strategy.cost_function = cost_function
+        PSO_Strategy.normalization = normalization
+        PSO_Strategy.incremental = incremental
+
+        df_test = gen_representation.df_test
+
+        PSO_Result = execute_strategy(PSO_Strategy, df_test, commission, info, training_params, report=report)
+        save_cached_execution(cache_key, PSO_Strategy, PSO_Result, training_params=training_params)
+    finally:
+        # The pool is also used by the re-optimizations of the simulation
+        if isinstance(cost_function, ParallelCostFunction):
+            cost_function.close()
+
+            # The strategy class outlives this execution, it must not keep the closed pool
+            strategy_class = get_strategy('combined-signal-pso')
+
+            if strategy_class.cost_function is cost_function:
+                strategy_class.cost_function = None
 
-    # Create an instance from CombinedSignalStrategy class and assign parameters
-    PSO_Strategy = CombinedSignalStrategy
-    w, buy_threshold, sell_threshold = func_utils.get_split_w_threshold(best_pos)
+    # Guardamos la grafica de la simulacion
+    if report == 'full' and PSO_Result.cerebro != None:
+        execution_plot.plot_simulation(PSO_Result.cerebro, strategy_name, data_name, s_test, e_test)
 
-    PSO_Strategy.w = w
-    PSO_Strategy.buy_threshold = buy_threshold
-    PSO_Strategy.sell_threshold = sell_threshold
-    PSO_Strategy.period_list = gen_representation.period_list
-    PSO_Strategy.moving_average_rules = gen_representation.moving_average_rules
-    PSO_Strategy.moving_averages = gen_representation.moving_averages_test
-    PSO_Strategy.optimizer = optimizer
-    PSO_Strategy.gen_representation = gen_representation
-    PSO_Strategy.normalization = normalization
+    return PSO_Result, PSO_Strategy
 
-    df_test = gen_representation.df_test
-    df_train = gen_representation.df_train
 
-    PSO_Cerebro, initial_value, final_value, ta, dd, ma = execute_strategy(PSO_Strategy, df_test, commission)
+def execute_walk_forward_strategy(df, strategy_name, commission, data_name, start_date, end_date, window=24, step=6, horizon=6, n_workers=None, engine='backtrader', report='full', options=None, **kwargs):
+    """
+    Execute a strategy with a walk-forward evaluation: rolling folds, each one trained
+    with its own window and simulated in the following period, executed in parallel
+    :param df: dataframe with historical data
+    :param strategy_name: strategy command line name, one of the keys of STRATEGIES
+    :param commission: commission to be paid on each operation
+    :param data_name: quote data name
+    :param start_date: start date of the first test period
+    :param end_date: end date of the last test period
+    :param window: months of the training period of each fold
+    :param step: months between the start of two consecutive test periods
+    :param horizon: months of each test period
+    :param n_workers: number of processes that execute the folds, all the cpus by default
+    :param engine: backtest engine of the moving averages strategies, one of ENGINES
+    :param report: reports of the execution, one of REPORT_LEVELS
+    :param options: dict with the options of the neural network or pso strategies
+    :param kwargs: other arguments of the execute function of the strategy
+    :return:
+        - WF_Result - BacktestResult with the stitched capital of the test periods and the combined metrics
+        - WF_Strategy - strategy class
+    """
+    import src.strategies_execution.execution_walk_forward as execution_walk_forward
 
-    # Guardamos los resultados
-    strategy_name = 'particle_swarm_optimization'
-    execution_analysis.printAnalysis(strategy_name, data_name, initial_value, final_value, ta, dd, ma)
-    execution_analysis.printAnalysisPDF(PSO_Cerebro, strategy_name, data_name, initial_value, final_value, ta, dd, ma, s_test, e_test)
+    print_execution_name("Walk-forward: " + strategy_name)
 
-    # Guardamos la grafica de la simulacion
-    execution_plot.plot_simulation(PSO_Cerebro, 'particle_swarm_optimization', data_name, s_test, e_test)
+    print('Folds de ' + str(horizon) + ' meses cada ' + str(step) + ' meses, entrenados con los ' + str(window) + ' meses anteriores')
+
+    info = {
+        'Mercado': data_name,
+        'Estrategia': 'walk_forward_' + strategy_name.replace('-', '_'),
+        'Fecha inicial': start_date,
+        'Fecha final': end_date
+    }
+
+    WF_Result, fold_list = execution_walk_forward.walk_forward(df, strategy_name, commission, data_name, start_date,
+                                                               end_date, window, step, horizon, n_workers, engine,
+                                                               options, **kwargs)
+
+    fold_table = pd.DataFrame(fold_list)
+
+    print('\n' + fold_table.to_string(index=False))
+    print('\nValor inicial de la cartera: %.2f' % WF_Result.metrics['Inicial'])
+    print('Valor final de la cartera  : %.2f' % WF_Result.metrics['Final'])
+    print('Tiempo total: %.2fs (folds: %.2fs)' % (WF_Result.metrics['Tiempo total(s)'], WF_Result.metrics['Tiempo folds(s)']))
+
+    params = dict(kwargs, window=window, step=step, horizon=horizon)
+
+    report_result(WF_Result, info, params, options, report)
+
+    # Dates, metrics and time of each fold
+    if report != 'none':
+        execution_analysis.create_folder_if_not_exists('./resultados/walk_forward')
+        fold_table.to_csv('./resultados/walk_forward/' + report_store.get_run_name(info, params, options) + '.csv', index=False)
 
-    return PSO_Cerebro, PSO_Strategy
+    return WF_Result, get_strategy(strategy_name)
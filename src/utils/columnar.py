@@ -0,0 +1,127 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+
+# Files of a frame saved in a folder
+INDEX_FILE = 'index.npy'
+VALUES_FILE = 'values.npy'
+INFO_FILE = 'frame.json'
+
+
+def _save_array(folder, file_name, array):
+    """
+    Save an array in npy format, replacing atomically the existing file
+    :param folder: destination folder
+    :param file_name: file name
+    :param array: array to save
+    """
+    path = os.path.join(folder, file_name)
+    tmp_path = path + '.tmp' + str(os.getpid())
+
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array, allow_pickle=False)
+
+    os.replace(tmp_path, path)
+
+
+def write_frame(df, folder, meta=None):
+    """
+    Save a dataframe with a datetime index in a binary columnar format:
+    an int64 index, a column-major float64 matrix with all float columns
+    and one file for each other column
+    :param df: dataframe to save
+    :param folder: destination folder
+    :param meta: dict with extra information saved with the frame
+    """
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+
+    float_columns = [col for col in df.columns if df[col].dtype == np.float64]
+    other_columns = [col for col in df.columns if col not in float_columns]
+
+    index = np.asarray(df.index.values, dtype='datetime64[ns]').view(np.int64)
+    values = np.asfortranarray(df[float_columns].values, dtype=np.float64)
+
+    _save_array(folder, INDEX_FILE, index)
+    _save_array(folder, VALUES_FILE, values)
+
+    for i, col in enumerate(other_columns):
+        _save_array(folder, 'column_' + str(i) + '.npy', np.asarray(df[col].values))
+
+    info = {
+        'columns': [str(col) for col in df.columns],
+        'float_columns': [str(col) for col in float_columns],
+        'other_columns': [str(col) for col in other_columns],
+        'index_name': df.index.name,
+        'n_rows': len(df.index),
+        'meta': meta
+    }
+
+    # The info file is written last, a frame is complete once it exists
+    path = os.path.join(folder, INFO_FILE)
+    tmp_path = path + '.tmp' + str(os.getpid())
+
+    with open(tmp_path, 'w') as f:
+        json.dump(info, f)
+
+    os.replace(tmp_path, path)
+
+
+def read_meta(folder):
+    """
+    Read the extra information saved with a frame
+    :param folder: frame folder
+    :return: meta dict, or None if there is no complete frame in the folder
+    """
+    path = os.path.join(folder, INFO_FILE)
+
+    if not os.path.exists(path):
+        return None
+
+    with open(path) as f:
+        return json.load(f)['meta']
+
+
+def read_frame(folder, mmap=True):
+    """
+    Load a dataframe saved with write_frame. Files are memory-mapped and the
+    float columns are used without copy or parsing.
+    :param folder: frame folder
+    :param mmap: if True then the files are memory-mapped
+    :return:
+        - df - loaded dataframe, None if there is no complete frame in the folder
+        - meta - extra information saved with the frame
+    """
+    path = os.path.join(folder, INFO_FILE)
+
+    if not os.path.exists(path):
+        return None, None
+
+    with open(path) as f:
+        info = json.load(f)
+
+    mmap_mode = 'r' if mmap else None
+
+    try:
+        index = np.load(os.path.join(folder, INDEX_FILE), mmap_mode=mmap_mode)
+        values = np.load(os.path.join(folder, VALUES_FILE), mmap_mode=mmap_mode)
+        other_values = [np.load(os.path.join(folder, 'column_' + str(i) + '.npy'), mmap_mode=mmap_mode)
+                        for i in range(len(info['other_columns']))]
+    except (IOError, ValueError):
+        return None, None
+
+    # Files being replaced by another process
+    n_rows = info['n_rows']
+    if len(index) != n_rows or values.shape[0] != n_rows or any(len(v) != n_rows for v in other_values):
+        return None, None
+
+    index = pd.DatetimeIndex(np.asarray(index).view('datetime64[ns]'), name=info['index_name'])
+
+    df = pd.DataFrame(values, index=index, columns=info['float_columns'], copy=False)
+
+    for col, col_values in zip(info['other_columns'], other_values):
+        df.insert(info['columns'].index(col), col, col_values)
+
+    return df, info['meta']
@@ -0,0 +1,55 @@
+import os
+import pandas as pd
+
+import src.utils.columnar as columnar
+
+
+# Folder where the binary copies of the csv files are saved
+CACHE_FOLDER = '../data/cache'
+
+
+def get_source_signature(path_csv):
+    """
+    Get the information used to detect changes in a csv file
+    :param path_csv: csv file path
+    :return: dict with the absolute path, size and modification time of the file
+    """
+    stat = os.stat(path_csv)
+
+    return {
+        'source': os.path.abspath(path_csv),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns
+    }
+
+
+def read_csv_cached(path_csv, cache_folder=CACHE_FOLDER):
+    """
+    Read a market data csv file through a binary cache.
+
+    The first time the csv is parsed and saved in a binary columnar format.
+    Next reads memory-map the binary files and rebuild the dataframe without
+    parsing. The cache is discarded when the size or modification time of the
+    csv file change.
+
+    :param path_csv: csv file path with a Date column
+    :param cache_folder: folder where the binary copies are saved
+    :return: dataframe with market data
+    """
+    folder = os.path.join(cache_folder, os.path.splitext(os.path.basename(path_csv))[0])
+    signature = get_source_signature(path_csv)
+
+    df, meta = columnar.read_frame(folder)
+
+    if df is not None and meta == signature:
+        return df
+
+    df = pd.read_csv(path_csv, index_col = "Date", parse_dates = True)
+
+    try:
+        columnar.write_frame(df, folder, signature)
+    except (IOError, OSError, ValueError):
+        # Data that can not be cached (e.g. text columns) or read-only folder
+        pass
+
+    return df
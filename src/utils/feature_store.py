@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+
+import src.utils.columnar as columnar
+
+
+# Folder where the features of each quote are stored
+FEATURES_FOLDER = '../data/features'
+
+# Number of previous days used to compute the features of new appended days
+TAIL_WARMUP = 500
+
+# Market data columns used to compute the features
+INPUT_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def get_spec_hash(spec):
+    """
+    Get a hash that identifies a features specification
+    :param spec: list with the indicators and their parameters
+    :return: hexadecimal hash
+    """
+    return hashlib.sha1(json.dumps(spec).encode('utf-8')).hexdigest()[:16]
+
+
+def get_data_hash(df, n_rows=None):
+    """
+    Get a hash of the market data content
+    :param df: dataframe with market data
+    :param n_rows: if given, only the first n_rows days are considered
+    :return: hexadecimal hash
+    """
+    if n_rows != None:
+        df = df.iloc[:n_rows]
+
+    data_hash = hashlib.sha1()
+    data_hash.update(np.asarray(df.index.values, dtype='datetime64[ns]').view(np.int64).tobytes())
+
+    for col in INPUT_COLUMNS:
+        if col in df.columns:
+            data_hash.update(col.encode('utf-8'))
+            data_hash.update(np.ascontiguousarray(df[col].values, dtype=np.float64).tobytes())
+
+    return data_hash.hexdigest()
+
+
+def load_features(data_name, df, spec, compute_features, folder=FEATURES_FOLDER, warmup=TAIL_WARMUP):
+    """
+    Get the features of df from the store, computing and saving them if needed.
+
+    Features are stored for each quote and specification. If df extends the
+    stored market data with new days, only the features of the new days are
+    computed, using the previous warmup days. Indicators with infinite memory
+    (EMA, RSI, MACD) may differ in the last decimals from a full computation.
+
+    :param data_name: quote data name
+    :param df: dataframe with market data
+    :param spec: list with the indicators and their parameters
+    :param compute_features: function(df, spec) that returns a dataframe with the features
+    :param folder: root folder of the store
+    :param warmup: number of previous days used to compute the features of new days
+    :return: dataframe with the features, aligned with df
+    """
+    store_folder = os.path.join(folder, data_name, get_spec_hash(spec))
+
+    features, meta = columnar.read_frame(store_folder)
+
+    if features is not None and meta['spec'] == spec:
+        n_rows = meta['n_rows']
+
+        if n_rows <= len(df.index) and meta['data_hash'] == get_data_hash(df, n_rows):
+
+            if n_rows == len(df.index):
+                print('Características cargadas de ' + store_folder)
+                return features
+
+            # Compute only the features of the new days
+            start = max(0, n_rows - warmup)
+            tail_features = compute_features(df.iloc[start:], spec).iloc[n_rows-start:]
+
+            features = pd.concat([features, tail_features])
+            save_features(store_folder, features, df, spec)
+
+            print('Características actualizadas en ' + store_folder)
+            return features
+
+    features = compute_features(df, spec)
+    save_features(store_folder, features, df, spec)
+
+    return features
+
+
+def save_features(store_folder, features, df, spec):
+    """
+    Save features in the store
+    :param store_folder: folder of the quote and specification
+    :param features: dataframe with the features
+    :param df: dataframe with the market data used to compute the features
+    :param spec: list with the indicators and their parameters
+    """
+    meta = {
+        'spec': spec,
+        'n_rows': len(df.index),
+        'data_hash': get_data_hash(df)
+    }
+
+    columnar.write_frame(features, store_folder, meta)
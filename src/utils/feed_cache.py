@@ -0,0 +1,39 @@
+import collections
+
+import src.utils.feature_store as feature_store
+from src.classes.sharedFeed import SharedFeed
+
+
+# Maximum number of market data series kept converted, the least recently used are removed
+MAX_FEEDS = 8
+
+# Converted market data, by hash of its content
+_feeds = collections.OrderedDict()
+
+
+def get_shared_feed(df):
+    """
+    Get the market data converted to backtrader lines, converting it only the
+    first time. The strategies executed on the same data share the conversion
+    and the indicators computed on it
+    :param df: dataframe with market data
+    :return: SharedFeed instance
+    """
+    key = feature_store.get_data_hash(df)
+
+    if key in _feeds:
+        _feeds.move_to_end(key)
+        return _feeds[key]
+
+    feed = SharedFeed(df)
+    _feeds[key] = feed
+
+    while len(_feeds) > MAX_FEEDS:
+        _feeds.popitem(last=False)
+
+    return feed
+
+
+def clear():
+    """ Remove all the converted market data """
+    _feeds.clear()
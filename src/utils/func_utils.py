@@ -1,27 +1,146 @@
 import pandas as pd
 import numpy as np
+import contextlib
 import datetime
 import os
 
-import src.utils.indicators as indicators
-import fix_yahoo_finance as yf
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, the updates are not locked
+    fcntl = None
 
-from sklearn.preprocessing import LabelEncoder
-from keras.utils import np_utils
+import src.utils.feature_store as feature_store
+import src.utils.data_cache as data_cache
+from src.classes.dataProvider import YahooDataProvider
 
 
-def getData(data_name):
+def get_last_date(path_data):
+    """
+    Get the last date saved in a market data csv file, reading only its end
+    :param path_data: csv file path
+    :return: last date, or None if the file has no data
+    """
+    with open(path_data, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        file_size = f.tell()
+        block_size = min(file_size, 4096)
+        f.seek(file_size - block_size)
+        lines = [line for line in f.read(block_size).splitlines() if line.strip()]
+
+    if len(lines) == 0 or lines[-1].startswith(b'Date'):
+        return None
+
+    return pd.Timestamp(lines[-1].split(b',')[0].decode('utf-8'))
+
+
+@contextlib.contextmanager
+def lock_data(path_data):
+    """
+    Hold an exclusive lock of a market data csv file, so only one process updates it at a time
+    :param path_data: csv file path
+    """
+    with open(path_data + '.lock', 'a') as lock:
+        if fcntl != None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+
+        try:
+            yield
+        finally:
+            if fcntl != None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+def append_data(path_data, df):
+    """
+    Append new days to a market data csv file. Only the new rows are written,
+    and the file is truncated back to its original size if writing fails, so it
+    never keeps a partial last line. Call it holding lock_data, see update_data
+    :param path_data: csv file path
+    :param df: dataframe with the new days
+    """
+    with open(path_data, 'rb') as f:
+        columns = f.readline().decode('utf-8').strip().split(',')[1:]
+
+    text = df[columns].to_csv(header=False).encode('utf-8')
+
+    with open(path_data, 'ab') as f:
+        file_size = f.tell()
+
+        if file_size > 0:
+            with open(path_data, 'rb') as last:
+                last.seek(file_size - 1)
+
+                if last.read(1) != b'\n':
+                    text = b'\n' + text
+
+        try:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        except BaseException:
+            f.truncate(file_size)
+            raise
+
+
+def update_data(path_data, data_name, provider):
+    """
+    Download only the days after the last saved date and append them to the csv file.
+    The file is locked from reading its last date until the new days are saved, so
+    processes updating the same quote never append the same days twice
+    :param path_data: csv file path
+    :param data_name: quote data name
+    :param provider: market data provider
+    :return: number of new days
+    """
+    with lock_data(path_data):
+        last_date = get_last_date(path_data)
+
+        from_date = '2000-01-01' if last_date == None else (last_date + datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+        today = datetime.datetime.now().strftime('%Y-%m-%d')
+
+        if from_date >= today:
+            return 0
+
+        df = provider.get_data(data_name, from_date, today)
+
+        if last_date != None:
+            df = df[df.index > last_date]
+
+        if len(df.index) > 0:
+            append_data(path_data, df)
+
+    return len(df.index)
+
+
+def getData(data_name, update=False, provider=None):
+    """
+    Load market data of a quote, downloading it if it is not saved
+    :param data_name: quote data name
+    :param update: if True then the days after the last saved date are downloaded
+    :param provider: market data provider, yahoo finance by default
+    :return: dataframe with market data
+    """
 
     print("Cargando datos...")
 
     path_data = '../data/'+data_name+'.csv'
     df = None
 
+    if provider == None:
+        provider = YahooDataProvider()
+
     # Check if data exists
     # If not exists then data is downloaded and save in folder data
     if os.path.exists(path_data):
         print('Datos existentes en ../data.')
-        df = pd.read_csv(path_data, index_col = "Date", parse_dates = True)
+
+        if update:
+            print('Actualizando datos...')
+            n_days = update_data(path_data, data_name, provider)
+            print(str(n_days) + ' nuevos días añadidos a ' + path_data)
+
+        df = data_cache.read_csv_cached(path_data)
         print(path_data + ' cargado con éxito.')
     else:
         print('Datos no existentes en ../data.')
@@ -30,8 +149,7 @@ def getData(data_name):
         today = datetime.datetime.now()
         today = today.strftime('%Y-%m-%d')
 
-        df = yf.download(data_name, from_date, today)
-        df = df[['Open','High', 'Low', 'Close', 'Volume']]
+        df = provider.get_data(data_name, from_date, today)
 
         if not os.path.exists('../data'):
             os.makedirs('../data')
@@ -43,95 +161,161 @@ def getData(data_name):
     return df
 
 
-def add_features(df):
-    """
-    Add to df dataframe new features with technical indicators
-    :param df: dataframe with market data
-    :return: dataframe with the new features added
-    """
-
-    print("Añadiendo características...")
+# Technical indicators used as features: indicator function name and parameters
+FEATURES_SPEC = [
     # Momento
-    df = indicators.momentum(df, 5)
-    df = indicators.momentum(df, 10)
-    df = indicators.momentum(df, 15)
+    ['momentum', 5],
+    ['momentum', 10],
+    ['momentum', 15],
 
     # Media Movil
-    df = indicators.moving_average(df, 7)
-    df = indicators.moving_average(df, 14)
-    df = indicators.moving_average(df, 21)
+    ['moving_average', 7],
+    ['moving_average', 14],
+    ['moving_average', 21],
 
     # Media Exponencial
-    df = indicators.exponential_moving_average(df, 7)
-    df = indicators.exponential_moving_average(df, 14)
-    df = indicators.exponential_moving_average(df, 21)
+    ['exponential_moving_average', 7],
+    ['exponential_moving_average', 14],
+    ['exponential_moving_average', 21],
 
     # Rate of change
-    df = indicators.rate_of_change(df, 13)
-    df = indicators.rate_of_change(df, 21)
+    ['rate_of_change', 13],
+    ['rate_of_change', 21],
 
     # Oscilador estocastico
-    df = indicators.stochastic(df, 7)
-    df = indicators.stochastic(df, 14)
-    df = indicators.stochastic(df, 21)
+    ['stochastic', 7],
+    ['stochastic', 14],
+    ['stochastic', 21],
 
     # Oscilador estocastico fast
-    df = indicators.stochastic_fast(df, 7)
-    df = indicators.stochastic_fast(df, 14)
-    df = indicators.stochastic_fast(df, 21)
+    ['stochastic_fast', 7],
+    ['stochastic_fast', 14],
+    ['stochastic_fast', 21],
 
     # MACD e histograma
-    df = indicators.moving_average_CD(df, 12, 26)
+    ['moving_average_CD', 12, 26],
 
     # Indice de fuerza relativa
-    df = indicators.relative_strength_index(df, 9)
-    df = indicators.relative_strength_index(df, 14)
-    df = indicators.relative_strength_index(df, 21)
+    ['relative_strength_index', 9],
+    ['relative_strength_index', 14],
+    ['relative_strength_index', 21],
 
     # Desviacion tipica
-    df = indicators.standard_deviation(df, 7)
-    df = indicators.standard_deviation(df, 14)
-    df = indicators.standard_deviation(df, 21)
+    ['standard_deviation', 7],
+    ['standard_deviation', 14],
+    ['standard_deviation', 21]
+]
+
+
+def compute_features(df, spec=FEATURES_SPEC):
+    """
+    Compute technical indicators from market data, df is not modified
+    :param df: dataframe with market data
+    :param spec: list with the indicators and their parameters
+    :return: dataframe with a column for each indicator output
+    """
+    import src.utils.indicators as indicators
+
+    # Indicators are added to a dict of arrays and the dataframe is built once
+    columns = {col: np.ascontiguousarray(df[col].values) for col in df.columns}
+
+    for indicator in spec:
+        getattr(indicators, indicator[0])(columns, *indicator[1:])
 
+    feature_columns = [col for col in columns if col not in df.columns]
+
+    return pd.DataFrame({col: columns[col] for col in feature_columns}, index=df.index, columns=feature_columns)
+
+
+def add_features(df, data_name=None):
+    """
+    Add to df dataframe new features with technical indicators
+    :param df: dataframe with market data
+    :param data_name: quote data name, if given the features are loaded from
+        the features store and only computed when they are not stored
+    :return: dataframe with the new features added
+    """
+
+    print("Añadiendo características...")
+
+    if data_name != None:
+        features = feature_store.load_features(data_name, df, FEATURES_SPEC, compute_features)
+    else:
+        features = compute_features(df)
+
+    df = pd.concat([df, features], axis=1)
     df = df.dropna()
 
     return df
 
 
+def get_label_column_name(gain, loss, n_day):
+    """
+    Get the name of the label column for a combination of labelling parameters
+    :param gain: gain limit
+    :param loss: loss limit
+    :param n_day: number of days of the simulation
+    :return: column name
+    """
+    return 'label_' + str(gain) + '_' + str(loss) + '_' + str(n_day)
+
+
 def add_label(df, gain, loss ,n_day, commission):
     """
     Add a label to each day of the dataframe
     0 - Sell, 1 - Buy
 
+    A day is labelled as buy if the price change at the first day that crosses
+    the gain or loss limit (or at the last simulated day) is greater than the
+    round trip commission.
+
     :param df: dataframe with market data
-    :param gain: gain limit
-    :param loss: loss limit
-    :param n_day: number of days of the simulation
+    :param gain: gain limit, or list of gain limits
+    :param loss: loss limit, or list of loss limits
+    :param n_day: number of days of the simulation, or list of number of days
     :param commission: commission considerated for the simulation
-    :return: dataframe with labels added
+    :return: dataframe with labels added, in the 'label' column or, if any
+        parameter is a list, in one column for each combination of parameters
+        (see get_label_column_name)
     """
 
     print('Añadiendo etiquetas...')
 
-    df_closes = [df.iloc[i]['Close'] for i in range(len(df.index))]
-    labels = []
+    multiple = any(isinstance(param, (list, tuple)) for param in (gain, loss, n_day))
+
+    gain_list = list(gain) if isinstance(gain, (list, tuple)) else [gain]
+    loss_list = list(loss) if isinstance(loss, (list, tuple)) else [loss]
+    n_day_list = list(n_day) if isinstance(n_day, (list, tuple)) else [n_day]
 
-    # Iterate over the historical data
-    for i in range(len(df.index)-n_day):
-        close_price = df_closes[i]
-        # Iterate the next n_day days
-        for j in range(i+1, i+1+n_day):
-            dif = (df_closes[j] - close_price)/close_price
-            # Exit if limit is crossed
-            if dif > gain or dif < -loss:
-                break
+    df_closes = np.asarray(df['Close'].values, dtype=float)
+    size = len(df_closes)
+    max_n_day = max(n_day_list)
 
-        action = 1 if dif > commission*2 else 0
-        labels.append(action)
+    # Sliding window view with the next max_n_day closes of each day (NaN after the last day)
+    padded_closes = np.concatenate([df_closes, np.full(max_n_day, np.nan)])
+    step = padded_closes.strides[0]
+    next_closes = np.lib.stride_tricks.as_strided(padded_closes[1:], shape=(size, max_n_day), strides=(step, step))
 
-    # The last n_day days in the historical data are labeled as 0 (Sell)
-    labels.extend([0 for x in range(n_day)])
-    df['label'] = labels
+    # Price change from each day to each of the next days, computed once for all combinations
+    close_prices = df_closes.reshape(-1, 1)
+    dif = (next_closes - close_prices)/close_prices
+
+    for n in n_day_list:
+        # The last n days in the historical data are labeled as 0 (Sell)
+        n_rows = max(size-n, 0)
+        dif_n = dif[:n_rows, :n]
+
+        for g in gain_list:
+            for l in loss_list:
+                # First day that crosses a limit, or the last day if none is crossed
+                crossed = (dif_n > g) | (dif_n < -l)
+                exit_day = np.where(np.any(crossed, axis=1), np.argmax(crossed, axis=1), n-1)
+
+                labels = np.zeros(size, dtype=np.int64)
+                labels[:n_rows] = dif_n[np.arange(n_rows), exit_day] > commission*2
+
+                column_name = get_label_column_name(g, l, n) if multiple else 'label'
+                df[column_name] = labels
 
     return df
 
@@ -141,6 +325,8 @@ def encode_to_categorical(y):
     :param y: vector to encode to categorical
     :return: vector of categorical features
     """
+    from sklearn.preprocessing import LabelEncoder
+    from keras.utils import np_utils
 
     encoder = LabelEncoder()
     encoder.fit(y)
@@ -149,6 +335,28 @@ def encode_to_categorical(y):
 
     return y
 
+def get_retrain_policy(policy):
+    """
+    Parse a neural network retraining policy
+    :param policy: one of
+        - every-bar - retrain the model on every bar
+        - every:K - retrain the model every K bars
+        - drift:T - retrain the model when the rolling prediction error is greater than T
+        - online - a single gradient step on every bar
+    :return: policy mode and its value
+    """
+    mode, _, value = policy.partition(':')
+
+    if mode in ('every-bar', 'online') and value == '':
+        return mode, None
+    elif mode == 'every' and value.isdigit() and int(value) > 0:
+        return mode, int(value)
+    elif mode == 'drift' and value != '':
+        return mode, float(value)
+
+    raise ValueError('Incorrect retrain policy: ' + policy)
+
+
 def split_df_date(df, start_train_date, end_train_date, start_test_date, end_test_date):
     """
     Split dataframe in train and test from given dates
@@ -221,3 +429,128 @@ def get_combined_signal(moving_average_rules, moving_averages, w, index):
     final_signal = np.sum(np.array(w)*np.array(signal_list))
 
     return final_signal
+
+
+def get_split_w_threshold_swarm(x, normalization='exponential'):
+    """
+    Get normalize weights and thresholds for every particle of a swarm
+    :param x: matrix with an alpha vector in each row
+    :param normalization: weights normalization, 'exponential' or 'l1'
+    :return: weights matrix (particles x rules), buy thresholds and sell thresholds
+    """
+    w = []
+    alpha = x[:, :x.shape[1]-2]
+
+    if normalization == 'exponential':
+        w = np.exp(alpha)/np.sum(np.exp(alpha), axis=1, keepdims=True)
+    elif normalization == 'l1':
+        w = alpha/np.sum(np.abs(alpha), axis=1, keepdims=True)
+
+    buy_threshold = x[:, x.shape[1]-2]
+    sell_threshold = x[:, x.shape[1]-1]
+
+    return w, buy_threshold, sell_threshold
+
+
+def get_signal_matrix(moving_average_rules, moving_averages):
+    """
+    Get the buy-sell signal of every moving average rule for every day
+    :param moving_average_rules: list with moving average rules
+    :param moving_averages: dict with moving averages from historical data
+    :return: matrix (days x rules) with +1 (buy) and -1 (sell) signals
+    """
+    size = len(moving_averages['MA_' + str(moving_average_rules[0][0])])
+    signals = np.empty([size, len(moving_average_rules)])
+
+    for j, (short_period, long_period) in enumerate(moving_average_rules):
+        moving_average_short = np.asarray(moving_averages['MA_' + str(short_period)])
+        moving_average_long = np.asarray(moving_averages['MA_' + str(long_period)])
+
+        signals[:, j] = np.where(moving_average_short < moving_average_long, -1.0, 1.0)
+
+    return signals
+
+
+def get_market_state(buy_signal, sell_signal):
+    """
+    Resolve the buy-sell state machine of several simulations at once
+    :param buy_signal: boolean matrix (days x simulations), True if the buy condition holds
+    :param sell_signal: boolean matrix (days x simulations), True if the sell condition holds
+    :return: boolean matrix, True if the simulation is in the market after each day
+    """
+    size, num_columns = buy_signal.shape
+
+    # A day where both conditions hold toggles the state, so it can not be
+    # resolved as "last event wins". Fall back to iterate over days.
+    if np.any(buy_signal & sell_signal):
+        in_market = np.empty([size, num_columns], dtype=bool)
+        state = np.zeros(num_columns, dtype=bool)
+
+        for i in range(size):
+            state = np.where(state, ~sell_signal[i], buy_signal[i])
+            in_market[i] = state
+
+        return in_market
+
+    # Otherwise the state is given by the last day with a buy or sell event
+    days = np.arange(size).reshape(-1, 1)
+    last_event = np.where(buy_signal | sell_signal, days, -1)
+    np.maximum.accumulate(last_event, axis=0, out=last_event)
+
+    in_market = buy_signal[last_event, np.arange(num_columns)] & (last_event >= 0)
+
+    return in_market
+
+
+def get_swarm_final_prices(closes, signals, x, normalization='exponential', commission=0.001, start_price=100000):
+    """
+    Simulate the combined signal strategy for every particle of a swarm
+    :param closes: vector with close prices
+    :param signals: matrix (days x rules) with the moving average rules signals
+    :param x: matrix with an alpha vector in each row
+    :param normalization: weights normalization, 'exponential' or 'l1'
+    :param commission: commission to be paid on each operation
+    :param start_price: initial capital
+    :return: vector with the final capital of each particle
+    """
+    closes = np.asarray(closes, dtype=float)
+    size = len(closes)
+    num_particles = x.shape[0]
+
+    final_prices = np.full(num_particles, float(start_price))
+
+    if size < 2:
+        return final_prices
+
+    w, buy_threshold, sell_threshold = get_split_w_threshold_swarm(x, normalization)
+
+    # Combined signal of every particle on each day except the last one
+    final_signal = np.dot(signals[:size-1], np.transpose(w))
+
+    in_market = get_market_state(final_signal > buy_threshold, final_signal < sell_threshold)
+
+    # Buy and sell days, the last day closes any open position
+    was_in_market = np.zeros([size, num_particles], dtype=bool)
+    was_in_market[1:] = in_market
+
+    buy_days = np.zeros([size, num_particles], dtype=bool)
+    buy_days[:size-1] = in_market & ~was_in_market[:size-1]
+
+    sell_days = was_in_market.copy()
+    sell_days[:size-1] &= ~in_market
+
+    # Day of the last buy for each day and particle
+    days = np.arange(size).reshape(-1, 1)
+    last_buy_day = np.where(buy_days, days, 0)
+    np.maximum.accumulate(last_buy_day, axis=0, out=last_buy_day)
+
+    # Return of each trade on its sell day, compounded in trade order
+    returns = np.ones([size+1, num_particles])
+    returns[0] = final_prices
+    returns[1:] = np.where(sell_days,
+                           (closes.reshape(-1, 1)*(1-commission)) / (closes[last_buy_day]*(1+commission)),
+                           1.0)
+
+    final_prices = np.multiply.accumulate(returns, axis=0)[size]
+
+    return final_prices
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+import numpy as np
+
+
+# Folder where the trained models are saved
+MODELS_FOLDER = '../data/models'
+
+# Maximum size in bytes of the saved models, the least recently used are removed
+MAX_CACHE_SIZE = 500 * 1024 * 1024
+
+MODEL_FILE = 'model.h5'
+SCALER_FILE = 'scaler.pkl'
+INFO_FILE = 'info.json'
+
+# Suffix of the folders where the models are written before they are moved to the cache
+TMP_SUFFIX = '.tmp'
+
+# Seconds after which an incomplete model folder is considered abandoned by a crashed process
+INCOMPLETE_AGE = 3600
+
+
+def get_model_key(X, y, params):
+    """
+    Get a key that identifies a trained model from its training data and hyperparameters
+    :param X: training matrix, before normalization
+    :param y: training labels
+    :param params: dict with the hyperparameters and the architecture of the model
+    :return: hexadecimal hash
+    """
+    key_hash = hashlib.sha1()
+
+    for array in (X, y):
+        array = np.ascontiguousarray(array)
+        key_hash.update(str((array.shape, array.dtype.str)).encode('utf-8'))
+        key_hash.update(array.tobytes())
+
+    key_hash.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+
+    return key_hash.hexdigest()
+
+
+def load_model(key, neural_network, folder=MODELS_FOLDER):
+    """
+    Load a trained model and its fitted scaler
+    :param key: model key returned by get_model_key
+    :param neural_network: NeuralNetwork instance where the model is loaded
+    :param folder: root folder of the cache
+    :return: fitted scaler, or None if the model is not in the cache
+    """
+    model_folder = os.path.join(folder, key)
+    info_path = os.path.join(model_folder, INFO_FILE)
+
+    if not os.path.exists(info_path):
+        return None
+
+    try:
+        with open(os.path.join(model_folder, SCALER_FILE), 'rb') as f:
+            scaler = pickle.load(f)
+
+        neural_network.load_model(os.path.join(model_folder, MODEL_FILE))
+    except (IOError, OSError, ValueError, pickle.UnpicklingError):
+        return None
+
+    # The access time is used to remove the least recently used models
+    try:
+        os.utime(info_path, None)
+    except OSError:
+        pass
+
+    return scaler
+
+
+def save_model(key, neural_network, scaler, params, folder=MODELS_FOLDER, max_size=MAX_CACHE_SIZE):
+    """
+    Save a trained model and its fitted scaler, removing old models if the cache is too big.
+    The model is written to a temporary folder that is moved to the cache when it is
+    complete, so other processes never load or remove a model being written
+    :param key: model key returned by get_model_key
+    :param neural_network: trained NeuralNetwork instance
+    :param scaler: scaler fitted with the training matrix
+    :param params: dict with the hyperparameters and the architecture of the model
+    :param folder: root folder of the cache
+    :param max_size: maximum size in bytes of the cache
+    """
+    model_folder = os.path.join(folder, key)
+    tmp_folder = model_folder + '.' + str(os.getpid()) + TMP_SUFFIX
+
+    os.makedirs(tmp_folder, exist_ok=True)
+
+    try:
+        neural_network.save_model(os.path.join(tmp_folder, MODEL_FILE))
+
+        with open(os.path.join(tmp_folder, SCALER_FILE), 'wb') as f:
+            pickle.dump(scaler, f)
+
+        # The info file is written last, a model is complete once it exists
+        with open(os.path.join(tmp_folder, INFO_FILE), 'w') as f:
+            json.dump(params, f)
+
+        os.replace(tmp_folder, model_folder)
+    except OSError:
+        # Another process saved the same model first
+        if not os.path.exists(os.path.join(model_folder, INFO_FILE)):
+            raise
+    finally:
+        shutil.rmtree(tmp_folder, ignore_errors=True)
+
+    evict_models(folder, max_size, keep=key)
+
+
+def get_folder_size(folder):
+    """
+    Get the size of the files of a folder
+    :param folder: folder path
+    :return: size in bytes, files removed by other processes are not counted
+    """
+    size = 0
+
+    for file_name in os.listdir(folder):
+        try:
+            size += os.path.getsize(os.path.join(folder, file_name))
+        except OSError:
+            pass
+
+    return size
+
+
+def evict_models(folder=MODELS_FOLDER, max_size=MAX_CACHE_SIZE, keep=None):
+    """
+    Remove the least recently used models until the cache size is under max_size.
+    Incomplete models are only removed when they are older than INCOMPLETE_AGE,
+    other processes may still be writing them
+    :param folder: root folder of the cache
+    :param max_size: maximum size in bytes of the cache
+    :param keep: key of a model that is never removed
+    """
+    entries = []
+    now = time.time()
+
+    for key in os.listdir(folder):
+        model_folder = os.path.join(folder, key)
+        info_path = os.path.join(model_folder, INFO_FILE)
+
+        try:
+            if os.path.exists(info_path) and not key.endswith(TMP_SUFFIX):
+                last_use = os.path.getmtime(info_path)
+            elif now - os.path.getmtime(model_folder) > INCOMPLETE_AGE:
+                # Abandoned incomplete models are removed first
+                last_use = 0
+            else:
+                continue
+
+            entries.append((last_use, key, get_folder_size(model_folder)))
+        except OSError:
+            # Model removed by another process
+            continue
+
+    total_size = sum(size for last_use, key, size in entries)
+
+    for last_use, key, size in sorted(entries):
+        if total_size <= max_size:
+            break
+
+        if key != keep:
+            shutil.rmtree(os.path.join(folder, key), ignore_errors=True)
+            total_size -= size
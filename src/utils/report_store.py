@@ -0,0 +1,87 @@
+import fnmatch
+import hashlib
+import json
+import os
+import pickle
+
+from src.classes.backtestResult import BacktestResult
+
+
+# Folder where the results of the simulations with deferred reports are saved
+RUNS_FOLDER = './resultados/runs'
+
+RUN_EXTENSION = '.pkl'
+
+
+def get_run_name(info, params=None, training_params=None):
+    """
+    Get the name that identifies a simulation. It ends with a short hash of the
+    parameters, so simulations of a strategy with different parameters have different names
+    :param info: dict with the market, strategy name and dates of the simulation
+    :param params: dict with the strategy parameters (optional)
+    :param training_params: dict with the training parameters of the strategy (optional)
+    :return: run name, <quote>_<strategy>_<from>_<to>_<params hash>
+    """
+    params_hash = hashlib.sha1(json.dumps([params or {}, training_params or {}], sort_keys=True,
+                                          default=str).encode('utf-8')).hexdigest()[:8]
+
+    return (info['Mercado'] + '_' + info['Estrategia'] + '_' + info['Fecha inicial'] + '_' + info['Fecha final'] +
+            '_' + params_hash)
+
+
+def save_run(info, params, result, training_params=None, folder=RUNS_FOLDER):
+    """
+    Save the result of a simulation to render its reports later
+    :param info: dict with the market, strategy name and dates of the simulation
+    :param params: dict with the strategy parameters
+    :param result: BacktestResult of the simulation, the backtrader engine is not saved
+    :param training_params: dict with the training parameters of the strategy (optional)
+    :param folder: folder of the saved simulations
+    :return: path of the saved simulation
+    """
+    if not os.path.exists(folder):
+        os.makedirs(folder, exist_ok=True)
+
+    run = {
+        'info': info,
+        'params': dict(params),
+        'training_params': training_params,
+        'result': BacktestResult(result.dates, result.values, result.closes, result.metrics, series=result.series)
+    }
+
+    path = os.path.join(folder, get_run_name(info, params, training_params) + RUN_EXTENSION)
+
+    # Written to a temporary file first, so parallel executions never leave partial files
+    tmp_path = path + '.' + str(os.getpid()) + '.tmp'
+
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(run, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    os.replace(tmp_path, path)
+
+    return path
+
+
+def load_run(path):
+    """
+    Load a saved simulation
+    :param path: path returned by save_run
+    :return: dict with the info, params, training_params and result of the simulation
+    """
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def list_runs(folder=RUNS_FOLDER, pattern='*'):
+    """
+    List the saved simulations
+    :param folder: folder of the saved simulations
+    :param pattern: shell-style pattern of the run names, e.g. SAN_* (optional)
+    :return: sorted list of paths
+    """
+    if not os.path.exists(folder):
+        return []
+
+    return sorted(os.path.join(folder, file_name) for file_name in os.listdir(folder)
+                  if file_name.endswith(RUN_EXTENSION)
+                  and fnmatch.fnmatch(file_name[:-len(RUN_EXTENSION)], pattern))
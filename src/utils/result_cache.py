@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import pickle
+
+import src.utils.feature_store as feature_store
+from src.classes.backtestResult import BacktestResult
+
+
+# Folder where the results of the executions are saved
+RESULTS_FOLDER = '../data/results'
+
+# Maximum size in bytes of the saved results, the least recently used are removed
+MAX_CACHE_SIZE = 100 * 1024 * 1024
+
+RESULT_EXTENSION = '.pkl'
+
+# If False then the executions are never loaded from the cache
+_enabled = True
+
+# Hash of the source code, computed the first time it is needed
+_code_version = None
+
+
+def set_enabled(enabled):
+    """
+    Enable or disable the cache of results
+    :param enabled: if False then the executions are always simulated
+    """
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled():
+    """
+    Check if the cache of results is enabled
+    :return: True if the executions can be loaded from the cache
+    """
+    return _enabled
+
+
+def get_code_version():
+    """
+    Get a hash of the source code of the app, any change of the strategies or
+    of the simulations invalidates the saved results
+    :return: hexadecimal hash
+    """
+    global _code_version
+
+    if _code_version is None:
+        src_folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code_hash = hashlib.sha1()
+
+        for root, dirs, files in os.walk(src_folder):
+            dirs.sort()
+
+            for file_name in sorted(files):
+                if file_name.endswith('.py'):
+                    path = os.path.join(root, file_name)
+                    code_hash.update(os.path.relpath(path, src_folder).encode('utf-8'))
+
+                    with open(path, 'rb') as f:
+                        code_hash.update(f.read())
+
+        _code_version = code_hash.hexdigest()[:16]
+
+    return _code_version
+
+
+def get_result_key(execution, df, inputs):
+    """
+    Get a key that identifies an execution from its market data, inputs and code version
+    :param execution: execution name, e.g. the strategy command line name
+    :param df: dataframe with the market data used by the execution
+    :param inputs: dict with the other inputs of the execution (dates, commission, parameters, ...)
+    :return: hexadecimal hash
+    """
+    key_hash = hashlib.sha1()
+
+    key_hash.update(get_code_version().encode('utf-8'))
+    key_hash.update(execution.encode('utf-8'))
+    key_hash.update(feature_store.get_data_hash(df).encode('utf-8'))
+    key_hash.update(json.dumps(inputs, sort_keys=True, default=str).encode('utf-8'))
+
+    return key_hash.hexdigest()
+
+
+def load_result(key, folder=RESULTS_FOLDER):
+    """
+    Load the result of an execution
+    :param key: result key returned by get_result_key
+    :param folder: folder of the cache
+    :return: dict with the result, params and training_params of the execution, or None if it is not in the cache
+    """
+    path = os.path.join(folder, key + RESULT_EXTENSION)
+
+    try:
+        with open(path, 'rb') as f:
+            entry = pickle.load(f)
+    except (IOError, OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+    # The modification time is used to remove the least recently used results
+    os.utime(path, None)
+
+    return entry
+
+
+def save_result(key, result, params, training_params=None, folder=RESULTS_FOLDER, max_size=MAX_CACHE_SIZE):
+    """
+    Save the result of an execution, removing old results if the cache is too big
+    :param key: result key returned by get_result_key
+    :param result: BacktestResult of the execution, the backtrader engine is not saved
+    :param params: dict with the strategy parameters
+    :param training_params: dict with the training parameters of the strategy (optional)
+    :param folder: folder of the cache
+    :param max_size: maximum size in bytes of the cache
+    """
+    if not os.path.exists(folder):
+        os.makedirs(folder, exist_ok=True)
+
+    entry = {
+        'result': BacktestResult(result.dates, result.values, result.closes, result.metrics, series=result.series),
+        'params': dict(params),
+        'training_params': training_params
+    }
+
+    path = os.path.join(folder, key + RESULT_EXTENSION)
+
+    # Written to a temporary file first, so parallel executions never read partial results
+    tmp_path = path + '.' + str(os.getpid()) + '.tmp'
+
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    os.replace(tmp_path, path)
+
+    evict_results(folder, max_size, keep=key)
+
+
+def evict_results(folder=RESULTS_FOLDER, max_size=MAX_CACHE_SIZE, keep=None):
+    """
+    Remove the least recently used results until the cache size is under max_size
+    :param folder: folder of the cache
+    :param max_size: maximum size in bytes of the cache
+    :param keep: key of a result that is never removed
+    """
+    entries = []
+
+    for file_name in os.listdir(folder):
+        if not file_name.endswith(RESULT_EXTENSION):
+            continue
+
+        path = os.path.join(folder, file_name)
+
+        try:
+            entries.append((os.path.getmtime(path), file_name[:-len(RESULT_EXTENSION)], os.path.getsize(path)))
+        except OSError:
+            continue
+
+    total_size = sum(size for last_use, key, size in entries)
+
+    for last_use, key, size in sorted(entries):
+        if total_size <= max_size:
+            break
+
+        if key != keep:
+            try:
+                os.remove(os.path.join(folder, key + RESULT_EXTENSION))
+            except OSError:
+                pass
+
+            total_size -= size
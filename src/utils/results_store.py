@@ -0,0 +1,334 @@
+import atexit
+import json
+import math
+import os
+import sqlite3
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+
+# Database with the results of the simulations
+RESULTS_DB = './resultados/results.db'
+
+# Number of results kept in memory before they are written in one transaction
+BATCH_SIZE = 50
+
+# Seconds a process waits for the database lock held by other processes
+LOCK_TIMEOUT = 60.0
+
+# Columns of the simulation info, the other columns are added when a new
+# param (param.<name>), training param (train.<name>) or metric (<name>) appears
+INFO_COLUMNS = {
+    'Mercado': 'market',
+    'Estrategia': 'strategy',
+    'Fecha inicial': 'from_date',
+    'Fecha final': 'to_date'
+}
+
+PARAM_PREFIX = 'param.'
+TRAINING_PREFIX = 'train.'
+
+# Results not written yet, tuples with the database and the row
+_pending = []
+
+
+def quote(name):
+    """
+    Quote a column name, they can contain any character
+    :param name: column name
+    :return: quoted name
+    """
+    return '"' + name.replace('"', '""') + '"'
+
+
+def to_sql_value(value):
+    """
+    Convert a value to a type stored by SQLite
+    :param value: value of an info, param or metric
+    :return: int, float or str value, None for missing values
+    """
+    if isinstance(value, (bool, np.bool_)):
+        return int(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return None if math.isnan(value) else float(value)
+    if isinstance(value, str):
+        return None if value == 'NaN' else value
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value, default=str)
+
+    return str(value)
+
+
+def get_sql_type(value):
+    """
+    Get the column type of a value
+    :param value: value returned by to_sql_value
+    :return: SQLite type name
+    """
+    if isinstance(value, int):
+        return 'INTEGER'
+    if isinstance(value, float):
+        return 'REAL'
+
+    return 'TEXT'
+
+
+def get_row(info, params, metrics, training_params=None):
+    """
+    Get the row of a simulation
+    :param info: dict with the market, strategy name and dates of the simulation
+    :param params: dict with the strategy parameters
+    :param metrics: dict with the simulation metrics
+    :param training_params: dict with the training parameters of the strategy (optional)
+    :return: dict with the value of each column
+    """
+    row = {'created': datetime.now().isoformat(timespec='seconds')}
+
+    for key, value in info.items():
+        row[INFO_COLUMNS.get(key, key)] = to_sql_value(value)
+
+    for key, value in params.items():
+        row[PARAM_PREFIX + key] = to_sql_value(value)
+
+    if training_params != None:
+        for key, value in training_params.items():
+            row[TRAINING_PREFIX + key] = to_sql_value(value)
+
+    for key, value in metrics.items():
+        row[key] = to_sql_value(value)
+
+    return row
+
+
+def connect(db=RESULTS_DB):
+    """
+    Open the database, creating it if not exists. The WAL journal lets other
+    processes read while a process writes
+    :param db: database file name
+    :return: sqlite3 connection, transactions are started explicitly
+    """
+    folder = os.path.dirname(db)
+
+    if folder != '' and not os.path.exists(folder):
+        os.makedirs(folder, exist_ok=True)
+
+    conn = sqlite3.connect(db, timeout=LOCK_TIMEOUT, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY AUTOINCREMENT, created TEXT, '
+                 'market TEXT, strategy TEXT, from_date TEXT, to_date TEXT)')
+    conn.execute('CREATE INDEX IF NOT EXISTS runs_market_strategy ON runs (market, strategy)')
+
+    return conn
+
+
+def get_columns(conn):
+    """
+    Get the columns of the results table
+    :param conn: sqlite3 connection
+    :return: list of column names
+    """
+    return [column[1] for column in conn.execute('PRAGMA table_info(runs)')]
+
+
+def write_rows(rows, db=RESULTS_DB):
+    """
+    Write rows in one transaction. The transaction takes the write lock at the
+    start, so the columns added for new keys never collide with other processes
+    :param rows: list of dicts returned by get_row
+    :param db: database file name
+    """
+    if len(rows) == 0:
+        return
+
+    conn = connect(db)
+
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+
+        columns = set(get_columns(conn))
+
+        for row in rows:
+            for name, value in row.items():
+                if name not in columns and value is not None:
+                    conn.execute('ALTER TABLE runs ADD COLUMN ' + quote(name) + ' ' + get_sql_type(value))
+                    columns.add(name)
+
+        for row in rows:
+            names = [name for name in row if name in columns]
+            conn.execute('INSERT INTO runs (' + ', '.join(quote(name) for name in names) + ') VALUES (' +
+                         ', '.join('?' for name in names) + ')', [row[name] for name in names])
+
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+
+
+def add_run(info, params, metrics, training_params=None, db=RESULTS_DB):
+    """
+    Add the result of a simulation. Results are written in batches of BATCH_SIZE,
+    and when flush is called or the process exits
+    :param info: dict with the market, strategy name and dates of the simulation
+    :param params: dict with the strategy parameters
+    :param metrics: dict with the simulation metrics
+    :param training_params: dict with the training parameters of the strategy (optional)
+    :param db: database file name
+    """
+    _pending.append((db, get_row(info, params, metrics, training_params)))
+
+    if len(_pending) >= BATCH_SIZE:
+        flush()
+
+
+def flush():
+    """
+    Write the results not written yet
+    """
+    while len(_pending) > 0:
+        db = _pending[0][0]
+        rows = [row for row_db, row in _pending if row_db == db]
+
+        write_rows(rows, db)
+
+        _pending[:] = [(row_db, row) for row_db, row in _pending if row_db != db]
+
+
+atexit.register(flush)
+
+
+def get_filters(market=None, strategy=None, from_date=None, to_date=None, where=None):
+    """
+    Get the SQL condition of the common filters
+    :param market: quote data name
+    :param strategy: strategy name, as saved in the reports
+    :param from_date: first start date of the simulations
+    :param to_date: last end date of the simulations
+    :param where: other SQL condition (optional)
+    :return: tuple with the condition and its arguments
+    """
+    conditions = []
+    args = []
+
+    for column, operator, value in (('market', '=', market), ('strategy', '=', strategy),
+                                    ('from_date', '>=', from_date), ('to_date', '<=', to_date)):
+        if value != None:
+            conditions.append(column + ' ' + operator + ' ?')
+            args.append(value)
+
+    if where != None:
+        conditions.append('(' + where + ')')
+
+    condition = ' AND '.join(conditions) if len(conditions) > 0 else '1'
+
+    return condition, args
+
+
+def query(columns=None, where='1', args=(), order_by=None, limit=None, db=RESULTS_DB):
+    """
+    Query the results
+    :param columns: list of column names, all by default
+    :param where: SQL condition
+    :param args: arguments of the condition
+    :param order_by: SQL order, e.g. '"Final" DESC' (optional)
+    :param limit: maximum number of rows (optional)
+    :param db: database file name
+    :return: dataframe with a row for each simulation
+    """
+    flush()
+
+    select = '*' if columns == None else ', '.join(quote(column) for column in columns)
+    sql = 'SELECT ' + select + ' FROM runs WHERE ' + where
+
+    if order_by != None:
+        sql += ' ORDER BY ' + order_by
+
+    if limit != None:
+        sql += ' LIMIT ' + str(int(limit))
+
+    conn = connect(db)
+
+    try:
+        return pd.read_sql_query(sql, conn, params=list(args))
+    finally:
+        conn.close()
+
+
+def check_column(name, db=RESULTS_DB):
+    """
+    Check that a column exists
+    :param name: column name
+    :param db: database file name
+    """
+    conn = connect(db)
+
+    try:
+        columns = get_columns(conn)
+    finally:
+        conn.close()
+
+    if name not in columns:
+        raise ValueError('Unknown column: ' + name)
+
+
+def top(metric, n=10, ascending=False, db=RESULTS_DB, **filters):
+    """
+    Get the simulations with the best value of a metric
+    :param metric: metric column name, e.g. 'Ganancia(%)'
+    :param n: number of simulations
+    :param ascending: if True then the lowest values are the best
+    :param db: database file name
+    :param filters: arguments of get_filters
+    :return: dataframe with the info, params and metric of the best simulations
+    """
+    flush()
+    check_column(metric, db)
+
+    where, args = get_filters(**filters)
+    where += ' AND ' + quote(metric) + ' IS NOT NULL'
+    order_by = quote(metric) + (' ASC' if ascending else ' DESC')
+
+    df = query(where=where, args=args, order_by=order_by, limit=n, db=db)
+
+    # Columns of the metric and of the params used by these simulations
+    columns = ['id', 'market', 'strategy', 'from_date', 'to_date', metric]
+    columns += [column for column in df.columns if column.startswith(PARAM_PREFIX) and df[column].notnull().any()]
+
+    return df[columns]
+
+
+def aggregate(metric, by=('strategy',), db=RESULTS_DB, **filters):
+    """
+    Aggregate a metric by groups of simulations
+    :param metric: metric column name, e.g. 'Ganancia(%)'
+    :param by: columns that define the groups, e.g. ('market', 'strategy')
+    :param db: database file name
+    :param filters: arguments of get_filters
+    :return: dataframe with the number of simulations and the mean, min and max of the metric in each group
+    """
+    flush()
+
+    for column in list(by) + [metric]:
+        check_column(column, db)
+
+    where, args = get_filters(**filters)
+    groups = ', '.join(quote(column) for column in by)
+    value = quote(metric)
+
+    sql = ('SELECT ' + groups + ', COUNT(' + value + ') AS n, AVG(' + value + ') AS mean, MIN(' + value +
+           ') AS min, MAX(' + value + ') AS max FROM runs WHERE ' + where + ' GROUP BY ' + groups +
+           ' ORDER BY mean DESC')
+
+    conn = connect(db)
+
+    try:
+        return pd.read_sql_query(sql, conn, params=list(args))
+    finally:
+        conn.close()
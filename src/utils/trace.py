@@ -0,0 +1,109 @@
+import json
+import struct
+import pandas as pd
+
+from src.classes.traceWriter import TraceWriter
+
+
+# Active trace writer, None when tracing is disabled
+_tracer = None
+
+# Ordinal of 1970-01-01, backtrader date numbers are days since the ordinal 1
+UNIX_EPOCH_ORDINAL = 719163
+
+
+def start_trace(file_name, fmt='jsonl'):
+    """
+    Start writing the events of the simulations to a file
+    :param file_name: trace file name
+    :param fmt: file format, jsonl or binary
+    """
+    global _tracer
+
+    stop_trace()
+    _tracer = TraceWriter(file_name, fmt)
+
+
+def stop_trace():
+    """
+    Stop the active trace and close its file
+    """
+    global _tracer
+
+    if _tracer is not None:
+        _tracer.close()
+        _tracer = None
+
+
+def get_tracer():
+    """
+    Get the active trace writer
+    :return: TraceWriter instance, None if tracing is disabled
+    """
+    return _tracer
+
+
+def _read_binary(f):
+    """
+    Read the records of a binary trace file
+    :param f: file opened in binary mode, after the magic string
+    :return: list of records, dicts with the event, the run and the fields
+    """
+    schema_size, = struct.unpack('<I', f.read(4))
+    events = json.loads(f.read(schema_size).decode('utf-8'))
+    layouts = [TraceWriter.get_struct(code, fields) for code, (event, fields) in enumerate(events)]
+
+    records = []
+
+    while True:
+        code = f.read(1)
+
+        if len(code) == 0:
+            break
+
+        code, layout, strings = layouts[code[0]]
+        event, fields = events[code]
+
+        numeric = list(layout.unpack(bytes([code]) + f.read(layout.size - 1)))
+        values = []
+
+        for i in range(len(fields)):
+            if i in strings:
+                size, = struct.unpack('<H', f.read(2))
+                values.append(f.read(size).decode('utf-8'))
+            else:
+                values.append(numeric.pop(2))
+
+        record = {name: value for (name, kind), value in zip(fields, values)}
+        record['event'] = event
+        record['run'] = numeric[1]
+        records.append(record)
+
+    return records
+
+
+def read_trace(file_name):
+    """
+    Read a trace file written in any of the formats
+    :param file_name: trace file name
+    :return: dict with a dataframe of the records of each event, dates are converted to datetimes
+    """
+    with open(file_name, 'rb') as f:
+        if f.read(len(TraceWriter.MAGIC)) == TraceWriter.MAGIC:
+            records = _read_binary(f)
+        else:
+            f.seek(0)
+            records = [json.loads(line) for line in f if len(line.strip()) > 0]
+
+    tables = {}
+
+    for event, fields in TraceWriter.EVENTS:
+        columns = ['run'] + [name for name, kind in fields]
+        df = pd.DataFrame([record for record in records if record['event'] == event], columns=columns)
+
+        if 'date' in df.columns:
+            df['date'] = pd.to_datetime(df['date'] - UNIX_EPOCH_ORDINAL, unit='D')
+
+        tables[event] = df
+
+    return tables
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+import logging
+logging.disable(logging.CRITICAL)
+
+import os
+import sys, getopt
+import csv
+import math
+import itertools
+import multiprocessing as mp
+
+import src.utils.func_utils as func_utils
+from src.classes.replayMemory import ReplayMemory
+
+
+# Market data with the features and the label columns, set in each worker by the pool initializer
+_worker_data = {}
+
+
+def _init_worker(df, options, commission):
+    """
+    Pool initializer: keep the preprocessed market data in the worker
+    :param df: dataframe with market data, features and a column for each labelling combination
+    :param options: dict with the options of the neural network shared by all the configurations
+    :param commission: commission to be paid on each operation
+    """
+    _worker_data['df'] = df
+    _worker_data['options'] = options
+    _worker_data['commission'] = commission
+
+    # The output of the executions is discarded
+    sys.stdout = open(os.devnull, 'w')
+
+
+def _run_config(task):
+    """
+    Train the neural network of a configuration and backtest it in a worker process
+    :param task: tuple with the configuration (gain, loss, n_day, epochs) and the simulation dates
+    :return: tuple with the configuration, the simulation metrics (None if the execution failed) and the error
+    """
+    import src.strategies_execution.executions as executions
+
+    config, start_date, end_date = task
+    gain, loss, n_day, epochs = config
+
+    df = _worker_data['df']
+    label_columns = [col for col in df.columns if col.startswith('label_')]
+
+    df = df.drop(label_columns, axis=1)
+    df['label'] = _worker_data['df'][func_utils.get_label_column_name(gain, loss, n_day)]
+
+    options = dict(_worker_data['options'], gain=gain, loss=loss, n_day=n_day, epochs=epochs)
+
+    try:
+        NN_Strategy, df_test = executions.train_neural_network_strategy(df, options, start_date, end_date)
+        result = executions.run_strategy(NN_Strategy, df_test, _worker_data['commission'])
+    except Exception as e:
+        return config, None, repr(e)
+
+    return config, result.metrics, ''
+
+
+def get_round_end_dates(df, start_date, end_date, n_rounds, eta):
+    """
+    Get the end date of the simulation of each round of the successive halving.
+    The last round simulates the whole period, each previous round 1/eta of the next one
+    :param df: dataframe with market data
+    :param start_date: start date of simulation
+    :param end_date: end date of simulation
+    :param n_rounds: number of rounds
+    :param eta: reduction factor of each round
+    :return: list of end dates
+    """
+    dates = df[start_date:end_date].index
+    end_dates = []
+
+    for r in range(n_rounds):
+        n_days = max(1, int(math.ceil(len(dates) / float(eta ** (n_rounds - r - 1)))))
+        end_dates.append(str(dates[n_days - 1].date()))
+
+    return end_dates
+
+
+def run_sweep(df, configs, options, commission, start_date, end_date, n_workers, n_rounds=3, eta=2):
+    """
+    Evaluate the configurations with successive halving: every round simulates a longer
+    period and only the best 1/eta of the configurations go to the next round. Trained
+    networks are reused between rounds through the model cache
+    :param df: dataframe with market data, features and a column for each labelling combination
+    :param configs: list of configurations (gain, loss, n_day, epochs)
+    :param options: dict with the options of the neural network shared by all the configurations
+    :param commission: commission to be paid on each operation
+    :param start_date: start date of simulation
+    :param end_date: end date of simulation
+    :param n_workers: number of worker processes
+    :param n_rounds: number of rounds
+    :param eta: reduction factor of each round
+    :return: list of results (config, last round, metrics, error) sorted from best to worst
+    """
+    end_dates = get_round_end_dates(df, start_date, end_date, n_rounds, eta)
+
+    pool = mp.get_context('spawn').Pool(n_workers, initializer=_init_worker, initargs=(df, options, commission))
+
+    results = {}
+    alive = list(configs)
+
+    try:
+        for r, round_end_date in enumerate(end_dates):
+            print('Ronda ' + str(r+1) + '/' + str(n_rounds) + ': ' + str(len(alive)) + ' configuraciones hasta ' + round_end_date)
+
+            tasks = [(config, start_date, round_end_date) for config in alive]
+
+            for config, metrics, error in pool.imap_unordered(_run_config, tasks):
+                results[config] = (config, r, metrics, error)
+
+                if metrics == None:
+                    print('\tError en la configuración ' + str(config) + ': ' + error)
+
+            # Failed configurations are discarded
+            alive = [config for config in alive if results[config][2] != None]
+            alive.sort(key=lambda config: results[config][2]['Ganancia(%)'], reverse=True)
+
+            if not alive:
+                break
+
+            if r < n_rounds - 1:
+                alive = alive[:int(math.ceil(len(alive) / float(eta)))]
+    finally:
+        pool.close()
+        pool.join()
+
+    def sort_key(result):
+        config, r, metrics, error = result
+        return (r, metrics['Ganancia(%)'] if metrics != None else -math.inf)
+
+    return sorted(results.values(), key=sort_key, reverse=True)
+
+
+def print_results(results, file_name=None):
+    """
+    Print the ranked results of the sweep
+    :param results: list of results returned by run_sweep
+    :param file_name: if given, the results are also saved in this csv file
+    """
+    header = ['Posición', 'Gain', 'Loss', 'Días', 'Épocas', 'Ronda', 'Final', 'Ganancia(%)', 'Trades total', 'Acierto(%)', 'Error']
+    rows = []
+
+    for position, (config, r, metrics, error) in enumerate(results, 1):
+        if metrics == None:
+            rows.append([position] + list(config) + [r+1, 'NaN', 'NaN', 'NaN', 'NaN', error])
+        else:
+            rows.append([position] + list(config) + [r+1, round(metrics['Final'], 2),
+                         round(100*metrics['Ganancia(%)'], 2), metrics['Trades total'],
+                         round(metrics['Acierto(%)'], 2) if isinstance(metrics['Acierto(%)'], float) else metrics['Acierto(%)'],
+                         error])
+
+    print('\n' + '\t'.join(header))
+
+    for row in rows:
+        print('\t'.join(str(value) for value in row))
+
+    if file_name != None:
+        with open(file_name, 'w') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+
+def parse_list(arg, cast):
+    """
+    Parse a comma separated list of values
+    :param arg: comma separated values
+    :param cast: type of the values
+    :return: list of values
+    """
+    return [cast(value) for value in arg.split(',')]
+
+
+def main(argv):
+    quote = ''
+    commission = 0.001
+    s_test, e_test = '2011-12-22', '2013-12-22'
+
+    gains = [0.07]
+    losses = [0.03]
+    n_days = [10]
+    epochs = [300]
+
+    options = {}
+    n_workers = os.cpu_count()
+    n_rounds = 3
+    eta = 2
+
+    try:
+        opts, args = getopt.getopt(argv, 'hq:f:t:w:', ['help', 'quote=', 'from-date=', 'to-date=', 'workers=',
+                                                      'gain=', 'loss=', 'days=', 'epochs=', 'rounds=', 'eta=',
+                                                      'nn-retrain=', 'nn-memory=', 'nn-memory-sampling='])
+    except getopt.GetoptError:
+        print('sweep.py -q <quote> --gain <g1,g2,...> --loss <l1,l2,...> --days <d1,d2,...> --epochs <e1,e2,...>')
+        sys.exit(2)
+
+    for opt, arg in opts:
+        if opt in ('-h', '--help'):
+            print('\nDESCRIPTION')
+            print('\n\tSearch the best labelling and training parameters of the neural network strategy for a quote.')
+            print('\n\tEach round simulates a longer period and only the best configurations go to the next round.')
+            print('\nUSAGE')
+            print('\n\tsweep.py -q <quote> --gain <g1,g2,...> --loss <l1,l2,...> --days <d1,d2,...> --epochs <e1,e2,...>')
+            print('\nOPTIONS')
+            print('\n\t-q, --quote\tQuote name.')
+            print('\n\t-f, --from-date\tStart date in simulation.')
+            print('\n\t-t, --to-date\tEnd date in simulation.')
+            print('\n\t-w, --workers\tNumber of worker processes.')
+            print('\n\t--gain, --loss, --days, --epochs\tComma separated values of each parameter.')
+            print('\n\t--rounds\tNumber of rounds of the successive halving.')
+            print('\n\t--eta\tOnly the best 1/eta configurations of each round go to the next round.')
+            print('\n\t--nn-retrain, --nn-memory, --nn-memory-sampling\tNeural network options, see main.py.')
+            print('\n\t-h, --help\tDisplay help.')
+            sys.exit()
+        elif opt in ('-q', '--quote'):
+            quote = arg
+        elif opt in ('-f', '--from-date'):
+            s_test = arg
+        elif opt in ('-t', '--to-date'):
+            e_test = arg
+        elif opt in ('-w', '--workers'):
+            n_workers = int(arg)
+        elif opt == '--gain':
+            gains = parse_list(arg, float)
+        elif opt == '--loss':
+            losses = parse_list(arg, float)
+        elif opt == '--days':
+            n_days = parse_list(arg, int)
+        elif opt == '--epochs':
+            epochs = parse_list(arg, int)
+        elif opt == '--rounds':
+            n_rounds = int(arg)
+        elif opt == '--eta':
+            eta = int(arg)
+        elif opt == '--nn-retrain':
+            options['retrain'] = arg
+        elif opt == '--nn-memory':
+            options['memory'] = int(arg)
+
+            if options['memory'] <= 0:
+                print('ERROR: the neural network memory must be greater than 0.')
+                sys.exit(2)
+        elif opt == '--nn-memory-sampling':
+            options['memory_sampling'] = arg
+
+            if arg not in ReplayMemory.SAMPLINGS:
+                print('ERROR: incorrect memory sampling. Please select one between: ' + ' | '.join(ReplayMemory.SAMPLINGS) + '.')
+                sys.exit(2)
+
+    configs = list(itertools.product(gains, losses, n_days, epochs))
+
+    # Features are computed once and all the labels in a single pass
+    df = func_utils.getData(quote)
+    df = func_utils.add_features(df, quote)
+    df = func_utils.add_label(df, gain=gains, loss=losses, n_day=n_days, commission=commission)
+
+    results = run_sweep(df, configs, options, commission, s_test, e_test, min(n_workers, len(configs)), n_rounds, eta)
+
+    if not os.path.exists('./resultados'):
+        os.makedirs('./resultados')
+
+    print_results(results, './resultados/sweep_' + quote + '_' + s_test + '_' + e_test + '.csv')
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
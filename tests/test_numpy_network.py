@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('keras')
+
+import src.classes.model as model
+from src.classes.numpyNetwork import NumpyNetwork
+
+
+def test_numpy_forward_pass_matches_keras():
+    random = np.random.RandomState(1)
+
+    X = random.normal(size=(200, 20, 1)).astype(np.float32)
+    y = (random.uniform(size=200) > 0.5).astype(np.float32)
+
+    neural_network = model.NeuralNetwork()
+    neural_network.build_model(input_shape=(X.shape[1], 1))
+    neural_network.train(X, y, epochs=5)
+
+    expected = neural_network.model.predict(X, batch_size=len(X))
+
+    np.testing.assert_allclose(NumpyNetwork.from_keras(neural_network.model).predict(X), expected, rtol=1e-6, atol=1e-6)
+
+    # Also through the cached block predictions of NeuralNetworkStrategy
+    neural_network.set_inference('numpy')
+    predictions = np.array([neural_network.predict_cached(X, i, 64) for i in range(len(X))])
+
+    np.testing.assert_allclose(predictions, expected, rtol=1e-6, atol=1e-6)
@@ -0,0 +1,120 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import src.utils.result_cache as result_cache
+from src.classes.backtestResult import BacktestResult
+
+
+def make_data(n_days=50, seed=1):
+    random = np.random.RandomState(seed)
+    close = 10 + np.cumsum(random.normal(size=n_days))
+
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Volume': random.randint(100, 1000, size=n_days)},
+                        index=pd.date_range('2013-01-01', periods=n_days, freq='B'))
+
+
+def make_result(n_days=10):
+    dates = [d.date() for d in pd.date_range('2013-01-01', periods=n_days, freq='B')]
+    values = np.linspace(6000.0, 6500.0, n_days)
+
+    return BacktestResult(dates, values, values / 100, {'Inicial': 6000.0, 'Final': 6500.0})
+
+
+def write_entry(folder, key, size, last_use):
+    path = os.path.join(str(folder), key + result_cache.RESULT_EXTENSION)
+
+    with open(path, 'wb') as f:
+        f.write(b'0' * size)
+
+    os.utime(path, (last_use, last_use))
+
+
+def saved_keys(folder):
+    return sorted(file_name[:-len(result_cache.RESULT_EXTENSION)] for file_name in os.listdir(str(folder))
+                  if file_name.endswith(result_cache.RESULT_EXTENSION))
+
+
+def test_result_key_is_stable():
+    df = make_data()
+    inputs = {'commission': 0.001, 'options': {'gain': 0.07, 'loss': 0.03}, 'seed': 1}
+
+    key = result_cache.get_result_key('neural-network', df, inputs)
+
+    # Same data in a copy and the same inputs in another order
+    same_inputs = {'seed': 1, 'options': {'loss': 0.03, 'gain': 0.07}, 'commission': 0.001}
+
+    assert result_cache.get_result_key('neural-network', df.copy(), same_inputs) == key
+
+
+def test_result_key_changes_with_the_execution_inputs_and_data():
+    df = make_data()
+    inputs = {'commission': 0.001, 'options': {'gain': 0.07, 'loss': 0.03}, 'seed': 1}
+
+    key = result_cache.get_result_key('neural-network', df, inputs)
+
+    changed_close = df.copy()
+    changed_close.iloc[-1, changed_close.columns.get_loc('Close')] += 0.01
+
+    keys = [
+        result_cache.get_result_key('combined-signal-pso', df, inputs),
+        result_cache.get_result_key('neural-network', df, dict(inputs, commission=0.002)),
+        result_cache.get_result_key('neural-network', df, dict(inputs, options={'gain': 0.07, 'loss': 0.05})),
+        result_cache.get_result_key('neural-network', df, dict(inputs, seed=2)),
+        result_cache.get_result_key('neural-network', df[:-1], inputs),
+        result_cache.get_result_key('neural-network', changed_close, inputs),
+    ]
+
+    assert key not in keys
+    assert len(set(keys)) == len(keys)
+
+
+def test_evict_results_removes_least_recently_used(tmp_path):
+    now = time.time()
+
+    write_entry(tmp_path, 'a', 100, now - 400)
+    write_entry(tmp_path, 'b', 100, now - 300)
+    write_entry(tmp_path, 'c', 100, now - 200)
+    write_entry(tmp_path, 'd', 100, now - 100)
+
+    # Other files of the folder are not results
+    (tmp_path / 'notes.txt').write_bytes(b'0' * 1000)
+
+    result_cache.evict_results(str(tmp_path), max_size=250)
+
+    assert saved_keys(tmp_path) == ['c', 'd']
+    assert (tmp_path / 'notes.txt').exists()
+
+
+def test_evict_results_never_removes_the_kept_result(tmp_path):
+    now = time.time()
+
+    write_entry(tmp_path, 'a', 100, now - 400)
+    write_entry(tmp_path, 'b', 100, now - 300)
+    write_entry(tmp_path, 'c', 100, now - 200)
+
+    result_cache.evict_results(str(tmp_path), max_size=250, keep='a')
+
+    assert saved_keys(tmp_path) == ['a', 'c']
+
+
+def test_loading_a_result_marks_it_as_recently_used(tmp_path):
+    now = time.time()
+
+    for n, key in enumerate(['a', 'b', 'c']):
+        result_cache.save_result(key, make_result(), {'period': n}, folder=str(tmp_path))
+        path = os.path.join(str(tmp_path), key + result_cache.RESULT_EXTENSION)
+        os.utime(path, (now - 300 + 100*n, now - 300 + 100*n))
+
+    entry = result_cache.load_result('a', folder=str(tmp_path))
+
+    assert entry['params'] == {'period': 0}
+    np.testing.assert_array_equal(entry['result'].values, make_result().values)
+
+    size = os.path.getsize(os.path.join(str(tmp_path), 'a' + result_cache.RESULT_EXTENSION))
+    result_cache.evict_results(str(tmp_path), max_size=2*size)
+
+    assert saved_keys(tmp_path) == ['a', 'c']
@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+bt = pytest.importorskip('backtrader')
+
+import src.strategies_execution.executions as executions
+
+
+DATA_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+COMMISSION = 0.001
+
+# Metrics of both engines that must be equal
+METRICS = ['Final', 'Ganancias', 'Max DD', 'Trades total', 'Trades+', 'Trades-', 'Avg trade', 'Avg profit', 'Avg loss']
+
+CASES = [
+    ('buy-and-hold', {}),
+    ('classic', {}),
+    ('classic', {'ma_short': 5, 'ma_long': 20, 'rsi_period': 10}),
+    ('one-ma', {}),
+    ('one-ma', {'maperiod': 40}),
+    ('two-ma', {}),
+    ('two-ma', {'ma_short': 10, 'ma_long': 50}),
+]
+
+PERIODS = [
+    ('SAN', '2013-01-01', '2016-12-31'),
+    ('FB', '2014-01-01', '2015-12-31'),
+]
+
+
+def load_data(data_name, start_date, end_date):
+    df = pd.read_csv(os.path.join(DATA_FOLDER, data_name + '.csv'), index_col='Date', parse_dates=True)
+
+    return df[start_date:end_date]
+
+
+@pytest.mark.parametrize('data_name, start_date, end_date', PERIODS)
+@pytest.mark.parametrize('strategy_name, params', CASES)
+def test_vectorized_engine_matches_backtrader(data_name, start_date, end_date, strategy_name, params):
+    df = load_data(data_name, start_date, end_date)
+    strategy = executions.get_strategy(strategy_name)
+
+    expected = executions.run_strategy(strategy, df, COMMISSION, 'backtrader', **params)
+    result = executions.run_strategy(strategy, df, COMMISSION, 'vectorized', **params)
+
+    for name in METRICS:
+        assert result.metrics[name] == pytest.approx(expected.metrics[name], rel=1e-9, abs=1e-6), name
+
+    assert list(result.dates) == list(expected.dates)
+    np.testing.assert_allclose(result.values, expected.values, rtol=1e-9)
+
+
+@pytest.mark.parametrize('strategy_name, params', CASES)
+def test_warmup_bars_are_not_simulated(strategy_name, params):
+    df = load_data('SAN', '2012-01-01', '2014-12-31')
+    strategy = executions.get_strategy(strategy_name)
+
+    expected = executions.run_strategy(strategy, df, COMMISSION, 'backtrader', start_date='2013-01-01', **params)
+    result = executions.run_strategy(strategy, df, COMMISSION, 'vectorized', start_date='2013-01-01', **params)
+
+    # The indicators are ready, the strategy is simulated from the start date
+    assert list(expected.dates) == list(df['2013-01-01':].index.date)
+    assert list(result.dates) == list(expected.dates)
+    np.testing.assert_allclose(result.values, expected.values, rtol=1e-9)
+
+    for name in METRICS:
+        assert result.metrics[name] == pytest.approx(expected.metrics[name], rel=1e-9, abs=1e-6), name
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('backtrader')
+
+import src.strategies_execution.execution_walk_forward as execution_walk_forward
+from src.classes.backtestResult import BacktestResult
+
+
+def make_data(start_date='2012-01-02', end_date='2014-12-31'):
+    index = pd.bdate_range(start_date, end_date)
+    close = np.linspace(10.0, 20.0, len(index))
+
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1000}, index=index)
+
+
+def make_fold_result(fold, initial_value=6000.0, daily_return=0.001, trades=(2, 1, 1)):
+    """
+    Result of a fold whose capital grows daily_return every business day of its test period
+    """
+    dates = [d.date() for d in pd.bdate_range(fold[1], fold[2])]
+    values = initial_value * (1.0 + daily_return) ** np.arange(1, len(dates) + 1)
+
+    metrics = {
+        'Inicial': initial_value,
+        'Final': values[-1],
+        'Trades total': trades[0],
+        'Trades+': trades[1],
+        'Trades-': trades[2]
+    }
+
+    return BacktestResult(dates, values, np.linspace(10.0, 11.0, len(dates)), metrics,
+                          series={'buys': np.zeros(len(dates)), 'sells': np.zeros(len(dates))})
+
+
+def test_get_folds():
+    df = make_data()
+
+    folds = execution_walk_forward.get_folds(df, '2013-01-01', '2014-12-31', window=12, step=6, horizon=6)
+
+    assert folds == [
+        ('2012-01-01', '2013-01-01', '2013-06-30'),
+        ('2012-07-01', '2013-07-01', '2013-12-31'),
+        ('2013-01-01', '2014-01-01', '2014-06-30'),
+        ('2013-07-01', '2014-07-01', '2014-12-31'),
+    ]
+
+    # The last test period ends with the market data
+    folds = execution_walk_forward.get_folds(df[:'2014-10-15'], '2013-01-01', '2014-12-31', window=12, step=6, horizon=6)
+
+    assert folds[-1] == ('2013-07-01', '2014-07-01', '2014-10-15')
+
+
+def test_stitch_overlapping_folds():
+    df = make_data()
+
+    # Every test period overlaps the next one for three months
+    folds = execution_walk_forward.get_folds(df, '2013-01-01', '2014-12-31', window=12, step=3, horizon=6)
+    results = [make_fold_result(fold) for fold in folds]
+
+    dates, values, closes, series = execution_walk_forward.stitch_results(folds, results)
+
+    # Each day is simulated by only one fold, the last one that started before it
+    assert all(np.diff(np.array(dates, dtype='datetime64[D]')).astype(int) > 0)
+    assert list(dates) == [d.date() for d in pd.bdate_range('2013-01-01', folds[-1][2])]
+
+    assert len(values) == len(closes) == len(series['buys']) == len(series['sells']) == len(dates)
+
+    # The capital grows every day, also when a new fold starts
+    expected = 6000.0 * 1.001 ** np.arange(1, len(dates) + 1)
+    np.testing.assert_allclose(values, expected)
+
+
+def test_stitch_skips_failed_folds():
+    df = make_data()
+
+    folds = execution_walk_forward.get_folds(df, '2013-01-01', '2014-12-31', window=12, step=6, horizon=6)
+    results = [make_fold_result(fold) for fold in folds]
+    results[1] = None
+
+    dates, values, closes, series = execution_walk_forward.stitch_results(folds, results)
+
+    days = [len(pd.bdate_range(fold[1], fold[2])) for fold in folds]
+
+    assert len(dates) == days[0] + days[2] + days[3]
+    assert pd.Timestamp(folds[1][1]).date() not in list(dates)
+    assert dates[days[0]] == pd.Timestamp(folds[2][1]).date()
+
+    # The fold after the failed one starts with the final capital of the fold before it
+    first_final = values[days[0] - 1]
+
+    np.testing.assert_allclose(first_final, 6000.0 * 1.001 ** days[0])
+    np.testing.assert_allclose(values[days[0]], first_final * 1.001)
+    np.testing.assert_allclose(values[-1], 6000.0 * 1.001 ** len(dates))
+
+    metrics = execution_walk_forward.get_summary(values, results, [1.0, 2.0, 3.0, 4.0], 6000.0)
+
+    assert metrics['Folds'] == 4
+    assert metrics['Folds fallidos'] == 1
+    assert metrics['Folds+'] == 3
+    assert metrics['Trades total'] == 6
+    assert metrics['Tiempo folds(s)'] == 10.0
+
+
+def test_stitch_without_results():
+    folds = [('2012-01-01', '2013-01-01', '2013-06-30')]
+
+    dates, values, closes, series = execution_walk_forward.stitch_results(folds, [None])
+
+    assert len(dates) == len(values) == len(closes) == 0
+    assert series == {}
+
+    metrics = execution_walk_forward.get_summary(values, [None], [1.0], 6000.0)
+
+    assert metrics['Final'] == 6000.0
+    assert metrics['Max DD'] == 0.0
+    assert metrics['Folds fallidos'] == 1
+
+
+def test_summary_max_drawdown():
+    values = np.array([6000.0, 6600.0, 5280.0, 6270.0, 7000.0, 6300.0, 6650.0])
+
+    # Peaks 6000, 6600, 6600, 6600, 7000, 7000, 7000: drawdowns 0%, 0%, 20%, 5%, 0%, 10%, 5%
+    metrics = execution_walk_forward.get_summary(values, [], [], 6000.0)
+
+    assert metrics['Max DD'] == -20.0
+    assert metrics['Final'] == 6650.0
+    assert metrics['Ganancias'] == 650.0
+    assert metrics['Ganancia(%)'] == pytest.approx(650.0 / 6000.0)